@@ -1,7 +1,21 @@
 import streamlit as st
 import pandas as pd
+import altair as alt
 from datetime import datetime, timedelta
-from main import run_flight_search   # your wrapper function
+import json
+import time
+from main import (
+    search_params,
+    search_run_params,
+    load_finished_search,
+    finished_search_version
+)
+from utilities import ENTRY_COLUMNS
+from store import get_price_store
+from search_jobs import get_job_manager
+from price_calendar import PriceCalendar
+from results import prepare_results, filter_and_sort
+from export import EXPORT_FORMATS, available_formats, export_bytes, iter_dataframe_rows
 
 st.title("✈️ Flight Finder Tool")
 
@@ -62,6 +76,19 @@ maxFlights = st.slider("Max outgoing flights per day", 1, 20, 6)
 
 isRoundtrip = st.checkbox("Roundtrip", True)
 
+maxWorkers = st.number_input("Parallel requests", 1, 32, 8)
+
+smartSweep = st.checkbox(
+    "Smart sweep (sample the date grid, then refine only around the cheapest dates)", False
+)
+
+resultSet = st.radio(
+    "Keep",
+    ["All flights", "Only the N cheapest", "Only the price / duration / stops Pareto front"],
+    horizontal=True
+)
+topN = st.number_input("N", 1, 500, 25) if resultSet == "Only the N cheapest" else None
+
 # ----------- Sorting option ----------
 st.header("Sort Results")
 sort_col = st.selectbox(
@@ -69,68 +96,250 @@ sort_col = st.selectbox(
     ["Price", "duration_hours", "Departure Date Outgoing"]
 )
 
+
+# ----------- Result helpers ----------
+def calendar_chart(calendar, selectable=False):
+    """Heatmap of a PriceCalendar: departure day × trip length, coloured by min price."""
+    data = pd.DataFrame(calendar.to_records(), columns=["Departure", "Trip days", "Min price", "Min duration", "Flights"])
+    chart = alt.Chart(data).mark_rect().encode(
+        x=alt.X("Trip days:O", title="Trip length (days)"),
+        y=alt.Y("Departure:O", title="Departure"),
+        color=alt.Color("Min price:Q", scale=alt.Scale(scheme="redyellowgreen", reverse=True), title="Min price (€)"),
+        tooltip=["Departure", "Trip days", "Min price", alt.Tooltip("Min duration", title="Min duration (mins.)"), "Flights"],
+    )
+    if selectable:
+        cell = alt.selection_point(name="cell", fields=["Departure", "Trip days"], on="click", clear="dblclick")
+        chart = chart.add_params(cell).encode(opacity=alt.condition(cell, alt.value(1.0), alt.value(0.35)))
+    return chart
+
+
+@st.cache_resource
+def job_manager():
+    # One manager per server process, shared by every session
+    return get_job_manager()
+
+
+@st.cache_data(show_spinner=False)
+def load_cached_search(params_key, version):
+    # version invalidates the entry when the stored results change
+    return load_finished_search(json.loads(params_key))
+
+
 # ----------- Run search ----------------
+params = search_params(
+    departureId=str(departureId),
+    arrivalId=str(arrivalId),
+    departureDateStart=str(departureDateStart),
+    departureDateEnd=str(departureDateEnd),
+    minDurationDays=minDurationDays,
+    maxDurationDays=maxDurationDays,
+    maxPrice=str(maxPrice),
+    adults=str(adults),
+    maxDuration=str(maxDuration) + "h00",
+    maxFlights=maxFlights,
+    isRoundtrip=isRoundtrip
+)
+sweep = "smart" if smartSweep else "full"
+select = {
+    "topK": topN,
+    "pareto": resultSet == "Only the price / duration / stops Pareto front",
+    "earlyStop": topN is not None,
+}
+search_key = json.dumps(dict(params, sweep=sweep, select=select), sort_keys=True)
+
+# Results of this session's searches and their price calendars, keyed by search parameters
+results = st.session_state.setdefault("results", {})
+calendars = st.session_state.setdefault("calendars", {})
+
+
+def empty_calendar():
+    return PriceCalendar.for_search(str(departureDateStart), str(departureDateEnd), minDurationDays, maxDurationDays)
+
 run_button = st.button("🔎 Search flights")
 
+# Searches run on a process-wide job pool, not in this script run: they keep
+# going across reruns and page reloads, and identical searches from several
+# sessions share one job (and its API calls).
+manager = job_manager()
+search_kwargs = dict(params, sweep=sweep, **select)
+
 if run_button:
-    st.write("Searching flights... Please wait ⏳")
-
-    df = run_flight_search(
-        departureId=str(departureId),
-        arrivalId=str(arrivalId),
-        departureDateStart=str(departureDateStart),
-        departureDateEnd=str(departureDateEnd),
-        minDurationDays=minDurationDays,
-        maxDurationDays=maxDurationDays,
-        maxPrice=str(maxPrice),
-        adults=str(adults),
-        maxDuration=str(maxDuration) + "h00",
-        maxFlights=maxFlights,
-        isRoundtrip=isRoundtrip
-    )
+    job = manager.submit(maxWorkers=maxWorkers, **search_kwargs)
+elif search_key not in results:
+    # Re-attach to a running (or just finished) identical search, e.g. after a reload
+    job = manager.find(**search_kwargs)
+else:
+    job = None
 
-    # ----------- Convert duration to hours ----------
-    def minutes_to_hhmm(x):
-        try:
-            minutes = int(x)
-            h = minutes // 60
-            m = minutes % 60
-            return f"{h}h {m}m"
-        except:
-            return x  # keep original if conversion fails
-
-    if "duration" in df.columns:
-        df["duration_hours"] = df["duration"].apply(minutes_to_hhmm)
-
-    # ----------- Sort DataFrame ----------
-    if sort_col == "duration_hours":
-        # Convert HHhMM to minutes for proper sorting
-        def hhmm_to_minutes(x):
-            try:
-                parts = x.split("h")
-                h = int(parts[0])
-                m = int(parts[1].replace("m",""))
-                return h*60 + m
-            except:
-                return 0
-        df["duration_minutes"] = df["duration_hours"].apply(hhmm_to_minutes)
-        df_sorted = df.sort_values(by="duration_minutes", ascending=True)
-        df_sorted = df_sorted.drop(columns=["duration_minutes"])
+if job is not None:
+    status = job.snapshot()
+    if status["subscribers"] > 1 and status["status"] in ("queued", "running"):
+        st.info("An identical search is already running – showing its progress instead of starting another.")
+
+    progress = st.progress(0.0, text="Searching flights... Please wait ⏳")
+    live_calendar = st.empty()
+    live_table = st.empty()
+
+    # ----------- Poll the job, show results as they arrive ----------
+    partial_rows = []
+    calendar = empty_calendar()
+    while True:
+        status = job.snapshot()
+        new_rows = job.rows_since(len(partial_rows))
+        partial_rows += new_rows
+        if new_rows:
+            # Each row updates one cell; only the chart is redrawn
+            calendar.add_rows(new_rows)
+            live_calendar.altair_chart(calendar_chart(calendar), use_container_width=True)
+        if status["pairs_total"]:
+            progress.progress(
+                min(1.0, status["pairs_done"] / status["pairs_total"]),
+                text=f"Searched {status['pairs_done']}/{status['pairs_total']} date pairs · {status['rows']} flights found"
+            )
+        if partial_rows:
+            live_table.dataframe(pd.DataFrame(partial_rows, columns=ENTRY_COLUMNS).sort_values(by="Price"))
+
+        if status["status"] in ("done", "failed"):
+            break
+        # Redraw at most twice a second
+        time.sleep(0.5)
+
+    live_table.empty()
+    live_calendar.empty()
+
+    if status["status"] == "failed":
+        progress.empty()
+        st.error(f"Search failed: {status['error']}")
     else:
-        df_sorted = df.sort_values(by=sort_col, ascending=True)
+        df = job.df
+        progress.progress(1.0, text=f"Search complete: {len(df)} flights found")
 
-    st.success("Search complete!")
+        results[search_key] = prepare_results(df)
+        calendars[search_key] = df.attrs.get("calendar", calendar)
+        st.session_state["last_search"] = search_key
+        st.success("Search complete!")
+
+        report = df.attrs.get("sweep", {})
+        if sweep == "smart" and report:
+            st.info(
+                f"Smart sweep searched {report['pairs_searched']} of {report['pairs_total']} date pairs "
+                f"and skipped {report['skipped_fraction']:.0%} of the grid."
+            )
+
+if search_key not in results and sweep == "full" and resultSet == "All flights":
+    # A finished identical search in the price store (or on disk) is reused without calling the API
+    version = finished_search_version(params)
+    if version is not None:
+        df_stored = load_cached_search(json.dumps(params, sort_keys=True), version)
+        if df_stored is not None:
+            results[search_key] = prepare_results(df_stored)
+            calendars[search_key] = empty_calendar()
+            calendars[search_key].add_dataframe(df_stored)
+            st.session_state["last_search"] = search_key
+            st.info("Showing results of an earlier identical search.")
+
+if search_key in results:
+    df = results[search_key]
+    calendar = calendars.get(search_key)
+elif "last_search" in st.session_state:
+    df = results[st.session_state["last_search"]]
+    calendar = calendars.get(st.session_state["last_search"])
+    st.info("Search parameters changed – press 🔎 Search flights to update. Showing the previous results.")
+else:
+    df = None
+    calendar = None
+
+# ----------- Price calendar (click a cell to filter the table) ----------
+selected_cell = None
+if df is not None and not df.empty and calendar is not None:
+    st.header("Price Calendar")
+    event = st.altair_chart(calendar_chart(calendar, selectable=True), use_container_width=True, on_select="rerun", key="calendar")
+    points = event.selection.get("cell") or []
+    if points:
+        selected_cell = (points[0]["Departure"], int(points[0]["Trip days"]))
+        st.caption(f"Showing flights departing {selected_cell[0]} for {selected_cell[1]} days – double-click the chart to show all.")
+    else:
+        cheapest = calendar.cheapest(1)
+        if cheapest:
+            st.caption(f"Cheapest: departing {cheapest[0][0]} for {cheapest[0][1]} days from {cheapest[0][2]:.0f} € – click a cell to filter.")
 
+# ----------- Filter / sort cached results (no API calls) ----------
+if df is not None and not df.empty:
+    st.header("Filter Results")
+
+    col6, col7, col8 = st.columns(3)
+
+    with col6:
+        price_limit = int(df["Price"].max()) if df["Price"].notna().any() else int(maxPrice)
+        filter_price = st.slider("Max total price (€)", 0, max(price_limit, 1), price_limit)
+
+    with col7:
+        stop_options = sorted(int(x) for x in df["Stops"].dropna().unique())
+        filter_stops = st.multiselect("Stops (return)", stop_options)
+
+    with col8:
+        airline_options = sorted(set().union(*df["_airlines"]))
+        filter_airlines = st.multiselect("Airlines", airline_options)
+
+    df_sorted = filter_and_sort(df, filter_price, filter_stops, filter_airlines, sort_col, selected_cell)
+
+    st.caption(f"{len(df_sorted)} of {len(df)} flights")
     st.dataframe(df_sorted)
 
-    # Excel download
-    excel_file = "flights_export.xlsx"
-    df_sorted.to_excel(excel_file, index=False)
+    # Download (built on request only, so re-sorting stays instant): streamed in
+    # chunks into an in-memory buffer of this session, never a shared file on disk
+    shown_key = search_key if search_key in results else st.session_state.get("last_search")
+    # Keyed like the search ran (smart sweep / early stop finish other work units)
+    shown = json.loads(shown_key)
+    shown_params = search_run_params(
+        {name: value for name, value in shown.items() if name not in ("sweep", "select")},
+        sweep=shown["sweep"], **shown["select"]
+    )
+    store = get_price_store()
+    stored = store is not None and store.search_completed_at(shown_params) is not None
+
+    col9, col10, col11 = st.columns([1, 2, 1])
+    with col9:
+        export_format = st.selectbox("Format", available_formats(), format_func=str.upper)
+    with col10:
+        export_scope = st.radio(
+            "Rows",
+            ["Filtered table", "Every result of the search (from the price store)"] if stored else ["Filtered table"],
+            horizontal=True
+        )
+    with col11:
+        st.write("")
+        prepare = st.button("Prepare download")
+    if prepare:
+        if export_scope == "Filtered table":
+            batches, columns = iter_dataframe_rows(df_sorted), list(df_sorted.columns)
+        else:
+            # Straight from the store, one batch at a time: no DataFrame of the whole search
+            batches, columns = store.iter_search_rows(shown_params), None
+        try:
+            data = export_bytes(batches, export_format, columns=columns)
+        except RuntimeError as e:
+            st.error(str(e))
+        else:
+            st.download_button(
+                label=f"📥 Download {export_format.upper()}",
+                data=data,
+                file_name=f"flights_{departureId}_{arrivalId}.{EXPORT_FORMATS[export_format]['extension']}",
+                mime=EXPORT_FORMATS[export_format]["mime"]
+            )
+elif df is not None:
+    st.warning("No flights found.")
 
-    with open(excel_file, "rb") as f:
-        st.download_button(
-            label="📥 Download Excel",
-            data=f,
-            file_name=excel_file,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# ----------- Price history (price store, no API calls) ----------
+store = get_price_store()
+if store is not None:
+    with st.expander(f"Cheapest ever seen {departureId} → {arrivalId}"):
+        history = store.cheapest(
+            str(departureId), str(arrivalId),
+            date_from=str(departureDateStart), date_to=str(departureDateEnd),
+            roundtrip=isRoundtrip, limit=20
         )
+        if history.empty:
+            st.caption("No stored prices for this route and date window yet.")
+        else:
+            st.dataframe(history)
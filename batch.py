@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import re
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utilities import load_config
+from cache import setup_response_cache
+from ratelimit import SharedTokenBucket, install_rate_limiter, rate_limiter_from_config
+
+
+# Parameters of run_flight_search a job may set, with defaults for the optional ones
+JOB_DEFAULTS = {
+    "adults": "1",
+    "maxPrice": "850",
+    "maxDuration": 16,
+    "minDurationDays": 7,
+    "maxDurationDays": 14,
+    "maxFlights": 4,
+    "isRoundtrip": True,
+}
+JOB_REQUIRED = ["departureId", "arrivalId", "departureDateStart", "departureDateEnd"]
+
+
+#########################################
+#              load_jobs                #
+#########################################
+
+def load_jobs(jobs_file):
+    """
+    Reads search specs from a JSON-lines file, one job per line, e.g.
+    {"name": "ist-bkk-jan", "departureId": "IST", "arrivalId": "BKK",
+     "departureDateStart": "2026-01-05", "departureDateEnd": "2026-01-31",
+     "minDurationDays": 15, "maxDurationDays": 23, "maxPrice": "850", "maxFlights": 4}
+    Blank lines and lines starting with # are ignored.
+    """
+    jobs = []
+    with open(jobs_file, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            spec = json.loads(line)
+            missing = [key for key in JOB_REQUIRED if key not in spec]
+            if missing:
+                raise ValueError(f"{jobs_file}:{line_no}: job is missing {', '.join(missing)}")
+
+            job = dict(JOB_DEFAULTS)
+            job.update(spec)
+            job.setdefault("name", default_job_name(job, len(jobs) + 1))
+            if any(other["name"] == job["name"] for other in jobs):
+                raise ValueError(f"{jobs_file}:{line_no}: duplicate job name {job['name']!r}")
+            jobs.append(job)
+    return jobs
+
+
+def default_job_name(job, index):
+    kind = "roundtrip" if job.get("isRoundtrip", True) else "oneway"
+    return f"{index:03d}_{kind}_{job['departureId']}_{job['arrivalId']}_{job['departureDateStart']}_{job['departureDateEnd']}"
+
+
+def job_file_name(out_dir, job):
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(job["name"]))
+    return os.path.join(out_dir, f"{safe_name}.csv")
+
+
+#########################################
+#            worker process             #
+#########################################
+
+def _init_worker(limiter, rate_config):
+    # All workers share the parent's limiter (shared memory) instead of building their own
+    if limiter is not None:
+        install_rate_limiter(limiter, rate_config)
+
+
+def _run_job(job, out_dir, config):
+    from main import run_flight_search
+
+    params = {key: value for key, value in job.items() if key != "name"}
+    fileName = job_file_name(out_dir, job)
+
+    started = time.time()
+    summary = {"name": job["name"], "file": fileName, "params": params}
+    try:
+        df = run_flight_search(fileName=fileName, config=config, **params)
+        summary.update(status="ok", rows=len(df))
+        if len(df) and "Price" in df.columns:
+            summary["min_price"] = float(df["Price"].min())
+    except Exception as e:
+        summary.update(status="failed", error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc())
+
+    summary["elapsed_s"] = round(time.time() - started, 2)
+    return summary
+
+
+#########################################
+#              run_batch                #
+#########################################
+
+def run_batch(jobs_file, out_dir="batch_results", workers=4, config_file="config.json"):
+    """
+    Runs every job of jobs_file on a pool of worker processes.
+
+    All workers draw from one rate limiter in shared memory (config
+    'rate_limit') and the same on-disk response cache (config 'cache'),
+    so parallel jobs neither exceed the plan's rate nor refetch each
+    other's responses. Each job writes <out_dir>/<name>.csv; a summary of
+    all jobs is written to <out_dir>/batch_summary.json and returned.
+    """
+    config = load_config(config_file)
+    jobs = load_jobs(jobs_file)
+    os.makedirs(out_dir, exist_ok=True)
+
+    rate_config = config.get("rate_limit")
+    limiter = rate_limiter_from_config(rate_config, cls=SharedTokenBucket)
+    if limiter is None:
+        print("[WARNING] No 'rate_limit' in config: workers are not throttled globally.")
+
+    print(f"Running {len(jobs)} jobs on {workers} worker processes...")
+    started = time.time()
+    results = []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(limiter, rate_config)) as pool:
+        futures = {pool.submit(_run_job, job, out_dir, config): job for job in jobs}
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"[{result['status'].upper()}] {result['name']}: {result.get('rows', 0)} rows in {result['elapsed_s']}s")
+
+    # Keep the summary in job-file order
+    order = {job["name"]: i for i, job in enumerate(jobs)}
+    results.sort(key=lambda result: order[result["name"]])
+
+    summary = {
+        "jobs_file": jobs_file,
+        "jobs": len(jobs),
+        "succeeded": sum(result["status"] == "ok" for result in results),
+        "failed": sum(result["status"] != "ok" for result in results),
+        "rows": sum(result.get("rows", 0) for result in results),
+        "elapsed_s": round(time.time() - started, 2),
+        "results": results,
+    }
+
+    cache = setup_response_cache(config.get("cache"))
+    if cache is not None:
+        summary["cache_entries"] = cache.stats()["entries"]
+
+    with open(os.path.join(out_dir, "batch_summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, default=str)
+
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run many flight searches from a JSON-lines job file.")
+    parser.add_argument("jobs_file", help="JSON-lines file with one search spec per line")
+    parser.add_argument("--out-dir", default="batch_results", help="directory for result CSVs and the summary")
+    parser.add_argument("--workers", type=int, default=4, help="number of worker processes")
+    parser.add_argument("--config", default="config.json", help="config file")
+    args = parser.parse_args()
+
+    summary = run_batch(args.jobs_file, args.out_dir, args.workers, args.config)
+    print(f"Done: {summary['succeeded']}/{summary['jobs']} jobs succeeded, {summary['rows']} rows, {summary['elapsed_s']}s")
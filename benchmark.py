@@ -0,0 +1,239 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from decode import JSON_BACKEND, decode_response
+from mock_api import MockFlightsAPI, synthetic_response
+from main import iter_flight_search
+from results import ResultSink
+from utilities import ENTRY_COLUMNS
+
+
+# Search used by every scenario (scaled down from the IST→BKK example run)
+DEFAULT_SEARCH = {
+    "departureId": "IST",
+    "arrivalId": "BKK",
+    "departureDateStart": "2026-01-01",
+    "departureDateEnd": "2026-01-15",
+    "minDurationDays": 10,
+    "maxDurationDays": 14,
+    "maxPrice": "850",
+    "adults": "1",
+    "maxDuration": 16,
+    "maxFlights": 4,
+}
+
+# name → extra iter_flight_search arguments
+SCENARIOS = {
+    "roundtrip-sequential": {"isRoundtrip": True, "maxWorkers": 1},
+    "roundtrip-threads-8": {"isRoundtrip": True, "maxWorkers": 8},
+    "roundtrip-threads-16": {"isRoundtrip": True, "maxWorkers": 16},
+    "roundtrip-smart-8": {"isRoundtrip": True, "maxWorkers": 8, "sweep": "smart"},
+    "roundtrip-top10-early-8": {"isRoundtrip": True, "maxWorkers": 8, "topK": 10, "earlyStop": True},
+    "oneway-sequential": {"isRoundtrip": False, "maxWorkers": 1},
+    "oneway-threads-8": {"isRoundtrip": False, "maxWorkers": 8},
+}
+
+
+#########################################
+#            run_scenario               #
+#########################################
+
+def run_scenario(api, name, extra, search=DEFAULT_SEARCH, rate_limit=None, measure_memory=True, quiet=True, with_metrics=False):
+    """
+    Runs iter_flight_search end-to-end against the mock API and returns
+    requests/sec, rows/sec, time-to-first-result and peak traced memory.
+    with_metrics adds the per-phase time split collected by metrics.py.
+    """
+    workdir = tempfile.mkdtemp(prefix="flight-bench-")
+    config = {
+        "api": {"base_url": api.base_url, "headers": {"x-rapidapi-key": "bench", "x-rapidapi-host": "mock"}},
+        "rate_limit": rate_limit or {"requests_per_second": 1000, "burst": 1000},
+        "metrics": {"enabled": with_metrics},
+    }
+    params = dict(search, **extra)
+    params.update(fileName=os.path.join(workdir, f"{name}.csv"), config=config, resume=False)
+
+    api.reset_counters()
+    if measure_memory:
+        tracemalloc.start()
+
+    first_result = None
+    started = time.perf_counter()
+    out = io.StringIO() if quiet else None
+    with contextlib.redirect_stdout(out) if quiet else contextlib.nullcontext():
+        search_iter = iter_flight_search(**params)
+        while True:
+            try:
+                batch = next(search_iter)
+            except StopIteration as done:
+                df = done.value
+                break
+            if first_result is None and batch["rows"]:
+                first_result = time.perf_counter() - started
+    elapsed = time.perf_counter() - started
+
+    peak = None
+    if measure_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    result = {
+        "scenario": name,
+        "requests": api.requests,
+        "errors": api.errors,
+        "rows": len(df),
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(api.requests / elapsed, 1) if elapsed else None,
+        "rows_per_s": round(len(df) / elapsed, 1) if elapsed else None,
+        "time_to_first_result_s": round(first_result, 3) if first_result is not None else None,
+        "peak_memory_mb": round(peak / 2 ** 20, 2) if peak is not None else None,
+    }
+    if with_metrics:
+        for phase, seconds in df.attrs["metrics"]["phases_s"].items():
+            result[f"{phase}_s"] = round(seconds, 3)
+    return result
+
+
+#########################################
+#         result sink benchmark         #
+#########################################
+
+def bench_result_sink(rows=5000, flush_every=10):
+    """
+    Compares the old per-row pd.concat + full to_csv rewrite with ResultSink's
+    append-only flushes for the same synthetic rows.
+    """
+    row = {column: i for i, column in enumerate(ENTRY_COLUMNS)}
+    workdir = tempfile.mkdtemp(prefix="flight-bench-")
+
+    started = time.perf_counter()
+    df = pd.DataFrame()
+    for i in range(rows):
+        df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
+        if i % flush_every == 0:
+            df.to_csv(os.path.join(workdir, "concat.csv"), index=False)
+    legacy = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ResultSink(os.path.join(workdir, "sink.csv")) as sink:
+        for i in range(rows):
+            sink.add(row)
+            if i % flush_every == 0:
+                sink.flush()
+        sink.to_dataframe()
+    appended = time.perf_counter() - started
+
+    return {
+        "rows": rows,
+        "concat_to_csv_s": round(legacy, 3),
+        "result_sink_s": round(appended, 3),
+        "speedup": round(legacy / appended, 1) if appended else None,
+    }
+
+
+#########################################
+#           decode benchmark            #
+#########################################
+
+def bench_decode(pages=200, flights_per_page=100):
+    """
+    Compares response.json()-style full stdlib parsing with decode_response
+    (orjson when installed + compact records) on large synthetic pages.
+    """
+    bodies = [
+        json.dumps(synthetic_response(
+            "/flights/search-roundtrip",
+            {"departureId": "IST", "arrivalId": "BKK", "departureDate": f"2026-01-{1 + i % 28:02d}", "page": str(i)},
+            flights_per_page
+        )).encode()
+        for i in range(pages)
+    ]
+
+    # Results are dropped as we go, so the second pass doesn't pay GC for the first
+    started = time.perf_counter()
+    for body in bodies:
+        json.loads(body)["data"]
+    stdlib = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for body in bodies:
+        decode_response(body)
+    selective = time.perf_counter() - started
+
+    full, compact = json.loads(bodies[0])["data"], decode_response(bodies[0])
+    return {
+        "pages": pages,
+        "flights_per_page": flights_per_page,
+        "backend": JSON_BACKEND,
+        "json_loads_s": round(stdlib, 3),
+        "decode_response_s": round(selective, 3),
+        "speedup": round(stdlib / selective, 1) if selective else None,
+        "kept_bytes_ratio": round(len(json.dumps(compact)) / len(json.dumps(full)), 2),
+    }
+
+
+#########################################
+#                main                   #
+#########################################
+
+def print_table(results):
+    columns = list(results[0].keys())
+    widths = {c: max(len(c), *(len(str(r[c])) for r in results)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for r in results:
+        print("  ".join(str(r[c]).ljust(widths[c]) for c in columns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the flight search against a local mock API.")
+    parser.add_argument("--scenarios", nargs="*", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.05, help="mock API latency per request (s)")
+    parser.add_argument("--error-429", type=float, default=0.0, help="share of 429 responses")
+    parser.add_argument("--error-5xx", type=float, default=0.0, help="share of 503 responses")
+    parser.add_argument("--rate", type=float, default=None, help="rate limit (req/s) applied to the search")
+    parser.add_argument("--days", type=int, default=None, help="number of departure days to search")
+    parser.add_argument("--sink-rows", type=int, default=3000, help="rows for the result sink benchmark (0 = skip)")
+    parser.add_argument("--decode-pages", type=int, default=200, help="pages for the JSON decode benchmark (0 = skip)")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (it slows the run down)")
+    parser.add_argument("--metrics", action="store_true", help="report the network / parsing / rows / io / dataframe time split")
+    parser.add_argument("--json", default=None, help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    search = dict(DEFAULT_SEARCH)
+    if args.days:
+        start = pd.Timestamp(search["departureDateStart"])
+        search["departureDateEnd"] = (start + pd.Timedelta(days=args.days + 1)).strftime("%Y-%m-%d")
+    rate_limit = {"requests_per_second": args.rate, "burst": max(1, int(args.rate))} if args.rate else None
+
+    report = {"search": search, "mock": vars(args), "scenarios": []}
+
+    with MockFlightsAPI(latency=args.latency, error_429=args.error_429, error_5xx=args.error_5xx) as api:
+        for name in args.scenarios:
+            result = run_scenario(api, name, SCENARIOS[name], search, rate_limit, not args.no_memory, with_metrics=args.metrics)
+            report["scenarios"].append(result)
+            print(f"{name}: {result['elapsed_s']}s", flush=True)
+
+    print()
+    print_table(report["scenarios"])
+
+    if args.sink_rows:
+        report["result_sink"] = bench_result_sink(args.sink_rows)
+        print()
+        print_table([report["result_sink"]])
+
+    if args.decode_pages:
+        report["decode"] = bench_decode(args.decode_pages)
+        print()
+        print_table([report["decode"]])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
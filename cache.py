@@ -0,0 +1,206 @@
+from decode import loads, dumps
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+
+# Seconds a response stays valid, per endpoint (last path segment).
+# A TTL of 0 disables caching for that endpoint.
+# returningToken values expire quickly, so the returning endpoint is not cached by default.
+DEFAULT_TTL = {
+    "search-roundtrip": 6 * 3600,
+    "search-one-way": 6 * 3600,
+    "roundtrip-returning": 0,
+}
+
+
+#########################################
+#            ResponseCache              #
+#########################################
+
+class ResponseCache:
+    """
+    SQLite-backed cache for get_request responses.
+
+    Entries are keyed by base url + endpoint path + sorted query parameters
+    (including the returningToken), expire after a per-endpoint TTL and are
+    evicted least-recently-used once more than max_entries are stored.
+    Safe to share between threads; several processes may use the same file.
+    """
+
+    def __init__(self, path="response_cache.sqlite", ttl=None, default_ttl=3600, max_entries=20000):
+        self.path = path
+        self.ttl = dict(DEFAULT_TTL)
+        self.ttl.update(ttl or {})
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.endpoint_stats = {}
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " endpoint TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    # ---------------------------------------------------
+    # Keys
+    # ---------------------------------------------------
+    @staticmethod
+    def make_key(base_url, endpoint_path, retTok=None):
+        """Returns (endpoint, key) for a request, independent of parameter order."""
+        parts = urlsplit(endpoint_path)
+        params = parse_qsl(parts.query, keep_blank_values=True)
+        if retTok:
+            params.append(("returningToken", retTok))
+
+        endpoint = parts.path.rstrip("/").rsplit("/", 1)[-1]
+        key = base_url.rstrip("/") + parts.path + "?" + urlencode(sorted(params))
+        return endpoint, key
+
+    def ttl_for(self, endpoint):
+        return self.ttl.get(endpoint, self.default_ttl)
+
+    def _count(self, endpoint, hit):
+        stats = self.endpoint_stats.setdefault(endpoint, {"hits": 0, "misses": 0})
+        if hit:
+            self.hits += 1
+            stats["hits"] += 1
+        else:
+            self.misses += 1
+            stats["misses"] += 1
+
+    # ---------------------------------------------------
+    # Lookup / store
+    # ---------------------------------------------------
+    def get(self, base_url, endpoint_path, retTok=None):
+        """Returns the cached 'data' payload, or None on a miss."""
+        endpoint, key = self.make_key(base_url, endpoint_path, retTok)
+        if self.ttl_for(endpoint) <= 0:
+            return None
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self._count(endpoint, hit=False)
+                return None
+
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._count(endpoint, hit=True)
+
+        return loads(row[0])
+
+    def peek(self, base_url, endpoint_path, retTok=None):
+        """
+        Like get(), without side effects: no hit / miss counts and no LRU
+        update, expired entries are left for get() to delete. For planning.
+        """
+        endpoint, key = self.make_key(base_url, endpoint_path, retTok)
+        if self.ttl_for(endpoint) <= 0:
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM responses WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return loads(row[0]) if row is not None else None
+
+    def put(self, base_url, endpoint_path, data, retTok=None):
+        endpoint, key = self.make_key(base_url, endpoint_path, retTok)
+        ttl = self.ttl_for(endpoint)
+        if ttl <= 0:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, data, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, endpoint, dumps(data), now + ttl, now)
+            )
+            # LRU eviction above the size cap
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self):
+        """Hit/miss counters of this process plus the number of stored entries."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "endpoints": {k: dict(v) for k, v in self.endpoint_stats.items()},
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+#########################################
+#         setup_response_cache          #
+#########################################
+
+_response_cache = None
+_response_cache_config = None
+_response_cache_lock = threading.Lock()
+
+
+def setup_response_cache(cache_config):
+    """
+    Configures the process-wide cache used by get_request from the
+    'cache' section of config.json. Missing or disabled config turns caching off.
+    A changed config replaces the cache without closing the old one, which
+    searches still running may be using (it is dropped once they're done).
+    """
+    global _response_cache, _response_cache_config
+
+    with _response_cache_lock:
+        if cache_config == _response_cache_config and (_response_cache is not None or not cache_config):
+            return _response_cache
+
+        _response_cache_config = cache_config
+        _response_cache = None
+        if cache_config and cache_config.get("enabled", True):
+            _response_cache = ResponseCache(
+                path=cache_config.get("path", "response_cache.sqlite"),
+                ttl=cache_config.get("ttl"),
+                default_ttl=cache_config.get("default_ttl", 3600),
+                max_entries=cache_config.get("max_entries", 20000),
+            )
+        return _response_cache
+
+
+def get_response_cache():
+    return _response_cache
@@ -0,0 +1,295 @@
+import argparse
+import json
+import sys
+import time
+
+
+# Only argparse / stdlib at module load: pandas and requests are imported by
+# the commands that need them, so --help, dry runs and cache commands return fast.
+
+
+#########################################
+#               commands                #
+#########################################
+
+def _load_config(args):
+    from utilities import load_config
+    return load_config(args.config)
+
+
+def _search_kwargs(args):
+    """argparse namespace → run_flight_search keyword arguments."""
+    return {
+        "departureId": args.departureId,
+        "arrivalId": args.arrivalId,
+        "departureDateStart": args.departureDateStart,
+        "departureDateEnd": args.departureDateEnd,
+        "minDurationDays": args.minDurationDays,
+        "maxDurationDays": args.maxDurationDays,
+        "maxPrice": args.maxPrice,
+        "adults": args.adults,
+        "maxDuration": args.maxDuration,
+        "maxFlights": args.maxFlights,
+        "isRoundtrip": not args.oneway,
+        "maxWorkers": args.maxWorkers,
+        "resume": not args.no_resume,
+        "fileName": args.fileName,
+        "sweep": args.sweep,
+        "topK": args.topK,
+        "pareto": args.pareto,
+        "earlyStop": args.earlyStop,
+        "maxCalls": args.maxCalls,
+    }
+
+
+def dry_run(kwargs, config, latency):
+    """
+    Prints what a search would do without calling the API (and without
+    importing pandas): work units, API calls (cache hits excluded) and
+    the estimated duration under the configured rate limit.
+    """
+    from planner import plan_search, print_plan
+
+    print_plan(plan_search(kwargs, config, latency), kwargs)
+    return 0
+
+
+def multi_search(args, kwargs, config):
+    """Several departure / arrival airports (comma-separated) or open jaw: one run over shared one-way legs."""
+    from multi import run_multi_search, default_multi_file_name, parse_airports
+
+    ignored = [name for name in ("topK", "pareto", "earlyStop", "maxCalls") if kwargs[name]]
+    if kwargs["sweep"] != "full":
+        ignored.append("sweep")
+    if ignored:
+        print(f"[WARNING] Not supported by multi-airport searches, ignored: {', '.join(ignored)}")
+
+    origins, destinations = parse_airports(kwargs["departureId"]), parse_airports(kwargs["arrivalId"])
+    fileName = kwargs["fileName"] or default_multi_file_name(origins, destinations, args.open_jaw)
+    df = run_multi_search(
+        origins, destinations,
+        kwargs["departureDateStart"], kwargs["departureDateEnd"],
+        kwargs["adults"], kwargs["maxPrice"], kwargs["maxDuration"],
+        kwargs["minDurationDays"], kwargs["maxDurationDays"], kwargs["maxFlights"],
+        openJaw=args.open_jaw, maxWorkers=kwargs["maxWorkers"], fileName=fileName, config=config
+    )
+    return df, fileName
+
+
+def cmd_search(args):
+    config = _load_config(args)
+    kwargs = _search_kwargs(args)
+    if args.dry_run:
+        if args.open_jaw or "," in args.departureId or "," in args.arrivalId:
+            # Multi-airport searches are built from one-way legs
+            kwargs["isRoundtrip"] = False
+        return dry_run(kwargs, config, args.latency)
+
+    started = time.time()
+    if args.open_jaw or "," in args.departureId or "," in args.arrivalId:
+        df, fileName = multi_search(args, kwargs, config)
+    else:
+        from main import run_flight_search, default_file_name
+
+        df = run_flight_search(config=config, **kwargs)
+        fileName = kwargs["fileName"] or default_file_name(kwargs["departureId"], kwargs["arrivalId"], kwargs["isRoundtrip"])
+
+    print(f"{len(df)} flights in {time.time() - started:.1f}s → {fileName}")
+    if "budget" in df.attrs:
+        print(f"API calls: {df.attrs['budget']['used']} of a budget of {df.attrs['budget']['limit']}")
+    if args.show and len(df):
+        by = "Total Price" if "Total Price" in df.columns else "Price"
+        print(df.sort_values(by=by, kind="stable").head(args.show).to_string(index=False))
+    return 0
+
+
+def cmd_cache(args):
+    from cache import setup_response_cache
+
+    config = _load_config(args)
+    cache = setup_response_cache(config.get("cache"))
+    if cache is None:
+        print("Response cache is disabled in the config.")
+        return 1
+
+    if args.action == "clear":
+        cache.clear()
+        print(f"Cleared {cache.path}")
+    else:
+        stats = cache.stats()
+        print(json.dumps({"path": cache.path, "entries": stats["entries"]}, indent=2))
+    return 0
+
+
+def cmd_history(args):
+    from store import setup_price_store
+
+    config = _load_config(args)
+    store = setup_price_store(config.get("store"))
+    if store is None:
+        print("Price store is disabled in the config.")
+        return 1
+
+    df = store.cheapest(args.departureId, args.arrivalId, args.date_from, args.date_to,
+                        roundtrip=not args.oneway, limit=args.limit)
+    if df.empty:
+        print("No stored prices for this route.")
+    else:
+        print(df.to_string(index=False))
+    return 0
+
+
+def _export_search_params(args):
+    """Price store key of the search described by the export arguments (as `search` would run it)."""
+    if "," in args.departureId or "," in args.arrivalId or args.open_jaw:
+        from multi import multi_search_params, parse_airports
+        return multi_search_params(
+            args.departureDateStart, args.departureDateEnd,
+            parse_airports(args.departureId), parse_airports(args.arrivalId), args.adults,
+            args.maxPrice, args.maxDuration, args.minDurationDays, args.maxDurationDays, args.maxFlights,
+            args.open_jaw
+        )
+    from main import search_params, search_run_params
+    return search_run_params(
+        search_params(
+            args.departureDateStart, args.departureDateEnd, args.departureId, args.arrivalId, args.adults,
+            args.maxPrice, args.maxDuration, args.minDurationDays, args.maxDurationDays, args.maxFlights,
+            not args.oneway
+        ),
+        sweep=args.sweep, topK=args.topK, pareto=args.pareto, earlyStop=args.earlyStop
+    )
+
+
+def cmd_export(args):
+    from store import setup_price_store
+    from export import EXPORT_FORMATS, export_rows
+
+    config = _load_config(args)
+    store = setup_price_store(config.get("store"))
+    if store is None:
+        print("Price store is disabled in the config.")
+        return 1
+
+    output = args.output or f"flights_{args.departureId}_{args.arrivalId}.{EXPORT_FORMATS[args.format]['extension']}"
+    if args.departureDateStart is not None:
+        search = [args.departureDateEnd, args.minDurationDays, args.maxDurationDays]
+        if any(value is None for value in search):
+            print("Exporting a search needs --start, --end, --min-days and --max-days.")
+            return 1
+        params = _export_search_params(args)
+        if store.search_completed_at(params) is None:
+            print("[WARNING] This search hasn't finished (or never ran): exporting the rows stored so far.")
+        batches = store.iter_search_rows(params, batch_size=args.batch_size)
+        what = "results"
+    else:
+        batches = store.iter_route_rows(args.departureId, args.arrivalId, args.date_from, args.date_to,
+                                        roundtrip=not args.oneway, batch_size=args.batch_size)
+        what = "itineraries"
+    try:
+        rows = export_rows(batches, output, args.format)
+    except RuntimeError as e:
+        print(e)
+        return 1
+    print(f"{rows} {what} exported to {output}")
+    return 0
+
+
+def cmd_watch(args):
+    from watch import run_watch
+
+    run_watch(args.jobs_file, args.config, args.interval, args.ticks)
+    return 0
+
+
+#########################################
+#                parser                 #
+#########################################
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="flight-finder", description="Search Google Flights (RapidAPI) over a date grid.")
+    parser.add_argument("--config", default="config.json", help="config file (default: config.json)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="run a flight search", description="Run a flight search (see run_flight_search).")
+    search.add_argument("departureId", help="departure airport (IATA), or several: BER,HAM,PRG")
+    search.add_argument("arrivalId", help="arrival airport (IATA), or several: BKK,HKT,DMK")
+    search.add_argument("--start", dest="departureDateStart", required=True, help="search departures after this date (YYYY-MM-DD)")
+    search.add_argument("--end", dest="departureDateEnd", required=True, help="search departures before this date (YYYY-MM-DD)")
+    search.add_argument("--min-days", dest="minDurationDays", type=int, required=True, help="minimum trip length (days)")
+    search.add_argument("--max-days", dest="maxDurationDays", type=int, required=True, help="maximum trip length (days)")
+    search.add_argument("--max-price", dest="maxPrice", default="850")
+    search.add_argument("--adults", default="1")
+    search.add_argument("--max-duration", dest="maxDuration", default="16", help="max flight duration (hours)")
+    search.add_argument("--max-flights", dest="maxFlights", type=int, default=4, help="outgoing flights per date pair")
+    search.add_argument("--oneway", action="store_true", help="combine two one-way legs instead of roundtrip fares")
+    search.add_argument("--open-jaw", action="store_true", help="several airports: also return from any arrival to any departure airport")
+    search.add_argument("--workers", dest="maxWorkers", type=int, default=None, help="parallel requests (default: config)")
+    search.add_argument("--no-resume", action="store_true", help="start over instead of resuming an interrupted search")
+    search.add_argument("--output", dest="fileName", default=None, help="CSV file (default: <trip>_flights_<from>_<to>.csv)")
+    search.add_argument("--sweep", choices=["full", "smart"], default="full")
+    search.add_argument("--top-k", dest="topK", type=int, default=None, help="keep only the k cheapest results")
+    search.add_argument("--pareto", action="store_true", help="keep only the price / duration / stops Pareto front")
+    search.add_argument("--early-stop", dest="earlyStop", action="store_true", help="with --top-k: skip returns that can't make the top k")
+    search.add_argument("--show", type=int, default=10, help="print the N cheapest results (0 = none)")
+    search.add_argument("--max-calls", dest="maxCalls", type=int, default=None, help="hard API call budget: most promising dates first")
+    search.add_argument("--dry-run", action="store_true", help="print the planned work units, API calls and duration, call nothing")
+    search.add_argument("--latency", type=float, default=1.5, help="assumed seconds per API call for --dry-run estimates")
+    search.set_defaults(func=cmd_search)
+
+    cache = commands.add_parser("cache", help="inspect or clear the response cache")
+    cache.add_argument("action", choices=["stats", "clear"])
+    cache.set_defaults(func=cmd_cache)
+
+    history = commands.add_parser("history", help="cheapest prices ever seen (price store, no API calls)")
+    history.add_argument("departureId")
+    history.add_argument("arrivalId")
+    history.add_argument("--from", dest="date_from", default=None, help="earliest departure date (YYYY-MM-DD)")
+    history.add_argument("--to", dest="date_to", default=None, help="latest departure date (YYYY-MM-DD)")
+    history.add_argument("--oneway", action="store_true")
+    history.add_argument("--limit", type=int, default=10)
+    history.set_defaults(func=cmd_history)
+
+    export = commands.add_parser(
+        "export", help="stream stored results to csv / parquet / xlsx (price store, no API calls)",
+        description="Exports the results of a search (--start/--end/--min-days/--max-days and the other "
+                    "search options, as given to `search`) or every stored itinerary of a route."
+    )
+    export.add_argument("departureId", help="departure airport (IATA), or several: BER,HAM,PRG")
+    export.add_argument("arrivalId", help="arrival airport (IATA), or several: BKK,HKT,DMK")
+    export.add_argument("--start", dest="departureDateStart", default=None, help="export this search's results (YYYY-MM-DD)")
+    export.add_argument("--end", dest="departureDateEnd", default=None)
+    export.add_argument("--min-days", dest="minDurationDays", type=int, default=None)
+    export.add_argument("--max-days", dest="maxDurationDays", type=int, default=None)
+    export.add_argument("--max-price", dest="maxPrice", default="850")
+    export.add_argument("--adults", default="1")
+    export.add_argument("--max-duration", dest="maxDuration", default="16")
+    export.add_argument("--max-flights", dest="maxFlights", type=int, default=4)
+    export.add_argument("--open-jaw", action="store_true")
+    export.add_argument("--sweep", choices=["full", "smart"], default="full", help="as the search ran")
+    export.add_argument("--top-k", dest="topK", type=int, default=None, help="as the search ran")
+    export.add_argument("--pareto", action="store_true", help="as the search ran")
+    export.add_argument("--early-stop", dest="earlyStop", action="store_true", help="as the search ran")
+    export.add_argument("--from", dest="date_from", default=None, help="route export: earliest departure date (YYYY-MM-DD)")
+    export.add_argument("--to", dest="date_to", default=None, help="route export: latest departure date (YYYY-MM-DD)")
+    export.add_argument("--oneway", action="store_true")
+    export.add_argument("--format", choices=["csv", "parquet", "xlsx"], default="csv")
+    export.add_argument("--output", default=None, help="output file (default: flights_<from>_<to>.<format>)")
+    export.add_argument("--batch-size", type=int, default=5000, help="rows read from the store per batch")
+    export.set_defaults(func=cmd_export)
+
+    watch = commands.add_parser("watch", help="keep searches up to date, refreshing only stale date pairs")
+    watch.add_argument("jobs_file", help="JSON-lines file with one search spec per line (as for batch.py)")
+    watch.add_argument("--interval", type=float, default=None, help="seconds between ticks (default: config)")
+    watch.add_argument("--ticks", type=int, default=None, help="stop after this many ticks (default: run forever)")
+    watch.set_defaults(func=cmd_watch)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
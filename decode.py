@@ -0,0 +1,69 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Fields of an API flight that the pipeline reads (build_entry_row,
+# normalize.py, manifest.flight_key, legs.py). The other flight-level fields
+# (layovers, emissions, booking tokens, ...) are dropped right after parsing.
+# Segments are kept as they are: they are small, and copying every segment
+# dict costs more CPU than parsing the whole page with orjson.
+FLIGHT_FIELDS = (
+    "price", "duration", "stops", "segments", "airline", "returningToken",
+    "departureDate", "departureTime", "arrivalDate", "arrivalTime",
+)
+FLIGHT_LISTS = ("topFlights", "otherFlights")
+
+
+#########################################
+#              loads / dumps            #
+#########################################
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+
+def loads(content):
+    """Parses JSON bytes / str with orjson when installed, else the json module."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def dumps(data):
+    """Serialises to a JSON str (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data)
+
+
+#########################################
+#            compact records            #
+#########################################
+
+def compact_flight(flight):
+    """Copy of an API flight with only the fields the pipeline reads."""
+    if not isinstance(flight, dict):
+        return flight
+    return {field: flight[field] for field in FLIGHT_FIELDS if field in flight}
+
+
+def compact_data(data):
+    """
+    Compacts the 'data' payload of a search response: topFlights /
+    otherFlights keep only the used flight fields, other keys are dropped.
+    Payloads of any other shape are returned unchanged.
+    """
+    if not isinstance(data, dict) or not any(key in data for key in FLIGHT_LISTS):
+        return data
+    return {
+        key: [compact_flight(flight) for flight in data[key]] if isinstance(data[key], list) else data[key]
+        for key in FLIGHT_LISTS if key in data
+    }
+
+
+def decode_response(content):
+    """Response body → compacted 'data' payload (as get_request returns it)."""
+    return compact_data(loads(content).get("data", []))
@@ -0,0 +1,209 @@
+import csv
+import io
+from itertools import chain
+
+from utilities import ENTRY_COLUMNS
+
+
+# Lead columns of multi-airport results (multi.MULTI_COLUMNS), kept in front
+LEAD_COLUMNS = ("Route", "Total Price")
+# Few distinct values, repeated on every row: dictionary-encoded in Parquet
+DICTIONARY_COLUMNS = ("Route", "Airline Outgoing", "Airline", "Arrival Airport Code")
+NUMERIC_COLUMNS = ("Price", "Total Price", "Duration Mins.", "Stops")
+
+EXPORT_FORMATS = {
+    "csv": {"extension": "csv", "mime": "text/csv"},
+    "parquet": {"extension": "parquet", "mime": "application/vnd.apache.parquet"},
+    "xlsx": {"extension": "xlsx", "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+}
+
+
+def flatten_segments(value):
+    """'TK100\\nTK200\\n' → 'TK100 / TK200' (one cell line instead of a multiline string)."""
+    if not isinstance(value, str) or "\n" not in value:
+        return value
+    return " / ".join(part for part in value.split("\n") if part)
+
+
+def _number(value):
+    if value is None or value == "":
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if value != value:
+        return None
+    return int(value) if value.is_integer() else value
+
+
+def clean_row(row, columns):
+    """Export form of a result row: numbers typed, everything else text (segment lines flattened), missing cells None."""
+    clean = {}
+    for column in columns:
+        value = row.get(column)
+        if column in NUMERIC_COLUMNS:
+            value = _number(value)
+        elif value is None or (isinstance(value, float) and value != value):
+            value = None
+        else:
+            value = flatten_segments(str(value))
+        clean[column] = value
+    return clean
+
+
+def iter_dataframe_rows(df, batch_size=5000):
+    """A DataFrame as batches of row dicts (so exports of it stay chunked too)."""
+    for start in range(0, len(df), batch_size):
+        yield df.iloc[start:start + batch_size].to_dict("records")
+
+
+def iter_csv_rows(fileName, batch_size=5000):
+    """A result CSV as batches of row dicts, read in chunks."""
+    import pandas as pd
+
+    for chunk in pd.read_csv(fileName, chunksize=batch_size, dtype=str, keep_default_na=False):
+        yield chunk.to_dict("records")
+
+
+#########################################
+#                writers                #
+#########################################
+
+def write_csv(batches, out, columns=ENTRY_COLUMNS):
+    """Streams row batches to a CSV file (path or binary file object)."""
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True) if not isinstance(out, str) \
+        else open(out, "w", encoding="utf-8", newline="")
+    rows = 0
+    try:
+        writer = csv.DictWriter(text, fieldnames=list(columns), extrasaction="ignore", lineterminator="\n")
+        writer.writeheader()
+        for batch in batches:
+            writer.writerows(clean_row(row, columns) for row in batch)
+            rows += len(batch)
+    finally:
+        if isinstance(out, str):
+            text.close()
+        else:
+            # Leave the caller's buffer open
+            text.detach()
+    return rows
+
+
+def parquet_schema(columns):
+    import pyarrow as pa
+
+    fields = []
+    for column in columns:
+        if column in ("Price", "Total Price"):
+            kind = pa.float64()
+        elif column in ("Duration Mins.", "Stops"):
+            kind = pa.int64()
+        elif column in DICTIONARY_COLUMNS:
+            kind = pa.dictionary(pa.int32(), pa.string())
+        else:
+            kind = pa.string()
+        fields.append(pa.field(column, kind))
+    return pa.schema(fields)
+
+
+def write_parquet(batches, out, columns=ENTRY_COLUMNS, compression="zstd"):
+    """
+    Streams row batches to a Parquet file (path or binary file object), one
+    row group per batch: airline / airport / route columns are dictionary-
+    encoded, prices and durations typed. Needs pyarrow.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow).")
+
+    schema = parquet_schema(columns)
+    rows = 0
+    with pq.ParquetWriter(out, schema, compression=compression) as writer:
+        for batch in batches:
+            records = [clean_row(row, columns) for row in batch]
+            writer.write_table(pa.Table.from_pylist(records, schema=schema))
+            rows += len(batch)
+    return rows
+
+
+def write_xlsx(batches, out, columns=ENTRY_COLUMNS, sheet="Flights"):
+    """
+    Streams row batches to an xlsx file (path or binary file object) with
+    xlsxwriter's constant_memory mode: each row is flushed as soon as the
+    next one starts, so memory doesn't grow with the export. Needs xlsxwriter.
+    """
+    try:
+        import xlsxwriter
+    except ImportError:
+        raise RuntimeError("xlsx export needs xlsxwriter (pip install xlsxwriter).")
+
+    # Not in_memory, even for a BytesIO target: it overrides constant_memory.
+    # Rows go through a temp file; only the finished (zipped) file lands in `out`.
+    workbook = xlsxwriter.Workbook(out, {"constant_memory": True})
+    worksheet = workbook.add_worksheet(sheet)
+    bold = workbook.add_format({"bold": True})
+    worksheet.write_row(0, 0, list(columns), bold)
+
+    rows = 0
+    for batch in batches:
+        for row in batch:
+            rows += 1
+            worksheet.write_row(rows, 0, list(clean_row(row, columns).values()))
+    worksheet.freeze_panes(1, 0)
+    workbook.close()
+    return rows
+
+
+WRITERS = {"csv": write_csv, "parquet": write_parquet, "xlsx": write_xlsx}
+
+
+#########################################
+#               export                  #
+#########################################
+
+def available_formats():
+    """Export formats whose (optional) writer library is installed."""
+    import importlib.util
+
+    formats = ["csv"]
+    if importlib.util.find_spec("pyarrow") is not None:
+        formats.append("parquet")
+    if importlib.util.find_spec("xlsxwriter") is not None:
+        formats.append("xlsx")
+    return formats
+
+
+def row_columns(rows):
+    """
+    Columns present in a batch of rows: Route / Total Price first, then in
+    first-seen order. Helper fields (leading underscore) aren't exported.
+    """
+    seen = dict.fromkeys(column for row in rows for column in row if not column.startswith("_"))
+    return [column for column in LEAD_COLUMNS if column in seen] + [column for column in seen if column not in LEAD_COLUMNS]
+
+
+def export_rows(batches, out, fmt="csv", columns=None):
+    """
+    Writes batches of result rows (lists of dicts, e.g. from
+    PriceStore.iter_search_rows) to `out` as csv / parquet / xlsx, one batch
+    in memory at a time. Returns the number of rows written.
+    columns=None exports the columns of the first batch.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format {fmt!r} (choose from {', '.join(WRITERS)})")
+    if columns is None:
+        batches = iter(batches)
+        first = next(batches, [])
+        columns = row_columns(first) or ENTRY_COLUMNS
+        batches = chain([first], batches)
+    return WRITERS[fmt](batches, out, columns)
+
+
+def export_bytes(batches, fmt="csv", columns=None):
+    """Export into an in-memory buffer (for download buttons); returns the file's bytes."""
+    buffer = io.BytesIO()
+    export_rows(batches, buffer, fmt, columns)
+    return buffer.getvalue()
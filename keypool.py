@@ -0,0 +1,252 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+from ratelimit import parse_retry_after
+
+
+def key_fingerprint(key):
+    """Short, non-reversible id of an API key (the key itself is never stored)."""
+    return hashlib.sha256(key.encode()).hexdigest()[:12]
+
+
+def _month(now=None):
+    return time.strftime("%Y-%m", time.gmtime(now))
+
+
+#########################################
+#               KeyPool                 #
+#########################################
+
+class KeyPool:
+    """
+    Rotates API calls over several RapidAPI keys.
+
+    acquire() hands out the usable key with the most remaining quota: the
+    x-ratelimit-requests-remaining header of its last response, else
+    monthly_quota minus this month's recorded calls. Keys answering 429 are
+    cooled down for Retry-After (default cooldown_429 s), keys answering 403
+    (blocked / quota exceeded) for cooldown_403 s.
+
+    Calls, last known remaining quota and cooldowns are persisted per key
+    fingerprint in SQLite, so usage carries over between runs and is shared
+    by the worker processes of a batch.
+    """
+
+    REFRESH_INTERVAL = 5.0
+
+    def __init__(self, keys, usage_path="api_key_usage.sqlite", header="x-rapidapi-key",
+                 cooldown_429=60, cooldown_403=3600, reserve=0, max_wait=300):
+        self.header = header
+        self.cooldown_429 = cooldown_429
+        self.cooldown_403 = cooldown_403
+        self.reserve = reserve
+        self.max_wait = max_wait
+
+        self.keys = {}
+        for entry in keys:
+            if isinstance(entry, str):
+                entry = {"key": entry}
+            fingerprint = key_fingerprint(entry["key"])
+            self.keys[fingerprint] = {
+                "key": entry["key"],
+                "monthly_quota": entry.get("monthly_quota"),
+                "used": 0,
+                "remaining": None,
+                "cooldown_until": 0.0,
+                "last_used": 0.0,
+            }
+
+        self._lock = threading.Lock()
+        self._refreshed = 0.0
+        self._conn = sqlite3.connect(usage_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS key_usage ("
+            " fingerprint TEXT NOT NULL,"
+            " month TEXT NOT NULL,"
+            " used INTEGER NOT NULL DEFAULT 0,"
+            " remaining INTEGER,"
+            " cooldown_until REAL NOT NULL DEFAULT 0,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (fingerprint, month))"
+        )
+        self._conn.commit()
+        self._refresh(force=True)
+
+    # ---------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------
+    def _refresh(self, force=False):
+        """Re-reads usage written by other processes (at most every REFRESH_INTERVAL s)."""
+        now = time.time()
+        if not force and now - self._refreshed < self.REFRESH_INTERVAL:
+            return
+        self._refreshed = now
+
+        rows = self._conn.execute(
+            "SELECT fingerprint, used, remaining, cooldown_until FROM key_usage WHERE month = ?", (_month(now),)
+        ).fetchall()
+        for fingerprint, used, remaining, cooldown_until in rows:
+            state = self.keys.get(fingerprint)
+            if state is not None:
+                state.update(used=used, remaining=remaining, cooldown_until=max(state["cooldown_until"], cooldown_until))
+
+    def _record(self, fingerprint, used=0, remaining=None, cooldown_until=None):
+        now = time.time()
+        self._conn.execute(
+            "INSERT INTO key_usage (fingerprint, month, used, remaining, cooldown_until, updated_at)"
+            " VALUES (?, ?, ?, ?, COALESCE(?, 0), ?)"
+            " ON CONFLICT(fingerprint, month) DO UPDATE SET"
+            " used = used + excluded.used,"
+            " remaining = COALESCE(excluded.remaining, remaining),"
+            " cooldown_until = MAX(cooldown_until, excluded.cooldown_until),"
+            " updated_at = excluded.updated_at",
+            (fingerprint, _month(now), used, remaining, cooldown_until, now)
+        )
+        self._conn.commit()
+
+    # ---------------------------------------------------
+    # Scheduling
+    # ---------------------------------------------------
+    def _remaining(self, state):
+        if state["remaining"] is not None:
+            return state["remaining"]
+        if state["monthly_quota"] is not None:
+            return state["monthly_quota"] - state["used"]
+        return float("inf")
+
+    def acquire(self):
+        """
+        Returns (fingerprint, key) of the key to use next. Waits for the
+        earliest cooldown to end (up to max_wait) if every key is cooling
+        down; returns None once every key is out of quota.
+        """
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            with self._lock:
+                self._refresh()
+                now = time.time()
+                candidates = [
+                    (fingerprint, state) for fingerprint, state in self.keys.items()
+                    if self._remaining(state) > self.reserve
+                ]
+                if not candidates:
+                    return None
+
+                ready = [(fingerprint, state) for fingerprint, state in candidates if state["cooldown_until"] <= now]
+                if ready:
+                    # Most quota left first; least recently used among equals
+                    fingerprint, state = max(ready, key=lambda item: (self._remaining(item[1]), -item[1]["last_used"]))
+                    state["last_used"] = time.monotonic()
+                    if state["remaining"] is not None:
+                        state["remaining"] -= 1
+                    return fingerprint, state["key"]
+
+                wait = min(state["cooldown_until"] for _, state in candidates) - now
+
+            if time.monotonic() + wait > deadline:
+                return None
+            print(f"[WARNING] All API keys are cooling down. Waiting {wait:.0f}s...")
+            time.sleep(max(0.0, wait))
+
+    def on_response(self, fingerprint, status, headers=None):
+        """Records one call with a key and applies its quota headers / cooldown."""
+        remaining = None
+        for name, value in (headers or {}).items():
+            if name.lower() == "x-ratelimit-requests-remaining":
+                try:
+                    remaining = int(value)
+                except (TypeError, ValueError):
+                    pass
+
+        cooldown_until = None
+        if status == 429:
+            retry_after = parse_retry_after(headers)
+            cooldown_until = time.time() + (retry_after if retry_after is not None else self.cooldown_429)
+        elif status == 403:
+            cooldown_until = time.time() + self.cooldown_403
+
+        with self._lock:
+            state = self.keys[fingerprint]
+            state["used"] += 1
+            if remaining is not None:
+                state["remaining"] = remaining
+            if cooldown_until is not None:
+                state["cooldown_until"] = max(state["cooldown_until"], cooldown_until)
+                print(f"[WARNING] API key {fingerprint} got HTTP {status}. Cooling down until {time.strftime('%H:%M:%S', time.localtime(cooldown_until))}.")
+            self._record(fingerprint, used=1, remaining=remaining, cooldown_until=cooldown_until)
+
+    def has_other(self, fingerprint):
+        """True if another key with quota left exists (worth retrying on at once)."""
+        with self._lock:
+            return any(
+                other != fingerprint and self._remaining(state) > self.reserve
+                for other, state in self.keys.items()
+            )
+
+    def usage(self):
+        """Per-key usage of this month, by fingerprint."""
+        with self._lock:
+            self._refresh(force=True)
+            return {
+                fingerprint: {
+                    "used": state["used"],
+                    "remaining": None if self._remaining(state) == float("inf") else self._remaining(state),
+                    "monthly_quota": state["monthly_quota"],
+                    "cooling_down": state["cooldown_until"] > time.time(),
+                }
+                for fingerprint, state in self.keys.items()
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+#########################################
+#            setup_key_pool             #
+#########################################
+
+_key_pool = None
+_key_pool_config = None
+_key_pool_lock = threading.Lock()
+
+
+def setup_key_pool(api_config, pool_config=None):
+    """
+    Configures the process-wide key pool used by get_request from
+    api.keys in config.json (a list of keys, or {"key", "monthly_quota"}
+    objects) and the optional 'key_pool' section (usage_path, cooldown_429,
+    cooldown_403, reserve, max_wait). Without api.keys, the single key in
+    api.headers is used as before.
+    A changed config replaces the pool without closing the old one, which
+    searches still running may be using (it is dropped once they're done).
+    """
+    global _key_pool, _key_pool_config
+
+    keys = (api_config or {}).get("keys")
+    config = {"keys": keys, "pool": pool_config}
+    with _key_pool_lock:
+        if config == _key_pool_config and (_key_pool is not None or not keys):
+            return _key_pool
+
+        _key_pool_config = config
+        _key_pool = None
+        if keys:
+            pool_config = pool_config or {}
+            _key_pool = KeyPool(
+                keys,
+                usage_path=pool_config.get("usage_path", "api_key_usage.sqlite"),
+                header=pool_config.get("header", "x-rapidapi-key"),
+                cooldown_429=pool_config.get("cooldown_429", 60),
+                cooldown_403=pool_config.get("cooldown_403", 3600),
+                reserve=pool_config.get("reserve", 0),
+                max_wait=pool_config.get("max_wait", 300),
+            )
+        return _key_pool
+
+
+def get_key_pool():
+    return _key_pool
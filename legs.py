@@ -0,0 +1,146 @@
+import pandas as pd
+from itertools import groupby
+from utilities import build_entry_row, is_failed, TOTAL_PRICE
+import metrics
+
+
+#########################################
+#              fetch_legs               #
+#########################################
+
+def submit_legs(legs, executor, fetch_leg):
+    """
+    Submits every distinct one-way leg (origin, destination, date) exactly once.
+    fetch_leg(origin, destination, date) returns the list of flights of a leg.
+    Returns {leg: future}.
+    """
+    return {leg: executor.submit(fetch_leg, *leg) for leg in dict.fromkeys(legs)}
+
+
+def collect_legs(futures, legs, maxFlights):
+    """
+    Waits for the given legs of submit_legs() futures.
+    Returns ({leg: [first maxFlights flights]}, {legs whose request failed}).
+    """
+    flights_by_leg = {}
+    failed = set()
+    for leg in dict.fromkeys(legs):
+        flights = futures[leg].result()
+        if is_failed(flights):
+            failed.add(leg)
+        flights_by_leg[leg] = flights[:maxFlights]
+    return flights_by_leg, failed
+
+
+def fetch_legs(legs, executor, fetch_leg, maxFlights):
+    """Fetches every distinct leg exactly once; see collect_legs for the result."""
+    return collect_legs(submit_legs(legs, executor, fetch_leg), legs, maxFlights)
+
+
+def leg_table(flights_by_leg):
+    """
+    Flattens fetched legs into a DataFrame with one row per flight:
+    origin, destination, date, rank (position within the leg), price, flight (the raw dict).
+    """
+    records = [
+        (origin, destination, date, rank, flight.get('price', 0), flight)
+        for (origin, destination, date), flights in flights_by_leg.items()
+        for rank, flight in enumerate(flights)
+    ]
+    return pd.DataFrame.from_records(
+        records, columns=["origin", "destination", "date", "rank", "price", "flight"]
+    )
+
+
+#########################################
+#             combine_legs              #
+#########################################
+
+def combine_legs(trips, legs_df, maxPrice):
+    """
+    Joins outbound and inbound legs of every trip and keeps the combinations
+    whose total price is within maxPrice.
+
+    trips has one row per trip with columns
+        trip, out_origin, out_destination, departureDate,
+        in_origin, in_destination, returnDate
+    Returns one row per (trip, outbound flight, inbound flight) ordered by
+    trip, then outbound rank, then inbound rank, with the columns of trips
+    plus flight_out, flight_in, price_out, price_in and total_price.
+    """
+    columns = list(trips.columns) + ["flight_out", "flight_in", "price_out", "price_in", "total_price"]
+    if trips.empty or legs_df.empty:
+        return pd.DataFrame(columns=columns)
+
+    outbound = legs_df.rename(columns={
+        "origin": "out_origin", "destination": "out_destination", "date": "departureDate",
+        "rank": "rank_out", "price": "price_out", "flight": "flight_out"
+    })
+    inbound = legs_df.rename(columns={
+        "origin": "in_origin", "destination": "in_destination", "date": "returnDate",
+        "rank": "rank_in", "price": "price_in", "flight": "flight_in"
+    })
+
+    combined = trips.merge(outbound, on=["out_origin", "out_destination", "departureDate"])
+    combined = combined.merge(inbound, on=["in_origin", "in_destination", "returnDate"])
+
+    combined["total_price"] = combined["price_out"] + combined["price_in"]
+    combined = combined[combined["total_price"] <= int(maxPrice)]
+
+    combined = combined.sort_values(["trip", "rank_out", "rank_in"], kind="stable")
+    return combined[columns].reset_index(drop=True)
+
+
+#########################################
+#           iter_oneway_rows            #
+#########################################
+
+def iter_oneway_rows(pairs, executor, fetch_leg, departureId, arrivalId, maxFlights, maxPrice):
+    """
+    One-way search engine: fetches the outbound leg of every departure date
+    and the inbound leg of every return date once, combines them with a
+    vectorized join and yields (departureDateStr, returnDateStr, None, rows)
+    per date pair, the same work-unit shape as the roundtrip engine.
+
+    All legs are submitted up front; pairs are combined and yielded one
+    departure date at a time as soon as the legs they need are in.
+    Date pairs with a failed leg request are not yielded.
+    """
+    pairs = list(pairs)
+
+    legs = []
+    for departureDateStr, returnDateStr in pairs:
+        legs += [(departureId, arrivalId, departureDateStr), (arrivalId, departureId, returnDateStr)]
+    futures = submit_legs(legs, executor, fetch_leg)
+
+    for departureDateStr, group in groupby(pairs, key=lambda pair: pair[0]):
+        group = list(group)
+        group_legs = [(departureId, arrivalId, departureDateStr)]
+        group_legs += [(arrivalId, departureId, returnDateStr) for _, returnDateStr in group]
+        flights_by_leg, failed = collect_legs(futures, group_legs, maxFlights)
+
+        with metrics.timed("dataframe"):
+            trips = pd.DataFrame({
+                "trip": range(len(group)),
+                "out_origin": departureId,
+                "out_destination": arrivalId,
+                "departureDate": departureDateStr,
+                "in_origin": arrivalId,
+                "in_destination": departureId,
+                "returnDate": [returnDateStr for _, returnDateStr in group],
+            })
+
+            combined = combine_legs(trips, leg_table(flights_by_leg), maxPrice)
+
+        with metrics.timed("rows"):
+            rows_by_trip = {}
+            for trip, flight_out, flight_in, returnDateStr, total_price in zip(
+                    combined["trip"], combined["flight_out"], combined["flight_in"], combined["returnDate"], combined["total_price"]):
+                row = build_entry_row(flight_in, flight_out, returnDateStr)
+                row[TOTAL_PRICE] = int(total_price)
+                rows_by_trip.setdefault(trip, []).append(row)
+
+        for trip, (_, returnDateStr) in enumerate(group):
+            if (departureId, arrivalId, departureDateStr) in failed or (arrivalId, departureId, returnDateStr) in failed:
+                continue
+            yield departureDateStr, returnDateStr, None, rows_by_trip.get(trip, [])
@@ -1,20 +1,275 @@
-import http.client
-import json
+import os
+import threading
 import pandas as pd
-from datetime import datetime, timedelta
-import requests
+from collections import deque
+from concurrent.futures import Future
 from utilities import (
     get_request,
     pretty_print,
     get_outgoing_flight,
     find_returns,
     print_dict,
-    add_entry_table,
-    load_config
+    is_failed,
+    load_config,
+    make_executor,
+    setup_session
 )
+from cache import setup_response_cache
+from results import ResultSink
+from ratelimit import setup_rate_limiter
+from keypool import setup_key_pool
+from legs import iter_oneway_rows
+from normalize import NormalizedResults
+from manifest import SearchManifest, manifest_path, manifest_is_complete
+from sweep import iter_date_pairs, coarse_pairs, refine_pairs, sweep_report
+from store import setup_price_store
+from selection import ResultSelector
+from planner import CallBudget, PriorityScheduler, select_oneway_pairs
+from price_calendar import PriceCalendar, calendar_path
+import metrics
+
+
+#########################################
+#            collect_flights            #
+#########################################
+
+def collect_flights(data):
+    """
+    Returns topFlights + otherFlights of an API response.
+    Failed requests come back as [] and are treated as "no flights".
+    """
+    if not isinstance(data, dict):
+        return []
+
+    flights = []
+    if data.get('topFlights') is not None:
+        flights += data['topFlights']
+    if data.get('otherFlights') is not None:
+        flights += data['otherFlights']
+    return flights
+
+
+#########################################
+#            iter_pair_flights          #
+#########################################
+
+def iter_pair_flights(pairs, executor, fetch_outgoing, fetch_return, maxFlights, lookahead=1, skip=None):
+    """
+    Runs the outbound search of every date pair and the return search of
+    each of its first maxFlights outgoing flights on the executor.
+
+    Outbound searches are submitted up to `lookahead` pairs ahead, and the
+    return searches of a pair are submitted from the outbound future's
+    done-callback as soon as its result is in, so a thread pool always has
+    work queued. Results are yielded
+    strictly in pair order as (departureDateStr, returnDateStr, [(flight_outgoing, data_ret), ...]),
+    identical to the sequential path.
+
+    Pairs whose outbound search failed are not yielded. Outgoing flights for
+    which skip(departureDateStr, returnDateStr, flight_outgoing) is true
+    (already finished in a resumed search) get no return search.
+    """
+    pairs = iter(pairs)
+    pending = deque()
+
+    def submit_returns(departureDateStr, returnDateStr, future, ready):
+        # Runs as soon as the outbound search is done (in the worker thread),
+        # so return searches never wait for the consumer to reach this pair
+        try:
+            data = future.result()
+            if data is None or is_failed(data):
+                ready.set_result(None)
+                return
+
+            flights_outgoing = collect_flights(data)[:maxFlights]
+            if skip is not None:
+                flights_outgoing = [
+                    flight_outgoing for flight_outgoing in flights_outgoing
+                    if not skip(departureDateStr, returnDateStr, flight_outgoing)
+                ]
+
+            ready.set_result([
+                (flight_outgoing, executor.submit(fetch_return, flight_outgoing, departureDateStr, returnDateStr))
+                for flight_outgoing in flights_outgoing
+            ])
+        except Exception as e:
+            ready.set_exception(e)
+
+    def submit_next():
+        pair = next(pairs, None)
+        if pair is None:
+            return False
+        ready = Future()
+        future = executor.submit(fetch_outgoing, *pair)
+        future.add_done_callback(lambda future, pair=pair, ready=ready: submit_returns(*pair, future, ready))
+        pending.append((pair, ready))
+        return True
+
+    for _ in range(max(1, lookahead)):
+        if not submit_next():
+            break
+
+    while pending:
+        (departureDateStr, returnDateStr), ready = pending.popleft()
+        return_futures = ready.result()
+
+        # Keep the pool busy while this pair's returns are in flight
+        submit_next()
+
+        if return_futures is None:
+            continue
+
+        yield departureDateStr, returnDateStr, [
+            (flight_outgoing, return_future.result())
+            for flight_outgoing, return_future in return_futures
+        ]
+
+
+#########################################
+#          iter_roundtrip_rows          #
+#########################################
+
+def iter_roundtrip_rows(pairs, executor, fetch_outgoing, fetch_return, maxFlights, lookahead=1, skip=None):
+    """
+    Roundtrip search engine. Yields one finished work unit at a time as
+    (departureDateStr, returnDateStr, flight_outgoing, rows): one per outgoing
+    flight with a row per return flight, then (…, None, []) once every
+    outgoing flight of the date pair is done. Units whose API calls failed
+    are not yielded, so a resumed search retries them.
+    """
+    for departureDateStr, returnDateStr, results in iter_pair_flights(
+            pairs, executor, fetch_outgoing, fetch_return, maxFlights, lookahead, skip):
+
+        pair_complete = True
+        normalized = NormalizedResults()
+        units = []
+        with metrics.timed("rows"):
+            for flight_outgoing, data_ret in results:
+
+                if is_failed(data_ret):
+                    pair_complete = False
+                    continue
+
+                # No return flights → a single roundtrip row of the outgoing flight
+                parent_id, = normalized.add_flights([flight_outgoing], "outbound", returnDateStr)
+                normalized.add_flights(collect_flights(data_ret)[:maxFlights], "return", returnDateStr, parent_id)
+                units.append((flight_outgoing, parent_id))
+
+            # Rows of the whole date pair in one columnar pass (see normalize.py)
+            rows = normalized.entry_rows() if units else {}
+
+        for flight_outgoing, parent_id in units:
+            yield departureDateStr, returnDateStr, flight_outgoing, rows[parent_id]
+
+        if pair_complete:
+            yield departureDateStr, returnDateStr, None, []
+
+
+#########################################
+#            search_params              #
+#########################################
+
+def search_params(
+        departureDateStart, departureDateEnd, departureId, arrivalId, adults,
+        maxPrice, maxDuration, minDurationDays, maxDurationDays, maxFlights,
+        isRoundtrip=True
+    ):
+    """The parameters that define a search's results (used as manifest / cache key)."""
+    return {
+        "departureDateStart": departureDateStart, "departureDateEnd": departureDateEnd,
+        "departureId": departureId, "arrivalId": arrivalId, "adults": adults,
+        "maxPrice": maxPrice, "maxDuration": maxDuration,
+        "minDurationDays": minDurationDays, "maxDurationDays": maxDurationDays,
+        "maxFlights": maxFlights, "isRoundtrip": isRoundtrip,
+    }
+
+
+def search_run_params(params, sweep="full", sweepStep=3, sweepTopCells=3, topK=None, topKBy="Price", pareto=False, earlyStop=False):
+    """
+    search_params plus the iter_flight_search options that change which work
+    units a search finishes: its manifest / price store key. Exporting or
+    loading a search's stored results needs exactly these params.
+    """
+    params = dict(params)
+    if sweep != "full":
+        params["sweep"] = {"mode": sweep, "step": sweepStep, "topCells": sweepTopCells}
+    # earlyStop only prunes a price top-k of roundtrips
+    if earlyStop and params.get("isRoundtrip", True) and topK and topKBy == "Price" and not pareto:
+        # Pruned searches finish different work units than full ones
+        params["select"] = {"topK": topK, "earlyStop": True}
+    return params
+
+
+def default_file_name(departureId, arrivalId, isRoundtrip=True):
+    if isRoundtrip:
+        return f"roundtrip_flights_{departureId}_{arrivalId}.csv"
+    return f"oneway_flights_{departureId}_{arrivalId}.csv"
+
+
+def load_finished_search(params, fileName=None, config=None):
+    """
+    Returns the results of a completed earlier search with exactly these
+    params from the price store (if configured) or its CSV on disk,
+    or None if there is none.
+    """
+    store = _finished_search_store(config)
+    if store is not None:
+        df = store.load_search(params)
+        if df is not None:
+            return df
+
+    if fileName is None:
+        fileName = default_file_name(params["departureId"], params["arrivalId"], params["isRoundtrip"])
+    if not os.path.exists(fileName) or not manifest_is_complete(manifest_path(fileName), params):
+        return None
+    return pd.read_csv(fileName)
+
+
+def finished_search_version(params, fileName=None, config=None):
+    """
+    Changes whenever the stored results of this search change (completion
+    time in the price store, else the CSV's mtime); None if there are none.
+    """
+    store = _finished_search_store(config)
+    if store is not None:
+        completed_at = store.search_completed_at(params)
+        if completed_at is not None:
+            return completed_at
+
+    if fileName is None:
+        fileName = default_file_name(params["departureId"], params["arrivalId"], params["isRoundtrip"])
+    if not os.path.exists(fileName) or not manifest_is_complete(manifest_path(fileName), params):
+        return None
+    return os.path.getmtime(fileName)
+
+
+def _finished_search_store(config):
+    if config is None:
+        config = load_config() if os.path.exists('config.json') else {}
+    return setup_price_store(config.get('store'))
 
 
-def run_flight_search(
+def setup_search_services(config, maxWorkers=None):
+    """
+    Configures the process-wide services a search uses from config: response
+    cache, rate limiter, API key pool, price store, metrics and the pooled
+    HTTP session. Returns (price store or None, maxWorkers).
+    """
+    setup_response_cache(config.get('cache'))
+    setup_rate_limiter(config.get('rate_limit'))
+    setup_key_pool(config['api'], config.get('key_pool'))
+    store = setup_price_store(config.get('store'))
+    metrics.setup_metrics(config.get('metrics'))
+
+    if maxWorkers is None:
+        maxWorkers = config.get('search', {}).get('max_workers', 1)
+
+    # One pooled keep-alive session for all calls, sized for the worker count
+    setup_session(config.get('http'), default_pool_size=max(10, int(maxWorkers)))
+    return store, maxWorkers
+
+
+def iter_flight_search(
         departureDateStart,
         departureDateEnd,
         departureId,
@@ -25,161 +280,363 @@ def run_flight_search(
         minDurationDays,
         maxDurationDays,
         maxFlights,
-        isRoundtrip=True
+        isRoundtrip=True,
+        maxWorkers=None,
+        resume=True,
+        fileName=None,
+        config=None,
+        sweep="full",
+        sweepStep=3,
+        sweepTopCells=3,
+        topK=None,
+        topKBy="Price",
+        pareto=False,
+        earlyStop=False,
+        pairs=None,
+        refresh=False,
+        maxCalls=None
     ):
     """
-    Main function to run the flight search.
-    Returns:
-        df (DataFrame) – all collected flight options
+    Runs the flight search and yields results as they come in.
+    maxWorkers > 1 runs the API calls on a thread pool of that size;
+    if not given, it is read from config['search']['max_workers'] (default 1, sequential).
+    Finished work units are logged to a manifest next to the CSV. With
+    resume=True an interrupted search with the same parameters continues
+    where it stopped instead of starting over.
+    fileName / config override the default CSV name and config.json.
+    With a 'store' section in the config every row is also upserted into
+    the historical price store (see store.py).
+    sweep="smart" first searches every sweepStep-th departure day and trip
+    length, then only the pairs around the sweepTopCells cheapest cells
+    found (see sweep.py); the skipped share is reported in df.attrs["sweep"].
+    With a 'metrics' section in the config, request / phase metrics are
+    collected and written to its report_path at the end (see metrics.py).
+    topK / pareto keep only the topK rows with the lowest topKBy, and/or the
+    Pareto front on price / duration / stops, in bounded memory as rows
+    stream in (every row still goes to the CSV and the price store).
+    earlyStop=True (price top-k only) skips the return search of an outgoing
+    flight whose price – the lowest roundtrip price with it – can no longer
+    make the top k.
+    pairs (list of (departureDate, returnDate)) restricts the search to those
+    cells of the date grid; refresh=True bypasses the response cache (used by
+    the price watch, see watch.py).
+    maxCalls is a hard budget of API calls (cache hits are free): date pairs
+    then run most promising first (see planner.PriorityScheduler) and the
+    search stops when the budget is used up; run it again to continue.
+    Yields one batch (dict) per finished work unit:
+        rows        – list of new result rows (dicts keyed by ENTRY_COLUMNS)
+        departureDate, returnDate – the date pair the rows belong to
+        pair_done   – True for the last batch of a date pair
+        pairs_done, pairs_total   – date-pair progress
+        rows_total  – rows collected so far
+    Returns (as the generator's return value):
+        df (DataFrame) – all collected flight options (the top k / Pareto
+        front when selecting; the front is also in df.attrs["pareto"])
+    Every row also updates a departure day × trip length PriceCalendar of
+    min price / duration, saved next to the CSV (see price_calendar.py) and
+    returned in df.attrs["calendar"].
     """
-    
+
     # -------------------------------------------------------
     # Load config
     # -------------------------------------------------------
-    config = load_config()
+    if config is None:
+        config = load_config()
     api_config = config['api']
 
     base_url_google_flights = api_config['base_url']
     headers = api_config['headers']
 
-    # Output filename
-    if isRoundtrip:
-        fileName = f"roundtrip_flights_{departureId}_{arrivalId}.csv"
-    else:
-        fileName = f"oneway_flights_{departureId}_{arrivalId}.csv"
+    store, maxWorkers = setup_search_services(config, maxWorkers)
+    metrics_config = config.get('metrics') or {}
+    # This search's share of the process-wide metrics: what is counted from here on
+    metrics_start = metrics.snapshot()
 
-    # Dataframe to fill
-    df = pd.DataFrame()
+    # Output filename
+    if fileName is None:
+        fileName = default_file_name(departureId, arrivalId, isRoundtrip)
 
     # -------------------------------------------------------
-    # Iterate departure dates
+    # Checkpoint manifest / result sink
     # -------------------------------------------------------
-    count_departure_day = 1
-
-    while True:
-
-        departureDate = datetime.strptime(departureDateStart, "%Y-%m-%d") + timedelta(days=count_departure_day)
-
-        # Stop if beyond last allowed departure date
-        if departureDate >= datetime.strptime(departureDateEnd, "%Y-%m-%d"):
-            break
-
-        departureDateStr = departureDate.strftime("%Y-%m-%d")
-        count_departure_day += 1
-
-        # Earliest return date
-        dt_return_min = departureDate + timedelta(days=minDurationDays)
-
-        # Latest possible return date
-        maxReturnDate_dt = departureDate + timedelta(days=maxDurationDays)
-
-        # Iterate return dates
-        count_return_day = 0
-
-        while True:
+    params = search_run_params(
+        search_params(
+            departureDateStart, departureDateEnd, departureId, arrivalId, adults,
+            maxPrice, maxDuration, minDurationDays, maxDurationDays, maxFlights, isRoundtrip
+        ),
+        sweep, sweepStep, sweepTopCells, topK, topKBy, pareto, earlyStop
+    )
 
-            returnDate = dt_return_min + timedelta(days=count_return_day)
-            count_return_day += 1
+    # Streaming top-k / Pareto selection instead of keeping every row
+    selector = ResultSelector(topK, topKBy, pareto) if topK or pareto else None
+    earlyStop = "select" in params
+    if pairs is not None:
+        pairs = sorted({(str(departureDateStr), str(returnDateStr)) for departureDateStr, returnDateStr in pairs})
+        params["pairs"] = pairs
+    manifest = SearchManifest(
+        manifest_path(fileName), params,
+        resume=resume and os.path.exists(fileName)
+    )
+    if manifest.resumed:
+        print(f"Resuming search: {len(manifest.done)} finished work units in {manifest.path}")
+
+    # Rows are appended to the CSV as they come in
+    # (kept in memory only when the full table is returned)
+    sink = ResultSink(fileName, append=manifest.resumed, keep_rows=selector is None)
+    if selector is not None and manifest.resumed and os.path.exists(fileName) and os.path.getsize(fileName) > 0:
+        selector.extend(pd.read_csv(fileName).to_dict("records"))
+
+    # ... and upserted into the historical price store
+    if store is not None:
+        store_search = store.begin_search(params, resume=manifest.resumed)
+
+    # Hard call budget: known prices of the route steer which pairs run first
+    budget = CallBudget(maxCalls) if maxCalls is not None else None
+    known_prices = {}
+    if budget is not None and store is not None:
+        known_prices = store.cell_prices(departureId, arrivalId, departureDateStart, departureDateEnd, isRoundtrip)
+
+    def is_done(departureDateStr, returnDateStr, flight_outgoing=None):
+        return manifest.is_done(SearchManifest.unit(departureDateStr, returnDateStr, flight_outgoing))
+
+    pruned = {"flights": 0}
+    pruned_lock = threading.Lock()
+
+    def skip_flight(departureDateStr, returnDateStr, flight_outgoing):
+        # Called from the outgoing futures' done-callbacks, i.e. on worker threads
+        if is_done(departureDateStr, returnDateStr, flight_outgoing):
+            return True
+        if earlyStop and selector.prunes(flight_outgoing.get('price')):
+            with pruned_lock:
+                pruned["flights"] += 1
+            return True
+        return False
+
+    def pair_budget(departureDateStr, returnDateStr):
+        # Calls of a date pair are charged against the calls the scheduler reserved for it
+        return budget.for_key((departureDateStr, returnDateStr)) if budget is not None else None
 
-            if returnDate >= maxReturnDate_dt:
-                break
+    # -------------------------------------------------------
+    # Outgoing flights
+    # -------------------------------------------------------
+    def fetch_outgoing(departureDateStr, returnDateStr):
+        print(f"Searching for flights departing on {departureDateStr} and returning on {returnDateStr}...")
+
+        return get_outgoing_flight(
+            departureId, arrivalId,
+            departureDateStr,
+            returnDateStr,
+            maxDuration,
+            maxPrice,
+            base_url_google_flights,
+            headers,
+            isRoundtrip,
+            refresh=refresh,
+            budget=pair_budget(departureDateStr, returnDateStr)
+        )
 
-            returnDateStr = returnDate.strftime("%Y-%m-%d")
+    # -------------------------------------------------------
+    # Return Flights
+    # -------------------------------------------------------
+    def fetch_return(flight_outgoing, departureDateStr, returnDateStr):
+        request_path = (
+            f"/flights/roundtrip-returning?"
+            f"arrivalDate={returnDateStr}&adults={adults}"
+            f"&stops=0&maxPrice={maxPrice}&flightDuration={maxDuration}"
+        )
+
+        return get_request(
+            base_url_google_flights,
+            request_path,
+            headers,
+            retTok=flight_outgoing.get('returningToken'),
+            refresh=refresh,
+            budget=pair_budget(departureDateStr, returnDateStr)
+        )
 
-            print(f"Searching for flights departing on {departureDateStr} and returning on {returnDateStr}...")
+    # -------------------------------------------------------
+    # One-way legs (each origin/destination/date fetched once)
+    # -------------------------------------------------------
+    def fetch_leg(origin, destination, date):
+        print(f"Searching for one-way flights {origin} → {destination} on {date}...")
+
+        data = get_outgoing_flight(
+            origin, destination,
+            date, date,
+            maxDuration, maxPrice,
+            base_url_google_flights,
+            headers,
+            False,
+            refresh=refresh,
+            budget=budget
+        )
+        return data if is_failed(data) else collect_flights(data)
 
-            # -------------------------------------------------------
-            # Outgoing flights
-            # -------------------------------------------------------
-            flights = get_outgoing_flight(
-                departureId, arrivalId,
-                departureDateStr,
-                returnDateStr,
-                maxDuration,
-                maxPrice,
-                base_url_google_flights,
-                headers,
-                isRoundtrip
+    # -------------------------------------------------------
+    # Iterate departure / return date pairs
+    # -------------------------------------------------------
+    all_pairs = list(iter_date_pairs(departureDateStart, departureDateEnd, minDurationDays, maxDurationDays))
+    if pairs is not None:
+        wanted = set(pairs)
+        all_pairs = [pair for pair in all_pairs if pair in wanted]
+
+    # Departure day × trip length matrix of every row (rows of a resumed search included)
+    calendar = PriceCalendar.for_search(departureDateStart, departureDateEnd, minDurationDays, maxDurationDays)
+    if manifest.resumed and os.path.exists(fileName) and os.path.getsize(fileName) > 0:
+        calendar.add_dataframe(pd.read_csv(fileName))
+
+    # Cheapest price found per date pair (drives the smart sweep)
+    cell_prices = {}
+    searched = set()
+    progress = {"pairs_done": 0, "pairs_total": len(all_pairs), "budget_cut_off": False}
+
+    def run_pairs(executor, pairs_to_run):
+        searched.update(pairs_to_run)
+        pairs = [pair for pair in pairs_to_run if not is_done(*pair)]
+        progress["pairs_done"] += len(pairs_to_run) - len(pairs)
+
+        scheduler = None
+        if budget is not None:
+            scheduler = PriorityScheduler(
+                pairs, minDurationDays, maxPrice, {**known_prices, **cell_prices},
+                budget=budget if isRoundtrip else None, pair_cost=1 + maxFlights
+            )
+            if isRoundtrip:
+                # Pulled lazily, so prices found meanwhile reorder the rest
+                pairs = scheduler
+            else:
+                selected = select_oneway_pairs(pairs, list(scheduler), departureId, arrivalId, budget)
+                progress["budget_cut_off"] |= len(selected) < len(pairs)
+                pairs = selected
+
+        if isRoundtrip:
+            units = iter_roundtrip_rows(
+                pairs, executor, fetch_outgoing, fetch_return,
+                maxFlights, lookahead=2 * maxWorkers, skip=skip_flight
+            )
+        else:
+            units = iter_oneway_rows(
+                pairs, executor, fetch_leg,
+                departureId, arrivalId, maxFlights, maxPrice
             )
 
-            if flights is None:
+        for departureDateStr, returnDateStr, flight_outgoing, rows in units:
+            sink.extend(rows)
+            calendar.add_rows(rows, (departureDateStr, returnDateStr))
+            if selector is not None:
+                selector.extend(rows)
+            metrics.inc("rows_total", len(rows))
+
+            # Append new rows to the CSV, then record the unit as finished
+            with metrics.timed("io"):
+                sink.flush()
+                if store is not None:
+                    store.add_rows(rows, departureId, arrivalId, isRoundtrip, search=store_search)
+                manifest.mark_done(SearchManifest.unit(departureDateStr, returnDateStr, flight_outgoing))
+
+            for row in rows:
+                pair = (departureDateStr, returnDateStr)
+                cell_prices[pair] = min(row["Price"], cell_prices.get(pair, row["Price"]))
+
+            if flight_outgoing is None:
+                progress["pairs_done"] += 1
+                if scheduler is not None:
+                    scheduler.observe((departureDateStr, returnDateStr), cell_prices.get((departureDateStr, returnDateStr)))
+                    scheduler.finish((departureDateStr, returnDateStr))
+            elif not rows:
                 continue
 
-            flights_outgoing = []
-            if flights['topFlights'] is not None:
-                flights_outgoing += flights['topFlights']
-            if flights['otherFlights'] is not None:
-                flights_outgoing += flights['otherFlights']
-
-            count_flights_outgoing = 0
-
-            for flight_outgoing in flights_outgoing:
-
-                count_flights_outgoing += 1
-                if count_flights_outgoing > maxFlights:
-                    break
-
-                price = flight_outgoing.get('price', 0)
-                returning_token = flight_outgoing.get('returningToken')
-
-                # -------------------------------------------------------
-                # Return Flights
-                # -------------------------------------------------------
-                if isRoundtrip:
-                    request_path = (
-                        f"/flights/roundtrip-returning?"
-                        f"arrivalDate={returnDateStr}&adults={adults}"
-                        f"&stops=0&maxPrice={maxPrice}&flightDuration={maxDuration}"
-                    )
-
-                    data_ret = get_request(
-                        base_url_google_flights,
-                        request_path,
-                        headers,
-                        retTok=returning_token
-                    )
-                else:
-                    # one-way flight: reverse airports
-                    data_ret = get_outgoing_flight(
-                        arrivalId, departureId,
-                        returnDateStr, returnDateStr,
-                        maxDuration, maxPrice,
-                        base_url_google_flights,
-                        headers,
-                        isRoundtrip
-                    )
-
-                flights_return = data_ret.get('topFlights', []) + data_ret.get('otherFlights', [])
-
-                count_return_flights = 0
-
-                if isRoundtrip and flights_return == []:
-                    # No multiple return flights → single roundtrip
-                    df = pd.concat([
-                        df, add_entry_table(flights_return, flight_outgoing, returnDateStr)
-                    ], ignore_index=True)
-                else:
-                    for flight_return in flights_return:
-
-                        count_return_flights += 1
-                        if count_return_flights > maxFlights:
-                            break
-
-                        # For one-way case check price total
-                        if not isRoundtrip:
-                            total_price = price + flight_return.get('price', 0)
-                            if total_price > int(maxPrice):
-                                continue
-
-                        df = pd.concat([
-                            df, add_entry_table(flight_return, flight_outgoing, returnDateStr)
-                        ], ignore_index=True)
-
-                # Write CSV continuously to keep progress saved
-                df.to_csv(fileName, index=False)
-
+            yield {
+                "rows": rows,
+                "departureDate": departureDateStr,
+                "returnDate": returnDateStr,
+                "pair_done": flight_outgoing is None,
+                "pairs_done": progress["pairs_done"],
+                "pairs_total": progress["pairs_total"],
+                "rows_total": sink.row_count,
+            }
+
+        if isinstance(pairs, PriorityScheduler):
+            progress["budget_cut_off"] |= pairs.cut_off
+
+    with manifest, sink, make_executor(maxWorkers) as executor:
+
+        if sweep == "smart":
+            # Prices of pairs finished before a resume
+            if manifest.resumed:
+                previous = sink.to_dataframe() if selector is None else pd.read_csv(fileName)
+                for (departureDateStr, returnDateStr), price in previous.groupby(
+                        [previous["Departure Date Outgoing"].astype(str), previous["Departure Time Return"].astype(str).str[:10]]
+                    )["Price"].min().items():
+                    cell_prices[(departureDateStr, returnDateStr)] = price
+
+            coarse = coarse_pairs(all_pairs, minDurationDays, sweepStep)
+            progress["pairs_total"] = len(coarse)
+            yield from run_pairs(executor, coarse)
+
+            refine = refine_pairs(all_pairs, minDurationDays, cell_prices, searched, maxPrice, sweepStep, sweepTopCells)
+            progress["pairs_total"] += len(refine)
+            yield from run_pairs(executor, refine)
+
+            report = sweep_report(all_pairs, searched)
+            print(
+                f"Smart sweep searched {report['pairs_searched']} of {report['pairs_total']} date pairs, "
+                f"skipped {report['pairs_skipped']} ({report['skipped_fraction']:.0%})."
+            )
+        else:
+            yield from run_pairs(executor, all_pairs)
+            report = sweep_report(all_pairs, searched)
+
+        if all(is_done(*pair) for pair in searched):
+            manifest.mark_complete()
+            if store is not None:
+                store.complete_search(store_search)
+        elif budget is not None and (progress["budget_cut_off"] or budget.remaining < (1 + maxFlights if isRoundtrip else 2)):
+            print(
+                f"[BUDGET] Call budget of {budget.limit} used up with {progress['pairs_done']} of "
+                f"{progress['pairs_total']} date pairs searched. Run again with the same parameters to continue."
+            )
+        else:
+            print("[WARNING] Some searches failed. Run again with the same parameters to resume.")
+
+    with metrics.timed("dataframe"):
+        if selector is None:
+            df = sink.to_dataframe()
+        else:
+            df = selector.to_dataframe()
+            if pareto:
+                df.attrs["pareto"] = selector.pareto_dataframe()
+    df.attrs["sweep"] = report
+    df.attrs["calendar"] = calendar
+    calendar.save(calendar_path(fileName))
+    if budget is not None:
+        df.attrs["budget"] = {"limit": budget.limit, "used": budget.used}
+
+    if earlyStop:
+        print(f"Early stop skipped the return searches of {pruned['flights']} outgoing flights.")
+
+    if metrics.enabled():
+        df.attrs["metrics"] = metrics.get_metrics().report(since=metrics_start)
+    if metrics_config.get('report_path'):
+        metrics.write_report(metrics_config['report_path'], {"search": params, "sweep": report, "rows": len(df)}, since=metrics_start)
+        print(f"Metrics report written to {metrics_config['report_path']}")
     return df
 
+
+def run_flight_search(*args, **kwargs):
+    """
+    Main function to run the flight search.
+    Takes the same parameters as iter_flight_search and runs it to completion.
+    Returns:
+        df (DataFrame) – all collected flight options
+    """
+    search = iter_flight_search(*args, **kwargs)
+    while True:
+        try:
+            next(search)
+        except StopIteration as done:
+            return done.value
+
 if __name__ == "__main__":
     # Example run
     df = run_flight_search(
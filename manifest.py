@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+#########################################
+#              flight_key               #
+#########################################
+
+def flight_key(flight):
+    """
+    Stable identifier of an outgoing flight across runs (segment flight IDs
+    plus departure). returningToken values expire, so they can't be used.
+    """
+    segments = flight.get('segments') or []
+    ids = "-".join(str(segment.get('flightId', '')) for segment in segments)
+    return f"{ids}@{flight.get('departureDate', '')} {flight.get('departureTime', '')}"
+
+
+def params_fingerprint(params):
+    return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+#########################################
+#            SearchManifest             #
+#########################################
+
+class SearchManifest:
+    """
+    Append-only JSON-lines log of the finished work units of a search.
+
+    A unit is (departureDate, returnDate, outgoing flight key) for one
+    outgoing flight and its returns, or (departureDate, returnDate, None)
+    once a whole date pair is done. The first line stores a fingerprint of
+    the search parameters; a manifest of a different search, or one
+    marked complete, is discarded and the search starts fresh.
+    """
+
+    def __init__(self, path, params, resume=True):
+        self.path = path
+        self.fingerprint = params_fingerprint(params)
+        self.done = set()
+        self.resumed = False
+        self._lock = threading.Lock()
+
+        if resume:
+            self._load()
+
+        if self.resumed:
+            self._file = open(path, "a", encoding="utf-8")
+        else:
+            self.done = set()
+            self._file = open(path, "w", encoding="utf-8")
+            self._write({"params": self.fingerprint, "created": time.time()})
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+
+        done = set()
+        with open(self.path, "r", encoding="utf-8") as f:
+            for i, line in enumerate(f):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn last line from a crash
+                    continue
+                if i == 0:
+                    if entry.get("params") != self.fingerprint:
+                        return
+                elif entry.get("complete"):
+                    return
+                elif "unit" in entry:
+                    done.add(tuple(entry["unit"]))
+
+        self.done = done
+        self.resumed = True
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    @staticmethod
+    def unit(departureDateStr, returnDateStr, flight=None):
+        return (departureDateStr, returnDateStr, flight_key(flight) if flight is not None else None)
+
+    def is_done(self, unit):
+        return unit in self.done
+
+    def mark_done(self, unit):
+        with self._lock:
+            if unit in self.done:
+                return
+            self.done.add(unit)
+            self._write({"unit": list(unit)})
+
+    def mark_complete(self):
+        with self._lock:
+            self._write({"complete": True})
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def manifest_is_complete(path, params):
+    """True if the manifest at path belongs to a search with these params and is marked complete."""
+    if not os.path.exists(path):
+        return False
+
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    if not lines:
+        return False
+
+    try:
+        header = json.loads(lines[0])
+        last = json.loads(lines[-1])
+    except json.JSONDecodeError:
+        return False
+    return header.get("params") == params_fingerprint(params) and last.get("complete") is True
+
+
+def manifest_path(fileName):
+    """roundtrip_flights_IST_BKK.csv → roundtrip_flights_IST_BKK.manifest.jsonl"""
+    return os.path.splitext(fileName)[0] + ".manifest.jsonl"
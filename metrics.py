@@ -0,0 +1,303 @@
+import json
+import threading
+import time
+
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+#########################################
+#               Metrics                 #
+#########################################
+
+class Metrics:
+    """
+    In-process counters, histograms and phase timers for the search pipeline.
+
+    counters    – name{labels} → value (requests, retries, 429s, bytes, cache hits, rows…)
+    histograms  – name{labels} → bucket counts, sum, count (request latency)
+    phases      – total seconds spent per phase (network, parsing, dataframe, io)
+
+    Exported as a JSON run report (report()) or Prometheus text (prometheus_text()).
+    One instance serves the whole process and is never reset; report(since=
+    snapshot()) gives the numbers of one search (counted while it ran, so
+    searches running at the same time are included in each other's).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+        self.phases = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted(labels.items())))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = {"buckets": buckets, "counts": [0] * (len(buckets) + 1), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    hist["counts"][i] += 1
+                    break
+            else:
+                hist["counts"][-1] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    def add_phase(self, phase, seconds):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def snapshot(self):
+        """Copy of the current values, to report on what happens after it (report(since=...))."""
+        with self._lock:
+            return {
+                "at": time.time(),
+                "counters": dict(self.counters),
+                "histograms": {
+                    key: {"counts": list(hist["counts"]), "sum": hist["sum"], "count": hist["count"]}
+                    for key, hist in self.histograms.items()
+                },
+                "phases": dict(self.phases),
+            }
+
+    # ---------------------------------------------------
+    # Export
+    # ---------------------------------------------------
+    def report(self, since=None):
+        """JSON-serialisable run report; since=snapshot() reports only what changed after it."""
+        base = since or {"at": self.started, "counters": {}, "histograms": {}, "phases": {}}
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value - base["counters"].get((name, labels), 0)}
+                for (name, labels), value in sorted(self.counters.items())
+                if value != base["counters"].get((name, labels), 0)
+            ]
+            histograms = []
+            for (name, labels), hist in sorted(self.histograms.items()):
+                old = base["histograms"].get((name, labels))
+                if old is not None:
+                    if old["count"] == hist["count"]:
+                        continue
+                    hist = {
+                        "buckets": hist["buckets"],
+                        "counts": [count - previous for count, previous in zip(hist["counts"], old["counts"])],
+                        "sum": hist["sum"] - old["sum"],
+                        "count": hist["count"] - old["count"],
+                    }
+                histograms.append({
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": hist["count"],
+                    "sum": round(hist["sum"], 6),
+                    "mean": round(hist["sum"] / hist["count"], 6) if hist["count"] else None,
+                    "buckets": {str(bound): count for bound, count in zip(list(hist["buckets"]) + ["+Inf"], hist["counts"])},
+                })
+            phases = {
+                phase: round(seconds - base["phases"].get(phase, 0.0), 6)
+                for phase, seconds in sorted(self.phases.items())
+                if seconds != base["phases"].get(phase, 0.0)
+            }
+
+        lookups = {result: 0 for result in ("hit", "miss")}
+        for counter in counters:
+            if counter["name"] == "cache_lookups_total":
+                lookups[counter["labels"].get("result", "miss")] += counter["value"]
+        total_lookups = lookups["hit"] + lookups["miss"]
+
+        return {
+            "started": base["at"],
+            "elapsed_s": round(time.time() - base["at"], 3),
+            "counters": counters,
+            "histograms": histograms,
+            "phases_s": phases,
+            "cache_hit_rate": lookups["hit"] / total_lookups if total_lookups else None,
+        }
+
+    def prometheus_text(self, prefix="flight_finder_"):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        typed = set()
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {prefix}{name} {kind}")
+
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                declare(name, "counter")
+                lines.append(f"{prefix}{name}{_labels(labels)} {value}")
+
+            for (name, labels), hist in sorted(self.histograms.items()):
+                declare(name, "histogram")
+                cumulative = 0
+                for bound, count in zip(list(hist["buckets"]) + ["+Inf"], hist["counts"]):
+                    cumulative += count
+                    lines.append(f"{prefix}{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{prefix}{name}_sum{_labels(labels)} {hist['sum']}")
+                lines.append(f"{prefix}{name}_count{_labels(labels)} {hist['count']}")
+
+            for phase, seconds in sorted(self.phases.items()):
+                declare("phase_seconds_total", "counter")
+                lines.append(f"{prefix}phase_seconds_total{_labels((('phase', phase),))} {seconds}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+#########################################
+#        module-level shortcuts         #
+#########################################
+
+# None while metrics are disabled: every helper below returns immediately
+_metrics = None
+
+
+class _Timer:
+    __slots__ = ("phase", "started")
+
+    def __init__(self, phase):
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if _metrics is not None:
+            _metrics.add_phase(self.phase, time.perf_counter() - self.started)
+        return False
+
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_TIMER = _NoTimer()
+
+
+def inc(name, value=1, **labels):
+    if _metrics is not None:
+        _metrics.inc(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    if _metrics is not None:
+        _metrics.observe(name, value, **labels)
+
+
+def timed(phase):
+    """Context manager adding the elapsed time to a phase (no-op when disabled)."""
+    if _metrics is None:
+        return _NO_TIMER
+    return _Timer(phase)
+
+
+def enabled():
+    return _metrics is not None
+
+
+def get_metrics():
+    return _metrics
+
+
+def snapshot():
+    """Metrics.snapshot() of the process-wide metrics, None while disabled."""
+    return _metrics.snapshot() if _metrics is not None else None
+
+
+#########################################
+#             setup_metrics             #
+#########################################
+
+_prometheus_server = None
+_setup_lock = threading.Lock()
+
+
+def setup_metrics(metrics_config):
+    """
+    Configures instrumentation from the 'metrics' section of config.json:
+        enabled          – collect metrics (default True if the section exists)
+        report_path      – JSON run report written at the end of each search
+        prometheus_port  – serve /metrics in Prometheus text format on this port
+        prometheus_host  – interface to serve it on (default 127.0.0.1)
+    Missing or disabled config turns all instrumentation into no-ops.
+    Searches share one Metrics instance: calling this again (every search
+    does) keeps its counters, so concurrent searches don't reset each other.
+    """
+    global _metrics
+
+    if not metrics_config or not metrics_config.get("enabled", True):
+        _metrics = None
+        return None
+
+    with _setup_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+
+        port = metrics_config.get("prometheus_port")
+        if port and _prometheus_server is None:
+            serve_prometheus(port, metrics_config.get("prometheus_host", "127.0.0.1"))
+    return _metrics
+
+
+def write_report(path, extra=None, since=None):
+    """Writes the JSON run report (since: a snapshot() taken when the search started)."""
+    if _metrics is None:
+        return None
+    report = _metrics.report(since)
+    if extra:
+        report.update(extra)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    return report
+
+
+def serve_prometheus(port, host="127.0.0.1"):
+    """Serves GET /metrics from a daemon thread (local only unless another host is given)."""
+    global _prometheus_server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics" or _metrics is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = _metrics.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    _prometheus_server = ThreadingHTTPServer((host, port), Handler)
+    _prometheus_server.daemon_threads = True
+    threading.Thread(target=_prometheus_server.serve_forever, daemon=True).start()
+    return _prometheus_server
@@ -0,0 +1,245 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+
+AIRLINES = [
+    ("TK", "Turkish Airlines"), ("QR", "Qatar Airways"), ("EK", "Emirates"),
+    ("LH", "Lufthansa"), ("TG", "Thai Airways"), ("EY", "Etihad"),
+]
+HUBS = ["IST", "DOH", "DXB", "FRA", "AUH", "MUC"]
+
+
+#########################################
+#          synthetic payloads           #
+#########################################
+
+def _rng(endpoint, params):
+    # Same request → same flights, so every execution mode sees identical data
+    key = endpoint + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+    return random.Random(hashlib.sha1(key.encode()).hexdigest())
+
+
+def _flight(rng, origin, destination, date, with_token):
+    stops = rng.choice([0, 0, 1, 1, 2])
+    code, name = rng.choice(AIRLINES)
+    hour = rng.randint(0, 23)
+    minute = rng.choice([0, 15, 30, 45])
+    duration = rng.randint(540, 960) + stops * rng.randint(60, 240)
+
+    airports = [origin] + rng.sample(HUBS, stops) + [destination]
+    segments = []
+    for a, b in zip(airports, airports[1:]):
+        segments.append({
+            "flightId": rng.randint(10 ** 8, 10 ** 9),
+            "departureAirportCode": a,
+            "arrivalAirportCode": b,
+            "departureDate": date,
+            "departureTime": f"{hour:02d}:{minute:02d}",
+            "arrivalDate": date,
+            "arrivalTime": f"{rng.randint(0, 23):02d}:{rng.choice([0, 20, 40]):02d}",
+            "airline": {"airlineCode": code, "flightNumber": str(rng.randint(10, 999)), "airlineName": name},
+            # Details real responses carry but the pipeline never reads
+            "aircraft": rng.choice(["Boeing 777", "Airbus A350", "Boeing 787", "Airbus A330"]),
+            "legroom": f"{rng.choice([29, 30, 31, 32])} in",
+            "extensions": ["Wi-Fi for a fee", "In-seat power & USB outlets", "On-demand video", "Average legroom"],
+            "overnight": rng.random() < 0.3,
+        })
+
+    # Prices drift with the date so the grid has cheap and expensive regions
+    day = int(date[-2:]) if date[-2:].isdigit() else 1
+    flight = {
+        "price": 250 + 8 * abs(day - 15) + rng.randint(0, 400) - 60 * stops,
+        "duration": duration,
+        "stops": stops,
+        "segments": segments,
+        "departureDate": date,
+        "departureTime": f"{hour:02d}:{minute:02d}",
+        "arrivalDate": date,
+        "arrivalTime": segments[-1]["arrivalTime"],
+        "airline": [{"airlineCode": code, "airlineName": name}],
+        "layovers": [
+            {"airportCode": airport, "durationMinutes": rng.randint(60, 300), "overnight": False}
+            for airport in airports[1:-1]
+        ],
+        "carbonEmissions": {"thisFlight": rng.randint(400, 900) * 1000, "typicalForRoute": 650000, "differencePercent": rng.randint(-30, 30)},
+        "bookingToken": hashlib.sha1(f"booking{rng.random()}".encode()).hexdigest() * 4,
+    }
+    if with_token:
+        # Carries the outbound price so the returning prices (roundtrip totals) can start from it
+        flight["returningToken"] = hashlib.sha1(f"{rng.random()}".encode()).hexdigest() + f"~{flight['price']}"
+    return flight
+
+
+def synthetic_response(path, params, flights_per_page=12):
+    endpoint = path.rstrip("/").rsplit("/", 1)[-1]
+    rng = _rng(endpoint, params)
+
+    if endpoint == "roundtrip-returning":
+        origin, destination = "BKK", "IST"
+        date = params.get("arrivalDate", "2026-01-01")
+    else:
+        origin = params.get("departureId", "IST")
+        destination = params.get("arrivalId", "BKK")
+        date = params.get("departureDate", "2026-01-01")
+
+    with_token = endpoint == "search-roundtrip"
+    flights = [_flight(rng, origin, destination, date, with_token) for _ in range(flights_per_page)]
+
+    # Like the real API, a roundtrip's returning options cost at least the outbound "from" price
+    token = params.get("returningToken", "")
+    if endpoint == "roundtrip-returning" and "~" in token:
+        outbound_price = int(token.rsplit("~", 1)[1])
+        for flight in flights:
+            flight["price"] = outbound_price + rng.randint(0, 250)
+
+    flights.sort(key=lambda flight: flight["price"])
+    return {"status": True, "data": {"topFlights": flights[:3], "otherFlights": flights[3:]}}
+
+
+#########################################
+#             MockFlightsAPI            #
+#########################################
+
+class MockFlightsAPI:
+    """
+    Local stand-in for the google-flights4 RapidAPI endpoints
+    (/flights/search-roundtrip, /flights/search-one-way, /flights/roundtrip-returning).
+
+    latency / jitter – seconds added to every response
+    error_429        – share of requests answered with 429 + Retry-After
+    error_5xx        – share of requests answered with 503
+    record_dir       – serve <endpoint>.json from this directory when present
+                       instead of synthetic payloads (recorded real responses)
+    key_quota        – {api key: calls} per x-rapidapi-key; responses carry
+                       x-ratelimit-requests-remaining, exhausted keys get 403
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.05, jitter=0.02,
+                 error_429=0.0, error_5xx=0.0, retry_after=0.2, flights_per_page=12, record_dir=None, seed=0,
+                 key_quota=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_429 = error_429
+        self.error_5xx = error_5xx
+        self.retry_after = retry_after
+        self.flights_per_page = flights_per_page
+        self.record_dir = record_dir
+        self.key_quota = dict(key_quota) if key_quota else None
+
+        self.requests = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._errors_rng = random.Random(seed)
+
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                api._handle(self)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _payload(self, path, params):
+        endpoint = path.rstrip("/").rsplit("/", 1)[-1]
+        if self.record_dir:
+            recorded = os.path.join(self.record_dir, endpoint + ".json")
+            if os.path.exists(recorded):
+                with open(recorded, "rb") as f:
+                    return f.read()
+        return json.dumps(synthetic_response(path, params, self.flights_per_page)).encode()
+
+    def _handle(self, handler):
+        parts = urlsplit(handler.path)
+        params = dict(parse_qsl(parts.query))
+
+        with self._lock:
+            self.requests += 1
+            roll = self._errors_rng.random()
+
+            quota_headers = {}
+            if self.key_quota is not None:
+                key = handler.headers.get("x-rapidapi-key")
+                remaining = self.key_quota.get(key, 0)
+                if remaining > 0:
+                    self.key_quota[key] = remaining - 1
+                quota_headers["x-ratelimit-requests-remaining"] = str(max(0, remaining - 1))
+
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+        if self.key_quota is not None and remaining <= 0:
+            self._send(handler, 403, b'{"message": "You have exceeded the MONTHLY quota"}', quota_headers)
+        elif roll < self.error_429:
+            self._send(handler, 429, b'{"message": "Too many requests"}', {"Retry-After": str(self.retry_after)})
+        elif roll < self.error_429 + self.error_5xx:
+            self._send(handler, 503, b'{"message": "Service unavailable"}')
+        else:
+            self._send(handler, 200, self._payload(parts.path, params), quota_headers)
+
+    def _send(self, handler, status, body, extra_headers=None):
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in (extra_headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+        with self._lock:
+            self.bytes_sent += len(body)
+            if status != 200:
+                self.errors += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = self.errors = self.bytes_sent = 0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the mock flights API (point config.json's base_url at it).")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-429", type=float, default=0.0)
+    parser.add_argument("--error-5xx", type=float, default=0.0)
+    parser.add_argument("--record-dir", default=None)
+    args = parser.parse_args()
+
+    api = MockFlightsAPI(port=args.port, latency=args.latency, error_429=args.error_429,
+                         error_5xx=args.error_5xx, record_dir=args.record_dir)
+    print(f"Mock flights API on {api.base_url}")
+    api.server.serve_forever()
@@ -0,0 +1,240 @@
+import os
+from itertools import groupby
+
+import pandas as pd
+
+from utilities import (
+    load_config,
+    get_outgoing_flight,
+    is_failed,
+    make_executor,
+    build_entry_row,
+    parse_airports,
+    ENTRY_COLUMNS
+)
+from legs import submit_legs, collect_legs, leg_table, combine_legs
+from sweep import iter_date_pairs
+from results import ResultSink
+from store import itinerary_key
+from main import setup_search_services, collect_flights
+import metrics
+
+
+# Multi-airport results: the airport pair and the price of both legs in front of the usual columns
+MULTI_COLUMNS = ["Route", "Total Price"] + ENTRY_COLUMNS
+
+
+def route_label(out_origin, out_destination, in_origin, in_destination):
+    """BER-BKK for a plain return trip, BER-BKK/HKT-HAM for an open jaw."""
+    if (in_origin, in_destination) == (out_destination, out_origin):
+        return f"{out_origin}-{out_destination}"
+    return f"{out_origin}-{out_destination}/{in_origin}-{in_destination}"
+
+
+def multi_trips(origins, destinations, departureDateStr, returnDates, openJaw=False):
+    """
+    Trips of one departure date: every origin → destination outbound leg
+    with the matching way back (openJaw=True: from any destination to any
+    origin) on every return date.
+    """
+    records = []
+    for out_origin in origins:
+        for out_destination in destinations:
+            inbound = [(out_destination, out_origin)]
+            if openJaw:
+                inbound = [(in_origin, in_destination) for in_origin in destinations for in_destination in origins]
+            for in_origin, in_destination in inbound:
+                for returnDateStr in returnDates:
+                    records.append((out_origin, out_destination, departureDateStr, in_origin, in_destination, returnDateStr))
+
+    trips = pd.DataFrame.from_records(records, columns=[
+        "out_origin", "out_destination", "departureDate", "in_origin", "in_destination", "returnDate"
+    ])
+    trips.insert(0, "trip", range(len(trips)))
+    return trips
+
+
+#########################################
+#            iter_multi_rows            #
+#########################################
+
+def iter_multi_rows(pairs, executor, fetch_leg, origins, destinations, maxFlights, maxPrice, openJaw=False):
+    """
+    Multi-airport engine on top of the one-way legs: every distinct
+    (origin, destination, date) leg is fetched once and reused by every
+    airport combination and date pair it belongs to.
+
+    Yields (departureDateStr, rows) per departure date, rows keyed by
+    MULTI_COLUMNS. Trips with a failed leg request are left out.
+    """
+    pairs = list(pairs)
+
+    legs = []
+    for departureDateStr, returnDateStr in pairs:
+        legs += [(origin, destination, departureDateStr) for origin in origins for destination in destinations]
+        legs += [(destination, origin, returnDateStr) for origin in origins for destination in destinations]
+    futures = submit_legs(legs, executor, fetch_leg)
+
+    for departureDateStr, group in groupby(pairs, key=lambda pair: pair[0]):
+        trips = multi_trips(origins, destinations, departureDateStr, [returnDateStr for _, returnDateStr in group], openJaw)
+
+        group_legs = list(zip(trips["out_origin"], trips["out_destination"], trips["departureDate"]))
+        group_legs += list(zip(trips["in_origin"], trips["in_destination"], trips["returnDate"]))
+        flights_by_leg, failed = collect_legs(futures, group_legs, maxFlights)
+
+        with metrics.timed("dataframe"):
+            combined = combine_legs(trips, leg_table(flights_by_leg), maxPrice)
+
+        with metrics.timed("rows"):
+            rows = []
+            for record in combined.itertuples(index=False):
+                if (record.out_origin, record.out_destination, record.departureDate) in failed \
+                        or (record.in_origin, record.in_destination, record.returnDate) in failed:
+                    continue
+                row = build_entry_row(record.flight_in, record.flight_out, record.returnDate)
+                row["Route"] = route_label(record.out_origin, record.out_destination, record.in_origin, record.in_destination)
+                row["Total Price"] = record.total_price
+                rows.append(row)
+
+        yield departureDateStr, rows
+
+
+#########################################
+#           iter_multi_search           #
+#########################################
+
+def default_multi_file_name(origins, destinations, openJaw=False):
+    kind = "openjaw" if openJaw else "multi"
+    return f"{kind}_flights_{'-'.join(origins)}_{'-'.join(destinations)}.csv"
+
+
+def multi_search_params(
+        departureDateStart, departureDateEnd, origins, destinations, adults,
+        maxPrice, maxDuration, minDurationDays, maxDurationDays, maxFlights,
+        openJaw=False
+    ):
+    """The parameters that define a multi-airport search's results (price store key)."""
+    return {
+        "departureDateStart": departureDateStart, "departureDateEnd": departureDateEnd,
+        "departureIds": list(origins), "arrivalIds": list(destinations), "adults": adults,
+        "maxPrice": maxPrice, "maxDuration": maxDuration,
+        "minDurationDays": minDurationDays, "maxDurationDays": maxDurationDays,
+        "maxFlights": maxFlights, "openJaw": openJaw,
+    }
+
+
+def multi_row_key(row):
+    """itinerary_key of a combination, prefixed by its Route (the same legs can form several routes' trips)."""
+    return f"{row['Route']}:{itinerary_key(row, roundtrip=False)}"
+
+
+def iter_multi_search(
+        departureIds,
+        arrivalIds,
+        departureDateStart,
+        departureDateEnd,
+        adults,
+        maxPrice,
+        maxDuration,
+        minDurationDays,
+        maxDurationDays,
+        maxFlights,
+        openJaw=False,
+        maxWorkers=None,
+        fileName=None,
+        config=None
+    ):
+    """
+    Searches every departure airport × arrival airport combination (e.g.
+    BER,HAM,PRG → BKK,HKT,DMK) in one run, built from one-way legs: each
+    (origin, destination, date) leg is one API call, shared by every
+    combination that uses it, instead of one search per airport pair.
+    openJaw=True also combines outbound legs with returns from any arrival
+    airport to any departure airport.
+    departureIds / arrivalIds are lists or comma-separated strings; the other
+    parameters are those of iter_flight_search.
+
+    Yields one batch (dict) per departure date:
+        rows        – list of new result rows (dicts keyed by MULTI_COLUMNS)
+        departureDate
+        dates_done, dates_total – departure-date progress
+        rows_total  – rows collected so far
+    Returns (as the generator's return value):
+        df (DataFrame) – every trip within maxPrice, cheapest Total Price
+        first, with the airport pair in the Route column
+    """
+    if config is None:
+        config = load_config()
+    base_url_google_flights = config['api']['base_url']
+    headers = config['api']['headers']
+    store, maxWorkers = setup_search_services(config, maxWorkers)
+
+    origins = parse_airports(departureIds)
+    destinations = parse_airports(arrivalIds)
+    if fileName is None:
+        fileName = default_multi_file_name(origins, destinations, openJaw)
+
+    def fetch_leg(origin, destination, date):
+        print(f"Searching for one-way flights {origin} → {destination} on {date}...")
+
+        data = get_outgoing_flight(
+            origin, destination,
+            date, date,
+            maxDuration, maxPrice,
+            base_url_google_flights,
+            headers,
+            False
+        )
+        return data if is_failed(data) else collect_flights(data)
+
+    pairs = list(iter_date_pairs(departureDateStart, departureDateEnd, minDurationDays, maxDurationDays))
+    dates_total = len({departureDateStr for departureDateStr, _ in pairs})
+    dates_done = 0
+
+    # Kept as this search's results only: a combination's Price is the inbound
+    # leg's, so these rows must not feed the one-way itineraries of a route.
+    store_search = None
+    if store is not None:
+        store_search = store.begin_search(multi_search_params(
+            departureDateStart, departureDateEnd, origins, destinations, adults,
+            maxPrice, maxDuration, minDurationDays, maxDurationDays, maxFlights, openJaw
+        ))
+
+    with ResultSink(fileName, columns=MULTI_COLUMNS) as sink, make_executor(maxWorkers) as executor:
+        for departureDateStr, rows in iter_multi_rows(
+                pairs, executor, fetch_leg, origins, destinations, maxFlights, maxPrice, openJaw):
+            sink.extend(rows)
+            metrics.inc("rows_total", len(rows))
+
+            with metrics.timed("io"):
+                sink.flush()
+                if store is not None:
+                    store.add_search_rows(store_search, rows, key=multi_row_key)
+
+            dates_done += 1
+            yield {
+                "rows": rows,
+                "departureDate": departureDateStr,
+                "dates_done": dates_done,
+                "dates_total": dates_total,
+                "rows_total": sink.row_count,
+            }
+
+    if store is not None:
+        store.complete_search(store_search)
+
+    # The CSV keeps the search order (appended as it ran); the DataFrame is ranked
+    df = sink.to_dataframe()
+    df = df.sort_values(by="Total Price", kind="stable").reset_index(drop=True)
+    print(f"{len(df)} trips over {df['Route'].nunique()} airport combinations saved to {os.path.abspath(fileName)}")
+    return df
+
+
+def run_multi_search(*args, **kwargs):
+    """Runs iter_multi_search to completion and returns its ranked DataFrame."""
+    search = iter_multi_search(*args, **kwargs)
+    while True:
+        try:
+            next(search)
+        except StopIteration as done:
+            return done.value
@@ -0,0 +1,341 @@
+import pandas as pd
+from utilities import ENTRY_COLUMNS, OUTGOING_KEY, TOTAL_DURATION, TOTAL_STOPS
+
+
+ITINERARY_COLUMNS = [
+    "itinerary_id", "parent_id", "leg", "search_date", "rank",
+    "price", "duration", "stops", "num_segments", "airline",
+    "departure", "arrival", "departure_date", "departure_time", "arrival_date", "arrival_time",
+    "returning_token",
+]
+
+SEGMENT_COLUMNS = [
+    "itinerary_id", "seq", "flight_id", "airline_code", "airline_name", "flight_number",
+    "departure_airport", "arrival_airport", "departure", "arrival", "arrival_time",
+]
+
+
+#########################################
+#          NormalizedResults            #
+#########################################
+
+class NormalizedResults:
+    """
+    Accumulates API flights into two columnar tables in a single pass:
+
+    itineraries – one row per flight option (price, duration, stops as ints,
+                  departure/arrival as datetime64, airline as category).
+                  Return flights point to their outgoing flight via parent_id.
+    segments    – one row per segment, linked by itinerary_id
+                  (airlines and airports as categories).
+
+    Values are appended to plain Python lists; the DataFrames are built once
+    in tables(). Flights without segments or duration are kept (missing
+    values are NA).
+    """
+
+    def __init__(self):
+        # departure / arrival are derived in tables()
+        self._itineraries = {column: [] for column in ITINERARY_COLUMNS if column not in ("departure", "arrival")}
+        self._segments = {column: [] for column in SEGMENT_COLUMNS}
+        self._next_id = 0
+
+    def add_flights(self, flights, leg="outbound", search_date=None, parent_id=None):
+        """Adds a list of flights; returns their itinerary ids."""
+        ids = []
+        it = self._itineraries
+        seg = self._segments
+
+        for rank, flight in enumerate(flights):
+            itinerary_id = self._next_id
+            self._next_id += 1
+            ids.append(itinerary_id)
+
+            segments = flight.get('segments') or []
+            airlines = flight.get('airline') or []
+
+            it["itinerary_id"].append(itinerary_id)
+            it["parent_id"].append(parent_id)
+            it["leg"].append(leg)
+            it["search_date"].append(search_date)
+            it["rank"].append(rank)
+            it["price"].append(flight.get('price'))
+            it["duration"].append(flight.get('duration'))
+            it["stops"].append(flight.get('stops'))
+            it["num_segments"].append(len(segments))
+            it["airline"].append(airlines[0].get('airlineName') if airlines else None)
+            it["departure_date"].append(flight.get('departureDate'))
+            it["departure_time"].append(flight.get('departureTime'))
+            it["arrival_date"].append(flight.get('arrivalDate'))
+            it["arrival_time"].append(flight.get('arrivalTime'))
+            it["returning_token"].append(flight.get('returningToken'))
+
+            for seq, segment in enumerate(segments):
+                airline = segment.get('airline') or {}
+                seg["itinerary_id"].append(itinerary_id)
+                seg["seq"].append(seq)
+                # As the API sends it (see manifest.flight_key)
+                seg["flight_id"].append(segment.get('flightId', ''))
+                seg["airline_code"].append(airline.get('airlineCode'))
+                seg["airline_name"].append(airline.get('airlineName'))
+                seg["flight_number"].append(airline.get('flightNumber'))
+                seg["departure_airport"].append(segment.get('departureAirportCode'))
+                seg["arrival_airport"].append(segment.get('arrivalAirportCode'))
+                seg["departure"].append(_join_datetime(segment.get('departureDate'), segment.get('departureTime')))
+                seg["arrival"].append(_join_datetime(segment.get('arrivalDate'), segment.get('arrivalTime')))
+                seg["arrival_time"].append(segment.get('arrivalTime'))
+
+        return ids
+
+    def add_response(self, data, leg="outbound", search_date=None, parent_id=None):
+        """Adds a whole API response page (topFlights + otherFlights)."""
+        if not isinstance(data, dict):
+            return []
+        flights = (data.get('topFlights') or []) + (data.get('otherFlights') or [])
+        return self.add_flights(flights, leg, search_date, parent_id)
+
+    def tables(self):
+        """Returns (itineraries, segments) as typed DataFrames."""
+        itineraries = pd.DataFrame(self._itineraries)
+        itineraries = itineraries.astype({
+            "itinerary_id": "int64",
+            "parent_id": "Int64",
+            "rank": "int64",
+            "price": "Int64",
+            "duration": "Int64",
+            "stops": "Int64",
+            "num_segments": "int64",
+            "leg": "category",
+            "airline": "category",
+        })
+        itineraries["departure"] = pd.to_datetime(
+            itineraries["departure_date"] + " " + itineraries["departure_time"], errors="coerce")
+        itineraries["arrival"] = pd.to_datetime(
+            itineraries["arrival_date"] + " " + itineraries["arrival_time"], errors="coerce")
+        itineraries = itineraries[ITINERARY_COLUMNS]
+
+        segments = pd.DataFrame(self._segments, columns=SEGMENT_COLUMNS)
+        segments = segments.astype({
+            "itinerary_id": "int64",
+            "seq": "int64",
+            "airline_code": "category",
+            "airline_name": "category",
+            "departure_airport": "category",
+            "arrival_airport": "category",
+        })
+        segments["departure"] = pd.to_datetime(segments["departure"], errors="coerce")
+        segments["arrival"] = pd.to_datetime(segments["arrival"], errors="coerce")
+
+        return itineraries, segments
+
+    def entry_rows(self):
+        """
+        The result rows of everything added, grouped by outgoing flight:
+        {outgoing itinerary_id: [rows]} in the order the outgoing flights
+        were added, the same rows as entry_view's (plus the helper fields,
+        as build_entry_row). Read straight off the column lists: a date
+        pair has a few dozen rows, too few to pay for building DataFrames.
+        """
+        it = self._itineraries
+        segments = {}
+        for i, itinerary_id in enumerate(self._segments["itinerary_id"]):
+            segments.setdefault(itinerary_id, []).append(i)
+
+        outgoing = {}
+        rows = {}
+        for i, itinerary_id in enumerate(it["itinerary_id"]):
+            if it["leg"][i] == "outbound":
+                outgoing[itinerary_id] = i
+                rows[itinerary_id] = []
+        for i, parent_id in enumerate(it["parent_id"]):
+            if it["leg"][i] == "return" and parent_id in outgoing:
+                rows[parent_id].append(self._entry_row(outgoing[parent_id], i, segments))
+
+        for parent_id, parent_rows in rows.items():
+            if not parent_rows:
+                parent_rows.append(self._entry_row(outgoing[parent_id], None, segments))
+        return rows
+
+    def _entry_row(self, out, ret, segments):
+        # One row of entry_view: outgoing itinerary index `out`, return itinerary index `ret` (None: no return flight)
+        it = self._itineraries
+        seg = self._segments
+        out_segments = segments.get(it["itinerary_id"][out], [])
+        first = out_segments[0] if out_segments else None
+
+        row = {
+            "Price": it["price"][out],
+            "Departure Date Outgoing": it["departure_date"][out],
+            "Departure Time Outgoing": it["departure_time"][out],
+            "Airline Outgoing": it["airline"][out],
+            "Flight ID Outgoing": seg["flight_id"][first] if first is not None else None,
+            "Flight No Outgoing:": _concat(seg["airline_code"][first], seg["flight_number"][first]) if first is not None else None,
+            "Duration Mins.": it["duration"][out],
+            "Duration": _duration_text(it["duration"][out]),
+            "Stops": "",
+            "Departure Time Return": it["search_date"][out],
+            "Arrival Time Return": "",
+            "Flight ID": "",
+            "Flight No:": "",
+            "Airline": "",
+            "Arrival Airport Code": "",
+            "Arrival Time": "",
+        }
+        durations = [it["duration"][out]]
+        stops = [it["stops"][out]]
+
+        if ret is not None:
+            ret_segments = segments.get(it["itinerary_id"][ret], [])
+            row.update({
+                "Price": it["price"][ret],
+                "Duration Mins.": it["duration"][ret],
+                "Duration": _duration_text(it["duration"][ret]),
+                "Stops": it["stops"][ret],
+                "Departure Time Return": _concat(it["departure_date"][ret], " ", it["departure_time"][ret]),
+                "Arrival Time Return": _concat(it["arrival_date"][ret], " ", it["arrival_time"][ret]),
+                "Flight ID": "".join(f"{seg['flight_id'][i]}\n" for i in ret_segments),
+                "Flight No:": "".join(f"{seg['airline_code'][i]}{seg['flight_number'][i]}\n" for i in ret_segments),
+                "Airline": "".join(f"{seg['airline_name'][i]}\n" for i in ret_segments),
+                "Arrival Airport Code": "".join(f"{seg['arrival_airport'][i]}\n" for i in ret_segments),
+                "Arrival Time": "".join(f"{seg['arrival_time'][i]}\n" for i in ret_segments),
+            })
+            durations.append(it["duration"][ret])
+            stops.append(it["stops"][ret])
+
+        # manifest.flight_key of the outgoing flight
+        row[OUTGOING_KEY] = (
+            "-".join(str(seg["flight_id"][i]) for i in out_segments)
+            + f"@{it['departure_date'][out] or ''} {it['departure_time'][out] or ''}"
+        )
+        row[TOTAL_DURATION] = sum(int(d) for d in durations) if None not in durations else None
+        row[TOTAL_STOPS] = sum(int(s) for s in stops) if None not in stops else None
+        return row
+
+
+def _concat(*parts):
+    # None if a part is missing (like the NA of entry_view's string columns)
+    return None if None in parts else "".join(str(part) for part in parts)
+
+
+def _duration_text(minutes):
+    return f"{int(minutes) // 60}h {int(minutes) % 60}m" if minutes is not None else ""
+
+
+def _join_datetime(date, time):
+    if not date or not time:
+        return None
+    return f"{date} {time}"
+
+
+def normalize_response(data, leg="outbound", search_date=None):
+    """Normalizes a single API response page into (itineraries, segments)."""
+    results = NormalizedResults()
+    results.add_response(data, leg, search_date)
+    return results.tables()
+
+
+def normalize_roundtrip(flight_outgoing, flights_return, returnDateStr):
+    """One outgoing flight and its return flights as a NormalizedResults."""
+    results = NormalizedResults()
+    parent_id, = results.add_flights([flight_outgoing], "outbound", returnDateStr)
+    results.add_flights(flights_return, "return", returnDateStr, parent_id)
+    return results
+
+
+#########################################
+#              entry_view               #
+#########################################
+
+def entry_view(itineraries, segments):
+    """
+    Rebuilds the add_entry_table / build_entry_row table (ENTRY_COLUMNS)
+    from normalized tables: one row per return itinerary joined with its
+    outgoing itinerary, plus one row for every outgoing itinerary without
+    any return flights (search_date is used as the return date).
+    """
+    outbound = itineraries[itineraries["leg"] == "outbound"]
+    returns = itineraries[itineraries["leg"] == "return"]
+    outbound_ids = outbound["itinerary_id"]
+
+    # Outgoing flight details (first segment only, as in add_entry_table)
+    first_segments = segments[segments["seq"] == 0].set_index("itinerary_id")
+    outgoing = pd.DataFrame({
+        "parent_id": outbound_ids.values,
+        "Departure Date Outgoing": outbound["departure_date"].values,
+        "Departure Time Outgoing": outbound["departure_time"].values,
+        "Airline Outgoing": outbound["airline"].astype(object).values,
+        "Flight ID Outgoing": first_segments["flight_id"].reindex(outbound_ids).values,
+        "Flight No Outgoing:": (
+            first_segments["airline_code"].astype(object) + first_segments["flight_number"]
+        ).reindex(outbound_ids).values,
+        "outgoing_price": outbound["price"].values,
+        "outgoing_duration": outbound["duration"].values,
+        "search_date": outbound["search_date"].values,
+    })
+
+    # "\n"-joined segment strings per return itinerary
+    seg = segments[segments["itinerary_id"].isin(returns["itinerary_id"])]
+    joined = pd.DataFrame({
+        "itinerary_id": seg["itinerary_id"],
+        "Arrival Airport Code": seg["arrival_airport"].astype(str) + "\n",
+        "Arrival Time": seg["arrival_time"].astype(str) + "\n",
+        "Flight No:": seg["airline_code"].astype(str) + seg["flight_number"].astype(str) + "\n",
+        "Flight ID": seg["flight_id"].astype(str) + "\n",
+        "Airline": seg["airline_name"].astype(str) + "\n",
+    }).groupby("itinerary_id", sort=False).agg("".join)
+
+    ret = returns.join(joined, on="itinerary_id").merge(outgoing, on="parent_id", how="inner")
+    with_returns = pd.DataFrame({
+        "Price": ret["price"],
+        "Departure Date Outgoing": ret["Departure Date Outgoing"],
+        "Departure Time Outgoing": ret["Departure Time Outgoing"],
+        "Airline Outgoing": ret["Airline Outgoing"],
+        "Flight ID Outgoing": ret["Flight ID Outgoing"],
+        "Flight No Outgoing:": ret["Flight No Outgoing:"],
+        "Duration Mins.": ret["duration"],
+        "Duration": _format_duration(ret["duration"]),
+        "Stops": ret["stops"],
+        "Departure Time Return": ret["departure_date"] + " " + ret["departure_time"],
+        "Arrival Time Return": ret["arrival_date"] + " " + ret["arrival_time"],
+        "Flight ID": ret["Flight ID"].fillna(""),
+        "Flight No:": ret["Flight No:"].fillna(""),
+        "Airline": ret["Airline"].fillna(""),
+        "Arrival Airport Code": ret["Arrival Airport Code"].fillna(""),
+        "Arrival Time": ret["Arrival Time"].fillna(""),
+        "_parent": ret["parent_id"],
+        "_child": ret["itinerary_id"],
+    })
+
+    lonely = outgoing[~outgoing["parent_id"].isin(returns["parent_id"])]
+    without_returns = pd.DataFrame({
+        "Price": lonely["outgoing_price"],
+        "Departure Date Outgoing": lonely["Departure Date Outgoing"],
+        "Departure Time Outgoing": lonely["Departure Time Outgoing"],
+        "Airline Outgoing": lonely["Airline Outgoing"],
+        "Flight ID Outgoing": lonely["Flight ID Outgoing"],
+        "Flight No Outgoing:": lonely["Flight No Outgoing:"],
+        "Duration Mins.": lonely["outgoing_duration"],
+        "Duration": _format_duration(lonely["outgoing_duration"]),
+        "Stops": "",
+        "Departure Time Return": lonely["search_date"],
+        "Arrival Time Return": "",
+        "Flight ID": "",
+        "Flight No:": "",
+        "Airline": "",
+        "Arrival Airport Code": "",
+        "Arrival Time": "",
+        "_parent": lonely["parent_id"],
+        "_child": -1,
+    })
+
+    parts = [part for part in (with_returns, without_returns) if not part.empty]
+    view = pd.concat(parts, ignore_index=True) if parts else with_returns
+    view = view.sort_values(["_parent", "_child"], kind="stable").drop(columns=["_parent", "_child"])
+    return view[ENTRY_COLUMNS].reset_index(drop=True)
+
+
+def _format_duration(minutes):
+    # "10h 5m"; "" when the API sent no duration
+    minutes = minutes.astype("Int64")
+    text = (minutes // 60).astype(str) + "h " + (minutes % 60).astype(str) + "m"
+    return text.where(minutes.notna(), "")
@@ -0,0 +1,359 @@
+import heapq
+import threading
+from collections import deque
+from datetime import datetime
+
+from sweep import iter_date_pairs, coarse_pairs, pair_cell
+
+
+# Assumed round-trip time of one API call when estimating durations (seconds)
+DEFAULT_LATENCY = 1.5
+# get_request sleeps 0.3–0.8 s after each call when no rate limiter is configured
+UNTHROTTLED_DELAY = 0.55
+
+
+#########################################
+#              CallBudget               #
+#########################################
+
+class CallBudget:
+    """
+    Hard cap on the API calls of one search, shared by its workers.
+    Only network requests are charged (every attempt, retries included);
+    cache hits are free.
+
+    Work handed out but not finished yet can reserve its estimated calls
+    (reserve / release), so `available` doesn't count them twice: calls
+    charged through for_key(key) draw that key's reservation down.
+    """
+
+    def __init__(self, limit):
+        self.limit = int(limit)
+        self.used = 0
+        self.reserved = {}
+        self._lock = threading.Lock()
+        self._exhausted_logged = False
+
+    def spend(self, key=None):
+        """Charges one call. False (nothing charged) once the budget is used up."""
+        with self._lock:
+            if self.used >= self.limit:
+                return False
+            self.used += 1
+            if self.reserved.get(key):
+                self.reserved[key] -= 1
+            return True
+
+    def reserve(self, key, calls):
+        with self._lock:
+            self.reserved[key] = calls
+
+    def release(self, key):
+        """Drops what is left of a finished unit's reservation."""
+        with self._lock:
+            self.reserved.pop(key, None)
+
+    def for_key(self, key):
+        """The budget as seen by the calls of one unit (charged against its reservation)."""
+        return _KeyedBudget(self, key)
+
+    def log_exhausted(self):
+        """True the first time it's called: lets callers report the cut-off once, not per request."""
+        with self._lock:
+            first = not self._exhausted_logged
+            self._exhausted_logged = True
+            return first
+
+    @property
+    def remaining(self):
+        return max(0, self.limit - self.used)
+
+    @property
+    def available(self):
+        """Calls left that no unfinished unit has reserved."""
+        with self._lock:
+            return max(0, self.limit - self.used - sum(self.reserved.values()))
+
+
+class _KeyedBudget:
+    __slots__ = ("budget", "key")
+
+    def __init__(self, budget, key):
+        self.budget = budget
+        self.key = key
+
+    def spend(self):
+        return self.budget.spend(self.key)
+
+    def log_exhausted(self):
+        return self.budget.log_exhausted()
+
+    @property
+    def limit(self):
+        return self.budget.limit
+
+
+#########################################
+#           PriorityScheduler           #
+#########################################
+
+class PriorityScheduler:
+    """
+    Hands out date pairs highest value first instead of in date order, so a
+    limited call budget goes where cheap fares are most likely:
+
+      1. pairs in the neighbourhood (±radius days of departure and trip
+         length) of a cell with a known price within maxPrice, cheapest
+         neighbourhood first – known from the price store or from cells
+         finished earlier in this run (observe())
+      2. unexplored pairs of the coarse sweep grid, so the rest of the
+         budget covers the whole window evenly
+      3. other unexplored pairs, in date order
+      4. pairs whose known neighbours are all over maxPrice or empty
+
+    Iteration stops once the budget can't pay for another pair (pair_cost
+    calls): every pair handed out reserves pair_cost calls until finish(pair),
+    so pairs pulled ahead of time (lookahead) are paid for before more follow.
+    cut_off is set when it stopped for the budget.
+    """
+
+    def __init__(self, pairs, minDurationDays, maxPrice, known_prices=None, budget=None, pair_cost=1, step=3):
+        self.pairs = list(pairs)
+        self.maxPrice = float(maxPrice)
+        self.budget = budget
+        self.pair_cost = pair_cost
+        self.radius = max(1, step - 1)
+        self.cut_off = False
+        self._open = deque()  # pairs handed out and not finished, in order
+
+        first = datetime.strptime(min(pair[0] for pair in self.pairs), "%Y-%m-%d") if self.pairs else None
+        self._cells = {pair: pair_cell(pair, first, minDurationDays) for pair in self.pairs}
+        self._by_cell = {cell: pair for pair, cell in self._cells.items()}
+        self._order = {pair: index for index, pair in enumerate(self.pairs)}
+        self._coarse = set(coarse_pairs(sorted(self.pairs), minDurationDays, step)) if self.pairs else set()
+
+        # Known cheapest price per cell; None = searched, nothing found
+        self._prices = {}
+        if self.pairs:
+            for pair, price in (known_prices or {}).items():
+                self._prices[pair_cell(pair, first, minDurationDays)] = price
+
+        self._yielded = set()
+        self._score = {pair: self._compute(pair) for pair in self.pairs}
+        self._heap = [(score, pair) for pair, score in self._score.items()]
+        heapq.heapify(self._heap)
+
+    def _neighbours(self, cell):
+        i, j = cell
+        for di in range(-self.radius, self.radius + 1):
+            for dj in range(-self.radius, self.radius + 1):
+                yield i + di, j + dj
+
+    def _compute(self, pair):
+        known = [self._prices[cell] for cell in self._neighbours(self._cells[pair]) if cell in self._prices]
+        cheap = [price for price in known if price is not None and price <= self.maxPrice]
+        index = self._order[pair]
+        if cheap:
+            return (0, min(cheap), index)
+        if known:
+            return (3, 0, index)
+        return (1 if pair in self._coarse else 2, 0, index)
+
+    def observe(self, pair, price):
+        """Records the cheapest price found for a finished pair (None = no flights)."""
+        cell = self._cells.get(pair)
+        if cell is None:
+            return
+        old = self._prices.get(cell)
+        if price is None and cell in self._prices:
+            return
+        if old is not None and price is not None and old <= price:
+            return
+        self._prices[cell] = price
+
+        # Only the neighbours' scores can change
+        for neighbour in self._neighbours(cell):
+            other = self._by_cell.get(neighbour)
+            if other is None or other in self._yielded:
+                continue
+            score = self._compute(other)
+            if score != self._score[other]:
+                self._score[other] = score
+                heapq.heappush(self._heap, (score, other))
+
+    def finish(self, pair):
+        """
+        A handed-out pair is done: frees the rest of its reservation. Pairs
+        finish in the order they were handed out, so the pairs before it that
+        never finished (failed requests) are released too.
+        """
+        if self.budget is None or pair not in self._open:
+            return
+        while self._open:
+            handed_out = self._open.popleft()
+            self.budget.release(handed_out)
+            if handed_out == pair:
+                break
+
+    def __iter__(self):
+        while self._heap:
+            score, pair = heapq.heappop(self._heap)
+            if pair in self._yielded or score != self._score[pair]:
+                continue
+            if self.budget is not None:
+                if self.budget.available < self.pair_cost:
+                    self.cut_off = True
+                    return
+                self.budget.reserve(pair, self.pair_cost)
+                self._open.append(pair)
+            self._yielded.add(pair)
+            yield pair
+
+    def __len__(self):
+        return len(self.pairs)
+
+
+def select_oneway_pairs(pairs, scheduler_order, departureId, arrivalId, budget):
+    """
+    One-way searches fetch each leg once, shared by many pairs: takes pairs
+    in priority order while the distinct legs they need fit the budget.
+    Returned in date order (the one-way engine groups pairs by departure date).
+    """
+    legs = set()
+    selected = []
+    for pair in scheduler_order:
+        needed = {(departureId, arrivalId, pair[0]), (arrivalId, departureId, pair[1])} - legs
+        if len(legs) + len(needed) > budget.remaining:
+            continue
+        legs |= needed
+        selected.append(pair)
+    order = {pair: index for index, pair in enumerate(pairs)}
+    return sorted(selected, key=order.get)
+
+
+#########################################
+#             plan_search               #
+#########################################
+
+def estimate_duration(calls, maxWorkers=1, rate_config=None, latency=DEFAULT_LATENCY):
+    """
+    Seconds `calls` API calls take on maxWorkers workers: bounded by the
+    workers' round trips and, when configured, by the rate limit.
+    """
+    maxWorkers = max(1, int(maxWorkers or 1))
+    if rate_config and rate_config.get("enabled", True):
+        rate = rate_config.get("requests_per_second", 5)
+        return max(calls / rate, calls * latency / maxWorkers)
+    return calls * (latency + UNTHROTTLED_DELAY) / maxWorkers
+
+
+def plan_search(kwargs, config, latency=DEFAULT_LATENCY):
+    """
+    Enumerates the work units of a search (run_flight_search keyword
+    arguments) without calling the API or importing pandas, and estimates
+    its API calls and duration.
+
+    Outbound searches already in the response cache are free; for those the
+    actual number of outgoing flights (and cached return searches) is known,
+    otherwise every pair is assumed to need maxFlights return searches, so
+    the total is an upper bound. Returns a dict:
+        pairs, pairs_searched  – date pairs in the grid / in this run
+        units                  – [{"kind", "pair" or "leg", "calls"}, ...]
+        calls, calls_max       – estimated / worst-case network calls
+        cached                 – units served from the cache
+        duration_s             – estimated duration of the calls
+        quota_remaining        – remaining quota of the API key pool (if any)
+    """
+    from cache import setup_response_cache
+    from utilities import outgoing_request_path, parse_airports
+    from decode import FLIGHT_LISTS
+
+    pairs = list(iter_date_pairs(
+        kwargs["departureDateStart"], kwargs["departureDateEnd"],
+        kwargs["minDurationDays"], kwargs["maxDurationDays"]
+    ))
+    searched = coarse_pairs(pairs, kwargs["minDurationDays"]) if kwargs.get("sweep") == "smart" else pairs
+    maxFlights = int(kwargs["maxFlights"])
+    base_url = config["api"]["base_url"]
+    cache = setup_response_cache(config.get("cache"))
+
+    def cached(path, retTok=None):
+        # peek: planning must not count as cache hits / misses or refresh LRU order
+        return cache.peek(base_url, path, retTok) if cache is not None else None
+
+    units = []
+    if kwargs.get("isRoundtrip", True):
+        return_path = lambda returnDateStr: (
+            f"/flights/roundtrip-returning?"
+            f"arrivalDate={returnDateStr}&adults={kwargs['adults']}"
+            f"&stops=0&maxPrice={kwargs['maxPrice']}&flightDuration={kwargs['maxDuration']}"
+        )
+        for departureDateStr, returnDateStr in searched:
+            data = cached(outgoing_request_path(
+                kwargs["departureId"], kwargs["arrivalId"], departureDateStr, returnDateStr,
+                kwargs["maxDuration"], kwargs["maxPrice"], True
+            ))
+            units.append({"kind": "outbound", "pair": (departureDateStr, returnDateStr), "calls": 0 if data else 1})
+            if not data:
+                units += [{"kind": "return", "pair": (departureDateStr, returnDateStr), "calls": 1}] * maxFlights
+                continue
+
+            flights = [flight for key in FLIGHT_LISTS for flight in (data.get(key) or [])][:maxFlights]
+            for flight in flights:
+                known = cached(return_path(returnDateStr), flight.get("returningToken"))
+                units.append({"kind": "return", "pair": (departureDateStr, returnDateStr), "calls": 0 if known else 1})
+        calls_max = len(searched) * (1 + maxFlights)
+    else:
+        # Comma-separated airports: a multi-airport search (see multi.py) fetches the same legs
+        origins = parse_airports(kwargs["departureId"])
+        destinations = parse_airports(kwargs["arrivalId"])
+        legs = sorted({(origin, destination, dep) for origin in origins for destination in destinations for dep, _ in searched}
+                      | {(destination, origin, ret) for origin in origins for destination in destinations for _, ret in searched})
+        for origin, destination, date in legs:
+            data = cached(outgoing_request_path(origin, destination, date, date, kwargs["maxDuration"], kwargs["maxPrice"], False))
+            units.append({"kind": "leg", "leg": (origin, destination, date), "calls": 0 if data else 1})
+        calls_max = len(legs)
+
+    calls = sum(unit["calls"] for unit in units)
+    maxWorkers = kwargs.get("maxWorkers") or config.get("search", {}).get("max_workers", 1)
+    plan = {
+        "pairs": len(pairs),
+        "pairs_searched": len(searched),
+        "units": units,
+        "calls": calls,
+        "calls_max": calls_max,
+        "cached": sum(unit["calls"] == 0 for unit in units),
+        "duration_s": estimate_duration(calls, maxWorkers, config.get("rate_limit"), latency),
+        "quota_remaining": None,
+    }
+
+    keys = config["api"].get("keys")
+    if keys:
+        from keypool import setup_key_pool
+        usage = setup_key_pool(config["api"], config.get("key_pool")).usage()
+        remaining = [key["remaining"] for key in usage.values()]
+        if all(value is not None for value in remaining):
+            plan["quota_remaining"] = sum(remaining)
+    return plan
+
+
+def print_plan(plan, kwargs):
+    smart = " (first pass of the smart sweep; refinement adds more)" if kwargs.get("sweep") == "smart" else ""
+    print(f"Date pairs: {plan['pairs_searched']} of {plan['pairs']}{smart}")
+    kinds = {}
+    for unit in plan["units"]:
+        count, calls = kinds.get(unit["kind"], (0, 0))
+        kinds[unit["kind"]] = (count + 1, calls + unit["calls"])
+    for kind, (count, calls) in kinds.items():
+        print(f"  {kind:<9} {count:>6} units, {calls:>6} API calls ({count - calls} cached)")
+    print(f"API calls: about {plan['calls']} (at most {plan['calls_max']})")
+
+    minutes, seconds = divmod(int(round(plan["duration_s"])), 60)
+    print(f"Estimated duration: {minutes}m {seconds:02d}s")
+
+    budget = kwargs.get("maxCalls")
+    if budget is not None and plan["calls"] > budget:
+        print(f"[WARNING] The call budget ({budget}) covers about {budget / plan['calls']:.0%} of the search; "
+              f"the most promising date pairs run first.")
+    if plan["quota_remaining"] is not None and plan["calls"] > plan["quota_remaining"]:
+        print(f"[WARNING] The API keys have only {plan['quota_remaining']} calls of quota left.")
@@ -0,0 +1,172 @@
+import os
+from datetime import datetime
+
+import numpy as np
+
+from sweep import iter_date_pairs
+
+
+def calendar_path(fileName):
+    """Price calendar saved next to a search's CSV: flights.csv → flights.calendar.npz."""
+    root, _ = os.path.splitext(fileName)
+    return root + ".calendar.npz"
+
+
+def _trip_days(departureDateStr, returnDateStr):
+    return (datetime.strptime(returnDateStr[:10], "%Y-%m-%d") - datetime.strptime(departureDateStr[:10], "%Y-%m-%d")).days
+
+
+def _number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return np.nan
+    return value
+
+
+#########################################
+#             PriceCalendar             #
+#########################################
+
+class PriceCalendar:
+    """
+    Departure day × trip length matrix of the cheapest price and the
+    shortest duration found, kept up to date while a search runs.
+
+    add() is O(1): one dict lookup and two comparisons per result row.
+    Cells without results are NaN; count holds the rows seen per cell.
+    """
+
+    def __init__(self, departure_dates, trip_lengths):
+        self.departure_dates = [str(date) for date in departure_dates]
+        self.trip_lengths = [int(length) for length in trip_lengths]
+        self._row = {date: i for i, date in enumerate(self.departure_dates)}
+        self._col = {length: j for j, length in enumerate(self.trip_lengths)}
+        self._cells = {}  # (departureDate, returnDate) → (i, j), or False outside the grid
+
+        shape = (len(self.departure_dates), len(self.trip_lengths))
+        self.min_price = np.full(shape, np.nan)
+        self.min_duration = np.full(shape, np.nan)
+        self.count = np.zeros(shape, dtype=np.int64)
+
+    @classmethod
+    def for_search(cls, departureDateStart, departureDateEnd, minDurationDays, maxDurationDays):
+        """Empty calendar over the date grid of a search (see iter_date_pairs)."""
+        pairs = list(iter_date_pairs(departureDateStart, departureDateEnd, minDurationDays, maxDurationDays))
+        return cls(
+            sorted({departureDateStr for departureDateStr, _ in pairs}),
+            sorted({_trip_days(*pair) for pair in pairs})
+        )
+
+    # ---------------------------------------------------
+    # Updates
+    # ---------------------------------------------------
+    def add(self, departureDateStr, returnDateStr, price, duration=None):
+        """Records one result; results outside the grid are ignored."""
+        cell = self._cells.get((departureDateStr, returnDateStr))
+        if cell is None:
+            i = self._row.get(departureDateStr)
+            j = self._col.get(_trip_days(departureDateStr, returnDateStr))
+            cell = self._cells[(departureDateStr, returnDateStr)] = (i, j) if i is not None and j is not None else False
+        if not cell:
+            return False
+
+        self.count[cell] += 1
+        # Missing values (None / NaN) never replace a value; the first one fills an empty (NaN) cell
+        price = np.nan if price is None else price
+        duration = np.nan if duration is None else duration
+        if price == price and not price >= self.min_price[cell]:
+            self.min_price[cell] = price
+        if duration == duration and not duration >= self.min_duration[cell]:
+            self.min_duration[cell] = duration
+        return True
+
+    def add_row(self, row, pair=None):
+        """
+        Records a result row (dict keyed by ENTRY_COLUMNS). pair is its
+        (departureDate, returnDate); taken from the row when not given.
+        """
+        if pair is None:
+            pair = (str(row.get("Departure Date Outgoing", "")), str(row.get("Departure Time Return", ""))[:10])
+        try:
+            self.add(pair[0], pair[1], _number(row.get("Price")), _number(row.get("Duration Mins.")))
+        except ValueError:
+            # Row without a usable date
+            pass
+
+    def add_rows(self, rows, pair=None):
+        for row in rows:
+            self.add_row(row, pair)
+
+    def add_dataframe(self, df):
+        """Vectorised add_row over a result DataFrame (e.g. rows of a resumed search)."""
+        if df.empty:
+            return
+        import pandas as pd
+
+        departure = pd.to_datetime(df["Departure Date Outgoing"].astype(str).str[:10], errors="coerce")
+        returning = pd.to_datetime(df["Departure Time Return"].astype(str).str[:10], errors="coerce")
+        rows = departure.dt.strftime("%Y-%m-%d").map(self._row)
+        cols = (returning - departure).dt.days.map(self._col)
+
+        keep = rows.notna() & cols.notna()
+        i = rows[keep].astype(int).to_numpy()
+        j = cols[keep].astype(int).to_numpy()
+        np.add.at(self.count, (i, j), 1)
+        np.fmin.at(self.min_price, (i, j), pd.to_numeric(df.loc[keep, "Price"], errors="coerce").to_numpy(dtype=float))
+        np.fmin.at(self.min_duration, (i, j), pd.to_numeric(df.loc[keep, "Duration Mins."], errors="coerce").to_numpy(dtype=float))
+
+    # ---------------------------------------------------
+    # Views
+    # ---------------------------------------------------
+    def to_frame(self, values="min_price"):
+        """DataFrame of one matrix: departure dates as index, trip lengths as columns."""
+        import pandas as pd
+        return pd.DataFrame(getattr(self, values), index=self.departure_dates, columns=self.trip_lengths)
+
+    def to_records(self):
+        """Long form, one dict per cell with results (for charts)."""
+        i, j = np.nonzero(self.count)
+        return [
+            {
+                "Departure": self.departure_dates[a],
+                "Trip days": self.trip_lengths[b],
+                "Min price": None if np.isnan(self.min_price[a, b]) else float(self.min_price[a, b]),
+                "Min duration": None if np.isnan(self.min_duration[a, b]) else float(self.min_duration[a, b]),
+                "Flights": int(self.count[a, b]),
+            }
+            for a, b in zip(i, j)
+        ]
+
+    def cheapest(self, n=5):
+        """The n cheapest cells as (departure date, trip days, price), cheapest first."""
+        flat = self.min_price.ravel()
+        order = np.argsort(np.where(np.isnan(flat), np.inf, flat), kind="stable")[:n]
+        width = len(self.trip_lengths)
+        return [
+            (self.departure_dates[index // width], self.trip_lengths[index % width], float(flat[index]))
+            for index in order if not np.isnan(flat[index])
+        ]
+
+    # ---------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------
+    def save(self, path):
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                departure_dates=np.array(self.departure_dates),
+                trip_lengths=np.array(self.trip_lengths, dtype=np.int64),
+                min_price=self.min_price,
+                min_duration=self.min_duration,
+                count=self.count,
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            calendar = cls(data["departure_dates"].tolist(), data["trip_lengths"].tolist())
+            calendar.min_price = data["min_price"]
+            calendar.min_duration = data["min_duration"]
+            calendar.count = data["count"]
+        return calendar
@@ -0,0 +1,210 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+#########################################
+#              TokenBucket              #
+#########################################
+
+class TokenBucket:
+    """
+    Adaptive token-bucket rate limiter shared by all API calls.
+
+    - acquire() / acquire_async() take one token, waiting until it is available.
+      Tokens are reserved under a lock, so concurrent callers (threads or
+      asyncio tasks) are served in order and never exceed `rate` on average.
+    - on_success() slowly raises the rate back towards max_rate (additive increase).
+    - on_throttle() halves the rate on a 429 (multiplicative decrease) and
+      pauses everyone for the Retry-After period.
+    - Both read the x-ratelimit-*-remaining / -reset headers and pause until
+      the reset when the quota window is used up.
+    """
+
+    def __init__(self, rate=5.0, capacity=None, min_rate=0.2, increase=0.1, decrease=0.5, max_pause=300):
+        self.max_rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.max_pause = max_pause
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+
+        self._lock = threading.Lock()
+        self._rate = self.max_rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+        self.throttled = 0
+
+    @property
+    def rate(self):
+        return self._rate
+
+    # ---------------------------------------------------
+    # Acquire
+    # ---------------------------------------------------
+    def _reserve(self):
+        """Takes a token and returns how long the caller has to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+
+            # Tokens may go negative: each caller reserves its slot in the queue
+            self._tokens -= 1
+            wait = max(0.0, self._blocked_until - now)
+            if self._tokens < 0:
+                wait = max(wait, -self._tokens / self._rate)
+            return wait
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        import asyncio
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    # ---------------------------------------------------
+    # Feedback from responses
+    # ---------------------------------------------------
+    def _pause(self, seconds):
+        seconds = min(max(0.0, seconds), self.max_pause)
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        return seconds
+
+    def on_success(self, headers=None):
+        with self._lock:
+            self._rate = min(self.max_rate, self._rate + self.increase)
+        self.update_from_headers(headers)
+
+    def on_throttle(self, headers=None):
+        """Called on HTTP 429. Returns the pause (seconds) applied to all callers."""
+        with self._lock:
+            self._rate = max(self.min_rate, self._rate * self.decrease)
+            self._tokens = min(self._tokens, 0.0)
+            self.throttled += 1
+
+        retry_after = parse_retry_after(headers)
+        if retry_after is None:
+            retry_after = 1.0 / self._rate
+
+        return max(self._pause(retry_after), self.update_from_headers(headers))
+
+    def update_from_headers(self, headers):
+        """Pauses until the quota window resets when the remaining count hits 0."""
+        if not headers:
+            return 0.0
+
+        for name, value in headers.items():
+            name = name.lower()
+            if not (name.startswith("x-ratelimit") and name.endswith("remaining")):
+                continue
+            try:
+                remaining = int(value)
+            except (TypeError, ValueError):
+                continue
+            if remaining > 0:
+                continue
+
+            reset = headers.get(name[:-len("remaining")] + "reset")
+            try:
+                reset = float(reset)
+            except (TypeError, ValueError):
+                reset = 1.0
+            print(f"[WARNING] Rate limit quota exhausted ({name}). Pausing {min(reset, self.max_pause):.0f}s.")
+            return self._pause(reset)
+
+        return 0.0
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    TokenBucket whose state lives in shared memory so that worker processes
+    of a process pool draw from one global budget. Create it in the parent
+    and hand it to the workers through the pool initializer.
+    """
+
+    _rate = property(lambda self: self._state[0], lambda self, v: self._state.__setitem__(0, v))
+    _tokens = property(lambda self: self._state[1], lambda self, v: self._state.__setitem__(1, v))
+    _updated = property(lambda self: self._state[2], lambda self, v: self._state.__setitem__(2, v))
+    _blocked_until = property(lambda self: self._state[3], lambda self, v: self._state.__setitem__(3, v))
+
+    def __init__(self, *args, mp_context=None, **kwargs):
+        import multiprocessing
+        ctx = mp_context or multiprocessing
+        self._state = ctx.Array('d', 4, lock=False)
+        super().__init__(*args, **kwargs)
+        self._lock = ctx.Lock()
+
+
+def parse_retry_after(headers):
+    """Returns the Retry-After header in seconds (delta or HTTP date), or None."""
+    if not headers:
+        return None
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+#########################################
+#          setup_rate_limiter           #
+#########################################
+
+_rate_limiter = None
+_rate_limiter_config = None
+
+
+def setup_rate_limiter(rate_config):
+    """
+    Configures the process-wide limiter used by get_request from the
+    'rate_limit' section of config.json. Without it, get_request keeps the
+    old fixed random delay between calls.
+    """
+    global _rate_limiter, _rate_limiter_config
+
+    if rate_config == _rate_limiter_config and (_rate_limiter is not None or not rate_config):
+        return _rate_limiter
+
+    _rate_limiter_config = rate_config
+    _rate_limiter = rate_limiter_from_config(rate_config)
+    return _rate_limiter
+
+
+def rate_limiter_from_config(rate_config, cls=TokenBucket):
+    """Builds a limiter of type cls from a 'rate_limit' config section (None if disabled)."""
+    if not rate_config or not rate_config.get("enabled", True):
+        return None
+    return cls(
+        rate=rate_config.get("requests_per_second", 5),
+        capacity=rate_config.get("burst"),
+        min_rate=rate_config.get("min_requests_per_second", 0.2),
+        max_pause=rate_config.get("max_pause", 300),
+    )
+
+
+def install_rate_limiter(limiter, rate_config):
+    """Makes an existing limiter (e.g. a SharedTokenBucket) the process-wide one for rate_config."""
+    global _rate_limiter, _rate_limiter_config
+    _rate_limiter = limiter
+    _rate_limiter_config = rate_config
+    return _rate_limiter
+
+
+def get_rate_limiter():
+    return _rate_limiter
@@ -0,0 +1,148 @@
+import csv
+import os
+import pandas as pd
+from utilities import ENTRY_COLUMNS
+
+
+#########################################
+#              ResultSink               #
+#########################################
+
+class ResultSink:
+    """
+    Append-only collector for search result rows.
+
+    Rows are buffered as plain dicts; flush() appends only the rows added
+    since the previous flush to the CSV file, so saving progress costs
+    O(new rows) instead of rewriting the whole table. The DataFrame is
+    built once, on the first to_dataframe() call.
+
+    keep_rows=False only streams rows to disk and keeps nothing in memory.
+    fsync=True also forces every flush to stable storage.
+    append=True continues an existing file (resumed search); its rows are
+    read back once and included in to_dataframe() (only counted with
+    keep_rows=False). row_count includes them either way.
+    """
+
+    def __init__(self, fileName, columns=ENTRY_COLUMNS, keep_rows=True, fsync=False, append=False):
+        self.fileName = fileName
+        self.columns = list(columns)
+        self.keep_rows = keep_rows
+        self.fsync = fsync
+
+        self.rows = []
+        self.row_count = 0
+        self._pending = []
+        self._df = None
+        self._previous = None
+
+        append = append and os.path.exists(fileName) and os.path.getsize(fileName) > 0
+        if append and keep_rows:
+            self._previous = pd.read_csv(fileName)
+            self.row_count = len(self._previous)
+        elif append:
+            # Not kept, but counted: row_count stays the number of rows in the file
+            with open(fileName, newline="", encoding="utf-8") as f:
+                self.row_count = sum(1 for _ in csv.reader(f)) - 1
+
+        self._file = open(fileName, "a" if append else "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction="ignore", lineterminator="\n")
+        if not append:
+            self._writer.writeheader()
+        self._file.flush()
+
+    def add(self, row):
+        self._pending.append(row)
+        if self.keep_rows:
+            self.rows.append(row)
+            self._df = None
+        self.row_count += 1
+
+    def extend(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def flush(self):
+        """Appends the rows added since the last flush to the CSV file."""
+        if not self._pending:
+            return
+        self._writer.writerows(self._pending)
+        self._pending = []
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def to_dataframe(self):
+        if self._df is None:
+            df = pd.DataFrame(self.rows, columns=self.columns)
+            if self._previous is not None:
+                df = pd.concat([self._previous, df], ignore_index=True) if self.rows else self._previous
+            self._df = df
+        return self._df
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+#########################################
+#         result table helpers          #
+#########################################
+
+# Used by app.py on its session-cached results: prepare once, then every
+# filter / sort change runs on the prepared frame without the API.
+
+def minutes_to_hhmm(x):
+    try:
+        minutes = int(x)
+        h = minutes // 60
+        m = minutes % 60
+        return f"{h}h {m}m"
+    except:
+        return x  # keep original if conversion fails
+
+
+def prepare_results(df):
+    """Adds typed / derived columns once, so filtering and sorting are cheap afterwards."""
+    df = df.copy()
+    df["Price"] = pd.to_numeric(df["Price"], errors="coerce")
+    df["Duration Mins."] = pd.to_numeric(df["Duration Mins."], errors="coerce")
+    df["duration_hours"] = df["Duration Mins."].apply(minutes_to_hhmm)
+    df["Stops"] = pd.to_numeric(df["Stops"], errors="coerce").astype("Int64")
+
+    # All airlines of an itinerary (outgoing + every return segment)
+    df["_airlines"] = [
+        frozenset(filter(None, [str(outgoing)] + str(ret).split("\n")))
+        for outgoing, ret in zip(df["Airline Outgoing"].fillna(""), df["Airline"].fillna(""))
+    ]
+
+    # Price calendar cell of each row (departure day, trip length)
+    departure = pd.to_datetime(df["Departure Date Outgoing"].astype(str).str[:10], errors="coerce")
+    returning = pd.to_datetime(df["Departure Time Return"].astype(str).str[:10], errors="coerce")
+    df["_departure"] = departure.dt.strftime("%Y-%m-%d")
+    df["_trip_days"] = (returning - departure).dt.days
+    return df
+
+
+def filter_and_sort(df, max_price, stops, airlines, sort_col, cell=None):
+    mask = df["Price"].le(max_price).fillna(True)
+    if cell is not None:
+        mask &= df["_departure"].eq(cell[0]) & df["_trip_days"].eq(cell[1])
+    if stops:
+        mask &= df["Stops"].isin(stops).fillna(False)
+    if airlines:
+        selected = set(airlines)
+        mask &= df["_airlines"].map(lambda names: not names.isdisjoint(selected))
+
+    result = df[mask]
+    # duration_hours is a display string; sort on the minutes column instead
+    by = "Duration Mins." if sort_col == "duration_hours" else sort_col
+    return result.sort_values(by=by, ascending=True, kind="stable").drop(columns=["_airlines", "_departure", "_trip_days"])
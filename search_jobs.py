@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+# iter_flight_search arguments that don't change a search's results
+# (identical searches differing only in these are coalesced)
+RUNTIME_ARGS = ("maxWorkers", "resume", "fileName", "config")
+
+
+#########################################
+#               SearchJob               #
+#########################################
+
+class SearchJob:
+    """
+    One background run of iter_flight_search.
+
+    status    – queued → running → done / failed
+    row_count – result rows found so far; rows_since() reads them back from
+                the job's CSV (the search appends every batch to it), so a job
+                holds no rows in memory however long it is kept
+    df        – the search's returned DataFrame once done
+    Attributes are updated by the worker thread; read them through snapshot()
+    and rows_since() from other threads.
+    """
+
+    def __init__(self, key, kwargs):
+        self.id = hashlib.sha1(key.encode()).hexdigest()[:12]
+        self.key = key
+        self.kwargs = kwargs
+        self.status = "queued"
+        self.fileName = None
+        self.row_count = 0
+        self._first_row = 0     # CSV row of this run's first result (a resumed CSV starts with older rows)
+        self._checkpoints = []  # (CSV row, byte offset) at batch ends, to seek to instead of re-reading the file
+        self.pairs_done = 0
+        self.pairs_total = None
+        self.df = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.subscribers = 1
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "pairs_done": self.pairs_done,
+                "pairs_total": self.pairs_total,
+                "rows": self.row_count,
+                "subscribers": self.subscribers,
+                "error": self.error,
+                "submitted_at": self.submitted_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+    def rows_since(self, start=0):
+        """
+        Rows added after the first `start` ones (for incremental polling), read
+        from the job's CSV: from the last batch end at or before them, so
+        polling for new rows only parses those.
+        """
+        import pandas as pd
+        from utilities import ENTRY_COLUMNS
+
+        with self._lock:
+            if start >= self.row_count:
+                return []
+            first = self._first_row + start
+            end = self._first_row + self.row_count
+            row, offset = max(
+                (checkpoint for checkpoint in self._checkpoints if checkpoint[0] <= first),
+                default=(0, None)
+            )
+
+        with open(self.fileName, newline="", encoding="utf-8") as f:
+            if offset is None:
+                # Before the first batch end: read from the header
+                df = pd.read_csv(f, nrows=end)
+            else:
+                f.seek(offset)
+                df = pd.read_csv(f, header=None, names=ENTRY_COLUMNS, nrows=end - row)
+        return df.iloc[first - row:].to_dict("records")
+
+    def _run(self, config, fileName, maxWorkers):
+        from main import iter_flight_search
+
+        with self._lock:
+            self.status = "running"
+            self.fileName = fileName
+            self.started_at = time.time()
+        try:
+            search = iter_flight_search(config=config, fileName=fileName, maxWorkers=maxWorkers, **self.kwargs)
+            while True:
+                try:
+                    batch = next(search)
+                except StopIteration as done:
+                    df = done.value
+                    break
+                # The batch's rows are flushed to the CSV before it is yielded
+                offset = os.path.getsize(fileName)
+                with self._lock:
+                    if not self._checkpoints:
+                        self._first_row = batch["rows_total"] - len(batch["rows"])
+                    self.row_count = batch["rows_total"] - self._first_row
+                    self._checkpoints.append((batch["rows_total"], offset))
+                    self.pairs_done = batch["pairs_done"]
+                    self.pairs_total = batch["pairs_total"]
+
+            with self._lock:
+                self.df = df
+                self.finished_at = time.time()
+                self.status = "done"
+        except (Exception, SystemExit) as e:
+            traceback.print_exc()
+            with self._lock:
+                self.error = f"{type(e).__name__}: {e}"
+                self.finished_at = time.time()
+                self.status = "failed"
+
+
+#########################################
+#           SearchJobManager            #
+#########################################
+
+class SearchJobManager:
+    """
+    Runs searches on a shared thread pool, independent of any UI session.
+
+    submit() coalesces identical searches: while a search with the same
+    result-defining parameters is queued or running (or finished less than
+    result_ttl seconds ago), every caller gets that same job instead of a
+    new one, so several users pay for one set of API calls. Callers poll
+    job.snapshot() / job.rows_since() for progress and partial results.
+
+    Each job writes its own CSV / manifest under job_dir, so concurrent
+    searches on the same route don't share files.
+    """
+
+    def __init__(self, config=None, max_concurrent=2, job_dir="search_jobs", result_ttl=900, max_workers=None):
+        self.config = config
+        self.job_dir = job_dir
+        self.result_ttl = result_ttl
+        self.max_workers = max_workers
+
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="search-job")
+        os.makedirs(job_dir, exist_ok=True)
+
+    @staticmethod
+    def key_for(kwargs):
+        params = {name: value for name, value in kwargs.items() if name not in RUNTIME_ARGS}
+        return json.dumps(params, sort_keys=True, default=str)
+
+    def file_name_for(self, kwargs):
+        key = self.key_for(kwargs)
+        trip = "roundtrip" if kwargs.get("isRoundtrip", True) else "oneway"
+        digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+        return os.path.join(self.job_dir, f"{trip}_flights_{kwargs['departureId']}_{kwargs['arrivalId']}_{digest}.csv")
+
+    def _reusable(self, job):
+        if not job.finished:
+            return True
+        return job.status == "done" and time.time() - job.finished_at < self.result_ttl
+
+    def _prune(self):
+        # Finished jobs past result_ttl only hold memory (their rows are in the CSV / store)
+        for key, job in list(self._jobs.items()):
+            if job.finished and time.time() - job.finished_at >= self.result_ttl:
+                del self._jobs[key]
+
+    def submit(self, **kwargs):
+        """
+        Starts iter_flight_search(**kwargs) in the background, or returns the
+        queued / running / recently finished job of an identical search.
+        """
+        key = self.key_for(kwargs)
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(key)
+            if job is not None and self._reusable(job):
+                with job._lock:
+                    job.subscribers += 1
+                return job
+
+            runtime = {name: kwargs.pop(name) for name in RUNTIME_ARGS if name in kwargs}
+            job = SearchJob(key, kwargs)
+            self._jobs[key] = job
+
+        maxWorkers = runtime.get("maxWorkers", self.max_workers)
+        self._pool.submit(job._run, self.config, self.file_name_for(kwargs), maxWorkers)
+        return job
+
+    def find(self, **kwargs):
+        """The reusable job of an identical search, or None."""
+        with self._lock:
+            job = self._jobs.get(self.key_for(kwargs))
+        return job if job is not None and self._reusable(job) else None
+
+    def get(self, job_id):
+        with self._lock:
+            for job in self._jobs.values():
+                if job.id == job_id:
+                    return job
+        return None
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def shutdown(self, wait=False):
+        self._pool.shutdown(wait=wait)
+
+
+#########################################
+#          get_job_manager              #
+#########################################
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager(config=None):
+    """
+    Process-wide SearchJobManager, configured from the 'jobs' section of
+    config.json (max_concurrent, dir, result_ttl) on first use.
+    """
+    global _job_manager
+
+    with _job_manager_lock:
+        if _job_manager is None:
+            if config is None:
+                from utilities import load_config
+                config = load_config()
+            jobs_config = config.get("jobs") or {}
+            _job_manager = SearchJobManager(
+                config=config,
+                max_concurrent=jobs_config.get("max_concurrent", 2),
+                job_dir=jobs_config.get("dir", "search_jobs"),
+                result_ttl=jobs_config.get("result_ttl", 900),
+                max_workers=config.get("search", {}).get("max_workers"),
+            )
+        return _job_manager
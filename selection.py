@@ -0,0 +1,188 @@
+import heapq
+import math
+import threading
+
+import pandas as pd
+
+from utilities import ENTRY_COLUMNS, TOTAL_DURATION, TOTAL_STOPS
+
+
+# Objectives of the Pareto front, all minimised (duration and stops: outbound + return)
+PARETO_OBJECTIVES = ("Price", TOTAL_DURATION, TOTAL_STOPS)
+
+# Rows read back from a CSV (resumed search) have no totals; the return flight's values are all they know
+_CSV_FALLBACK = {TOTAL_DURATION: "Duration Mins.", TOTAL_STOPS: "Stops"}
+
+
+def _number(value):
+    # Rows carry API values as-is ("" for the stops of a single roundtrip); missing sorts last
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return math.inf
+    return math.inf if math.isnan(value) else value
+
+
+def _objective(row, column):
+    if column in _CSV_FALLBACK and column not in row:
+        return row.get(_CSV_FALLBACK[column])
+    return row.get(column)
+
+
+#########################################
+#                 TopK                  #
+#########################################
+
+class TopK:
+    """
+    Keeps the k rows with the smallest (largest=True: largest) value of one
+    column in a bounded heap: O(log k) per row, O(k) memory. Ties keep the
+    row that came first, like a stable sort of all rows would.
+    """
+
+    def __init__(self, k, by="Price", largest=False):
+        self.k = int(k)
+        self.by = by
+        self.largest = largest
+        self._sign = 1 if largest else -1
+        self._heap = []  # root = worst row kept
+        self._seq = 0
+
+    def add(self, row):
+        value = _number(row.get(self.by))
+        # Higher key = better row; missing values are the worst either way
+        value_key = -math.inf if value == math.inf else self._sign * value
+        entry = (value_key, -self._seq, row)
+        self._seq += 1
+
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def extend(self, rows):
+        for row in rows:
+            self.add(row)
+
+    @property
+    def full(self):
+        return len(self._heap) >= self.k
+
+    @property
+    def threshold(self):
+        """Value of the worst row kept once k rows are in, else None."""
+        if not self.full:
+            return None
+        return _number(self._heap[0][2].get(self.by))
+
+    def could_improve(self, value):
+        """False if a row with this value can no longer enter the top k."""
+        threshold = self.threshold
+        if threshold is None:
+            return True
+        value = _number(value)
+        return value > threshold if self.largest else value < threshold
+
+    def rows(self):
+        return [row for _, _, row in sorted(self._heap, key=lambda entry: (-entry[0], -entry[1]))]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+#########################################
+#              ParetoFront              #
+#########################################
+
+class ParetoFront:
+    """
+    Non-dominated rows on the given objectives (all minimised, default
+    price / total flight time / stops). A row is dropped once another row is at
+    least as good on every objective and better on one.
+    """
+
+    def __init__(self, objectives=PARETO_OBJECTIVES):
+        self.objectives = tuple(objectives)
+        self._front = []  # (values, seq, row)
+        self._seq = 0
+
+    def _values(self, row):
+        return tuple(_number(_objective(row, objective)) for objective in self.objectives)
+
+    @staticmethod
+    def _dominates(a, b):
+        return all(x <= y for x, y in zip(a, b)) and a != b
+
+    def add(self, row):
+        """Returns True if the row is on the front (for now)."""
+        values = self._values(row)
+        if any(self._dominates(other, values) for other, _, _ in self._front):
+            return False
+
+        self._front = [entry for entry in self._front if not self._dominates(values, entry[0])]
+        self._front.append((values, self._seq, row))
+        self._seq += 1
+        return True
+
+    def extend(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def rows(self):
+        return [row for _, _, row in sorted(self._front, key=lambda entry: (entry[0], entry[1]))]
+
+    def __len__(self):
+        return len(self._front)
+
+
+#########################################
+#            ResultSelector             #
+#########################################
+
+class ResultSelector:
+    """
+    Streaming replacement for "collect every row, sort at the end":
+    feeds each row to a TopK (top_k cheapest by `by`) and/or a ParetoFront.
+    Thread-safe, so search workers can consult prunes() while rows come in.
+    """
+
+    def __init__(self, top_k=None, by="Price", pareto=False):
+        self.top = TopK(top_k, by) if top_k else None
+        self.front = ParetoFront() if pareto else None
+        self.rows_seen = 0
+        self._lock = threading.Lock()
+
+    def add(self, row):
+        with self._lock:
+            self.rows_seen += 1
+            if self.top is not None:
+                self.top.add(row)
+            if self.front is not None:
+                self.front.add(row)
+
+    def extend(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def prunes(self, min_price):
+        """
+        True if rows priced at least min_price can no longer change the
+        result: only for a price top-k without a Pareto front (a cheap bound
+        on price says nothing about duration or stops).
+        """
+        if self.front is not None or self.top is None or self.top.by != "Price" or min_price is None:
+            return False
+        with self._lock:
+            return not self.top.could_improve(min_price)
+
+    def to_dataframe(self):
+        """Top-k rows if a top_k was given, otherwise the Pareto front."""
+        with self._lock:
+            rows = self.top.rows() if self.top is not None else self.front.rows()
+        return pd.DataFrame(rows, columns=ENTRY_COLUMNS)
+
+    def pareto_dataframe(self):
+        if self.front is None:
+            return None
+        with self._lock:
+            return pd.DataFrame(self.front.rows(), columns=ENTRY_COLUMNS)
@@ -0,0 +1,374 @@
+import argparse
+import json
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from manifest import params_fingerprint
+from utilities import ENTRY_COLUMNS, OUTGOING_KEY, TOTAL_PRICE
+
+
+#########################################
+#             itinerary_key             #
+#########################################
+
+def itinerary_key(row, roundtrip=True):
+    """
+    Stable identifier of a result row across runs: trip type, the outgoing
+    flight (every segment ID plus departure, see manifest.flight_key) and the
+    return segment flight IDs and departure.
+    (A roundtrip fare and two one-way tickets on the same flights are priced differently.)
+    Rows read back from a CSV lack the outgoing key; for those only the first
+    outgoing segment is known.
+    """
+    outgoing = row.get(OUTGOING_KEY) or (
+        f"{row.get('Flight ID Outgoing', '')}@{row.get('Departure Date Outgoing', '')} {row.get('Departure Time Outgoing', '')}"
+    )
+    return_ids = "-".join(filter(None, str(row.get("Flight ID", "")).split("\n")))
+    return f"{'RT' if roundtrip else 'OW'}:{outgoing}|{return_ids}@{row.get('Departure Time Return', '')}"
+
+
+def itinerary_price(row):
+    """
+    Fare of a result row: a roundtrip row's Price, the price of both tickets
+    for a one-way row (its Price is the inbound leg's). None if unknown.
+    """
+    price = pd.to_numeric(row.get(TOTAL_PRICE, row.get("Price")), errors="coerce")
+    return None if pd.isna(price) else float(price)
+
+
+#########################################
+#              PriceStore               #
+#########################################
+
+class PriceStore:
+    """
+    SQLite store of every itinerary ever seen, shared by all searches.
+
+    itineraries     – one row per itinerary_key: route, dates, latest and
+                      lowest price, first/last seen and the latest result row
+    observations    – (itinerary, observed_at, price) price history
+    searches        – one entry per search parameter set (fingerprint)
+    search_results  – the rows of the latest run of each search, in order
+
+    Rows are upserted as the search runs, so repeated searches deduplicate
+    into the same itineraries and build up their price history.
+    """
+
+    def __init__(self, path="flight_prices.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS itineraries ("
+            " key TEXT PRIMARY KEY,"
+            " origin TEXT NOT NULL,"
+            " destination TEXT NOT NULL,"
+            " roundtrip INTEGER NOT NULL,"
+            " departure_date TEXT NOT NULL,"
+            " return_date TEXT,"
+            " price REAL,"
+            " min_price REAL,"
+            " first_seen REAL NOT NULL,"
+            " last_seen REAL NOT NULL,"
+            " observations INTEGER NOT NULL,"
+            " row TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_itineraries_route_date"
+            " ON itineraries (origin, destination, departure_date, min_price);"
+            "CREATE INDEX IF NOT EXISTS idx_itineraries_route_price"
+            " ON itineraries (origin, destination, min_price);"
+            "CREATE TABLE IF NOT EXISTS observations ("
+            " key TEXT NOT NULL,"
+            " observed_at REAL NOT NULL,"
+            " price REAL,"
+            " search TEXT);"
+            "CREATE INDEX IF NOT EXISTS idx_observations_key ON observations (key, observed_at);"
+            "CREATE TABLE IF NOT EXISTS searches ("
+            " fingerprint TEXT PRIMARY KEY,"
+            " params TEXT NOT NULL,"
+            " started_at REAL NOT NULL,"
+            " completed_at REAL);"
+            "CREATE TABLE IF NOT EXISTS search_results ("
+            " search TEXT NOT NULL,"
+            " position INTEGER NOT NULL,"
+            " key TEXT NOT NULL,"
+            " row TEXT NOT NULL,"
+            " PRIMARY KEY (search, position));"
+        )
+        self._conn.commit()
+
+    # ---------------------------------------------------
+    # Writing
+    # ---------------------------------------------------
+    def begin_search(self, params, resume=False):
+        """
+        Registers a run of the search with these params and returns its
+        fingerprint. Unless resume is set, rows of an earlier run are dropped.
+        """
+        fingerprint = params_fingerprint(params)
+        with self._lock:
+            if not resume:
+                self._conn.execute("DELETE FROM search_results WHERE search = ?", (fingerprint,))
+            self._conn.execute(
+                "INSERT INTO searches (fingerprint, params, started_at, completed_at) VALUES (?, ?, ?, NULL)"
+                " ON CONFLICT(fingerprint) DO UPDATE SET started_at = excluded.started_at, completed_at = NULL",
+                (fingerprint, json.dumps(params, sort_keys=True, default=str), time.time())
+            )
+            self._conn.commit()
+        return fingerprint
+
+    def add_rows(self, rows, origin, destination, roundtrip=True, search=None, observed_at=None):
+        """Upserts result rows (dicts keyed by ENTRY_COLUMNS) and records their prices (itinerary_price)."""
+        if not rows:
+            return
+        observed_at = observed_at or time.time()
+
+        records = []
+        for row in rows:
+            price = itinerary_price(row)
+            records.append((
+                itinerary_key(row, roundtrip), origin, destination, int(bool(roundtrip)),
+                str(row.get("Departure Date Outgoing", "")), str(row.get("Departure Time Return", ""))[:10] or None,
+                price, json.dumps(row, default=str)
+            ))
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO itineraries (key, origin, destination, roundtrip, departure_date, return_date,"
+                " price, min_price, first_seen, last_seen, observations, row)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?)"
+                " ON CONFLICT(key) DO UPDATE SET"
+                " price = excluded.price,"
+                " min_price = MIN(COALESCE(min_price, excluded.min_price), COALESCE(excluded.min_price, min_price)),"
+                " last_seen = excluded.last_seen,"
+                " observations = observations + 1,"
+                " row = excluded.row",
+                [(key, o, d, rt, dep, ret, price, price, observed_at, observed_at, row)
+                 for key, o, d, rt, dep, ret, price, row in records]
+            )
+            self._conn.executemany(
+                "INSERT INTO observations (key, observed_at, price, search) VALUES (?, ?, ?, ?)",
+                [(key, observed_at, price, search) for key, _, _, _, _, _, price, _ in records]
+            )
+
+            if search is not None:
+                self._append_results(search, [(key, row) for key, _, _, _, _, _, _, row in records])
+            self._conn.commit()
+
+    def add_search_rows(self, search, rows, key=None):
+        """
+        Appends rows to a search's results only, leaving the itineraries and
+        their price history alone: for results that aren't plain trips on one
+        route (multi-airport / open-jaw combinations). key(row) gives each
+        row's key (default: itinerary_key of a one-way row).
+        """
+        if not rows:
+            return
+        key = key or (lambda row: itinerary_key(row, roundtrip=False))
+        with self._lock:
+            self._append_results(search, [(key(row), json.dumps(row, default=str)) for row in rows])
+            self._conn.commit()
+
+    def _append_results(self, search, keyed_rows):
+        # Caller holds the lock and commits
+        start = self._conn.execute(
+            "SELECT COALESCE(MAX(position) + 1, 0) FROM search_results WHERE search = ?", (search,)
+        ).fetchone()[0]
+        self._conn.executemany(
+            "INSERT INTO search_results (search, position, key, row) VALUES (?, ?, ?, ?)",
+            [(search, start + i, key, row) for i, (key, row) in enumerate(keyed_rows)]
+        )
+
+    def complete_search(self, search):
+        with self._lock:
+            self._conn.execute("UPDATE searches SET completed_at = ? WHERE fingerprint = ?", (time.time(), search))
+            self._conn.commit()
+
+    # ---------------------------------------------------
+    # Queries
+    # ---------------------------------------------------
+    def search_completed_at(self, params):
+        """Completion time of the latest run of this search, or None if it never finished."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT completed_at FROM searches WHERE fingerprint = ?", (params_fingerprint(params),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def load_search(self, params):
+        """Rows of the latest completed run of this search as a DataFrame, or None."""
+        if self.search_completed_at(params) is None:
+            return None
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT row FROM search_results WHERE search = ? ORDER BY position", (params_fingerprint(params),)
+            ).fetchall()
+        return pd.DataFrame([json.loads(row) for row, in rows], columns=ENTRY_COLUMNS)
+
+    def iter_search_rows(self, params, batch_size=5000):
+        """
+        Rows of the latest run of this search in batches of dicts (in result
+        order), without building a DataFrame: for exports of any size.
+        """
+        yield from self._iter_rows(
+            "SELECT row FROM search_results WHERE search = ? ORDER BY position",
+            (params_fingerprint(params),), batch_size
+        )
+
+    def iter_route_rows(self, origin, destination, date_from=None, date_to=None, roundtrip=None, batch_size=5000):
+        """Latest row of every itinerary seen on a route, cheapest first, in batches of dicts."""
+        query = "SELECT row FROM itineraries WHERE origin = ? AND destination = ?"
+        args = [origin, destination]
+        if date_from:
+            query += " AND departure_date >= ?"
+            args.append(date_from)
+        if date_to:
+            query += " AND departure_date <= ?"
+            args.append(date_to)
+        if roundtrip is not None:
+            query += " AND roundtrip = ?"
+            args.append(int(bool(roundtrip)))
+        query += " ORDER BY price IS NULL, price"
+        yield from self._iter_rows(query, args, batch_size)
+
+    def _iter_rows(self, query, args, batch_size):
+        # A separate read connection: the shared one stays free for writers meanwhile (WAL)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            cursor = conn.execute(query, args)
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                yield [json.loads(row) for row, in batch]
+        finally:
+            conn.close()
+
+    def cheapest(self, origin, destination, date_from=None, date_to=None, roundtrip=None, limit=10):
+        """
+        Cheapest itineraries ever seen on a route, optionally for departures
+        between date_from and date_to (inclusive, YYYY-MM-DD).
+        """
+        query = (
+            "SELECT origin, destination, departure_date, return_date, min_price, price,"
+            " first_seen, last_seen, observations, row"
+            " FROM itineraries WHERE origin = ? AND destination = ?"
+        )
+        args = [origin, destination]
+        if date_from:
+            query += " AND departure_date >= ?"
+            args.append(date_from)
+        if date_to:
+            query += " AND departure_date <= ?"
+            args.append(date_to)
+        if roundtrip is not None:
+            query += " AND roundtrip = ?"
+            args.append(int(bool(roundtrip)))
+        query += " AND min_price IS NOT NULL ORDER BY min_price LIMIT ?"
+        args.append(int(limit))
+
+        with self._lock:
+            records = self._conn.execute(query, args).fetchall()
+
+        df = pd.DataFrame(records, columns=[
+            "origin", "destination", "departure_date", "return_date", "min_price", "last_price",
+            "first_seen", "last_seen", "observations", "row"
+        ])
+        for column in ("first_seen", "last_seen"):
+            df[column] = pd.to_datetime(df[column], unit="s")
+        rows = pd.DataFrame([json.loads(row) for row in df.pop("row")], columns=ENTRY_COLUMNS)
+        return pd.concat([df, rows.drop(columns=["Price"])], axis=1)
+
+    def cell_prices(self, origin, destination, date_from=None, date_to=None, roundtrip=None):
+        """{(departure_date, return_date): latest cheapest price} of a route's date cells."""
+        query = (
+            "SELECT departure_date, return_date, MIN(price) FROM itineraries"
+            " WHERE origin = ? AND destination = ? AND price IS NOT NULL AND return_date IS NOT NULL"
+        )
+        args = [origin, destination]
+        if date_from:
+            query += " AND departure_date >= ?"
+            args.append(date_from)
+        if date_to:
+            query += " AND departure_date <= ?"
+            args.append(date_to)
+        if roundtrip is not None:
+            query += " AND roundtrip = ?"
+            args.append(int(bool(roundtrip)))
+        query += " GROUP BY departure_date, return_date"
+
+        with self._lock:
+            records = self._conn.execute(query, args).fetchall()
+        return {(departure_date, return_date): price for departure_date, return_date, price in records}
+
+    def price_history(self, key):
+        """(observed_at, price) of one itinerary, oldest first."""
+        with self._lock:
+            records = self._conn.execute(
+                "SELECT observed_at, price FROM observations WHERE key = ? ORDER BY observed_at", (key,)
+            ).fetchall()
+        df = pd.DataFrame(records, columns=["observed_at", "price"])
+        df["observed_at"] = pd.to_datetime(df["observed_at"], unit="s")
+        return df
+
+    def stats(self):
+        with self._lock:
+            itineraries, = self._conn.execute("SELECT COUNT(*) FROM itineraries").fetchone()
+            observations, = self._conn.execute("SELECT COUNT(*) FROM observations").fetchone()
+            searches, = self._conn.execute("SELECT COUNT(*) FROM searches").fetchone()
+        return {"itineraries": itineraries, "observations": observations, "searches": searches}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+#########################################
+#           setup_price_store           #
+#########################################
+
+_price_store = None
+_price_store_config = None
+_price_store_lock = threading.Lock()
+
+
+def setup_price_store(store_config):
+    """
+    Configures the process-wide price store from the 'store' section of
+    config.json ({"enabled": true, "path": "flight_prices.sqlite"}).
+    Missing or disabled config turns the store off.
+    A changed config replaces the store without closing the old one, which
+    searches still running may be using (it is dropped once they're done).
+    """
+    global _price_store, _price_store_config
+
+    with _price_store_lock:
+        if store_config == _price_store_config and (_price_store is not None or not store_config):
+            return _price_store
+
+        _price_store_config = store_config
+        _price_store = None
+        if store_config and store_config.get("enabled", True):
+            _price_store = PriceStore(store_config.get("path", "flight_prices.sqlite"))
+        return _price_store
+
+
+def get_price_store():
+    return _price_store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the historical flight price store.")
+    parser.add_argument("origin")
+    parser.add_argument("destination")
+    parser.add_argument("--from", dest="date_from", default=None, help="earliest departure date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", default=None, help="latest departure date (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--path", default="flight_prices.sqlite")
+    args = parser.parse_args()
+
+    store = PriceStore(args.path)
+    print(store.cheapest(args.origin, args.destination, args.date_from, args.date_to, limit=args.limit).to_string())
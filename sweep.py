@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+
+
+#########################################
+#            iter_date_pairs            #
+#########################################
+
+def iter_date_pairs(departureDateStart, departureDateEnd, minDurationDays, maxDurationDays):
+    """
+    Yields every (departureDateStr, returnDateStr) pair searched by
+    run_flight_search, in the order the sequential search visits them.
+    """
+    count_departure_day = 1
+
+    while True:
+
+        departureDate = datetime.strptime(departureDateStart, "%Y-%m-%d") + timedelta(days=count_departure_day)
+
+        # Stop if beyond last allowed departure date
+        if departureDate >= datetime.strptime(departureDateEnd, "%Y-%m-%d"):
+            break
+
+        departureDateStr = departureDate.strftime("%Y-%m-%d")
+        count_departure_day += 1
+
+        # Earliest return date
+        dt_return_min = departureDate + timedelta(days=minDurationDays)
+
+        # Latest possible return date
+        maxReturnDate_dt = departureDate + timedelta(days=maxDurationDays)
+
+        # Iterate return dates
+        count_return_day = 0
+
+        while True:
+
+            returnDate = dt_return_min + timedelta(days=count_return_day)
+            count_return_day += 1
+
+            if returnDate >= maxReturnDate_dt:
+                break
+
+            yield departureDateStr, returnDate.strftime("%Y-%m-%d")
+
+
+#########################################
+#              date grid                #
+#########################################
+
+def pair_cell(pair, firstDepartureDate, minDurationDays):
+    """(departureDateStr, returnDateStr) → (departure day index, trip length index) in the search grid."""
+    departureDate = datetime.strptime(pair[0], "%Y-%m-%d")
+    returnDate = datetime.strptime(pair[1], "%Y-%m-%d")
+    return (departureDate - firstDepartureDate).days, (returnDate - departureDate).days - minDurationDays
+
+
+def _grid(all_pairs, minDurationDays):
+    first = datetime.strptime(all_pairs[0][0], "%Y-%m-%d")
+    return {pair_cell(pair, first, minDurationDays): pair for pair in all_pairs}
+
+
+def _sample_indices(n, step):
+    # Every step-th index, always including both edges of the axis
+    return set(range(0, n, step)) | {n - 1}
+
+
+#########################################
+#             smart sweep               #
+#########################################
+
+def coarse_pairs(all_pairs, minDurationDays, step=3):
+    """
+    First pass of the smart sweep: every step-th departure day × every
+    step-th trip length (edges included), in the original pair order.
+    """
+    if not all_pairs:
+        return []
+
+    grid = _grid(all_pairs, minDurationDays)
+    days = _sample_indices(max(i for i, _ in grid) + 1, step)
+    lengths = _sample_indices(max(j for _, j in grid) + 1, step)
+    return [pair for (i, j), pair in grid.items() if i in days and j in lengths]
+
+
+def refine_pairs(all_pairs, minDurationDays, cell_prices, searched, maxPrice, step=3, topCells=3):
+    """
+    Second pass of the smart sweep. cell_prices maps searched pairs to their
+    cheapest price (missing = nothing found).
+
+    The topCells cheapest searched cells within maxPrice are refined: every
+    not yet searched pair within step-1 days (departure and trip length) of
+    them is returned. A pair's nearby price bound is the cheapest searched
+    neighbour; regions whose neighbours are all expensive or empty are skipped.
+    Pairs are returned cheapest neighbourhood first.
+    """
+    if not all_pairs:
+        return []
+
+    grid = _grid(all_pairs, minDurationDays)
+    cells = {pair: cell for cell, pair in grid.items()}
+    radius = max(1, step - 1)
+
+    seeds = sorted(
+        (price, cells[pair]) for pair, price in cell_prices.items()
+        if pair in cells and price is not None and price <= int(maxPrice)
+    )[:topCells]
+
+    bounds = {}
+    for price, (si, sj) in seeds:
+        for di in range(-radius, radius + 1):
+            for dj in range(-radius, radius + 1):
+                pair = grid.get((si + di, sj + dj))
+                if pair is None or pair in searched:
+                    continue
+                bounds[pair] = min(price, bounds.get(pair, price))
+
+    return sorted(bounds, key=lambda pair: (bounds[pair], pair))
+
+
+def sweep_report(all_pairs, searched):
+    total = len(all_pairs)
+    skipped = total - len(searched)
+    return {
+        "pairs_total": total,
+        "pairs_searched": len(searched),
+        "pairs_skipped": skipped,
+        "skipped_fraction": skipped / total if total else 0.0,
+    }
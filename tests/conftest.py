@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pytest
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_api import MockFlightsAPI
+
+
+# Small search over the mock API: 4 departure days × 3 trip lengths
+SEARCH = {
+    "departureId": "IST",
+    "arrivalId": "BKK",
+    "departureDateStart": "2026-01-01",
+    "departureDateEnd": "2026-01-04",
+    "minDurationDays": 3,
+    "maxDurationDays": 5,
+    "maxPrice": "850",
+    "adults": "1",
+    "maxDuration": 16,
+    "maxFlights": 2,
+}
+
+
+@pytest.fixture(scope="session")
+def mock_api():
+    with MockFlightsAPI(latency=0.0, jitter=0.0) as api:
+        yield api
+
+
+@pytest.fixture
+def search_config(mock_api):
+    """Config of a search against the mock API: no cache, store or metrics."""
+    return {
+        "api": {"base_url": mock_api.base_url, "headers": {"x-rapidapi-key": "test", "x-rapidapi-host": "mock"}},
+        "rate_limit": {"requests_per_second": 1000, "burst": 1000},
+    }
@@ -0,0 +1,50 @@
+import json
+
+import pandas as pd
+import pytest
+
+from batch import JOB_DEFAULTS, load_jobs, run_batch
+from conftest import SEARCH
+
+
+def _write_jobs(path, jobs):
+    path.write_text("# comment\n\n" + "\n".join(json.dumps(job) for job in jobs) + "\n")
+    return str(path)
+
+
+def test_load_jobs_fills_defaults_and_names(tmp_path):
+    jobs = load_jobs(_write_jobs(tmp_path / "jobs.jsonl", [
+        {"departureId": "IST", "arrivalId": "BKK", "departureDateStart": "2026-01-01", "departureDateEnd": "2026-01-05"},
+        {"name": "back", "departureId": "BKK", "arrivalId": "IST", "departureDateStart": "2026-01-01",
+         "departureDateEnd": "2026-01-05", "isRoundtrip": False},
+    ]))
+    assert [job["name"] for job in jobs] == ["001_roundtrip_IST_BKK_2026-01-01_2026-01-05", "back"]
+    assert jobs[0]["maxFlights"] == JOB_DEFAULTS["maxFlights"]
+    assert jobs[1]["isRoundtrip"] is False
+
+
+def test_load_jobs_rejects_bad_specs(tmp_path):
+    with pytest.raises(ValueError, match="missing departureDateEnd"):
+        load_jobs(_write_jobs(tmp_path / "a.jsonl", [{"departureId": "IST", "arrivalId": "BKK", "departureDateStart": "2026-01-01"}]))
+    job = dict(SEARCH, name="same")
+    with pytest.raises(ValueError, match="duplicate job name"):
+        load_jobs(_write_jobs(tmp_path / "b.jsonl", [job, job]))
+
+
+def test_run_batch_writes_one_file_per_job_and_a_summary(tmp_path, search_config):
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps(dict(search_config, cache={"path": str(tmp_path / "cache.sqlite")})))
+    jobs_file = _write_jobs(tmp_path / "jobs.jsonl", [
+        dict(SEARCH, name="roundtrip"),
+        dict(SEARCH, name="oneway", isRoundtrip=False),
+    ])
+    out_dir = tmp_path / "out"
+
+    summary = run_batch(jobs_file, str(out_dir), workers=2, config_file=str(config_file))
+
+    assert (summary["jobs"], summary["succeeded"], summary["failed"]) == (2, 2, 0)
+    assert [result["name"] for result in summary["results"]] == ["roundtrip", "oneway"]
+    for result in summary["results"]:
+        assert len(pd.read_csv(result["file"])) == result["rows"] > 0
+    assert summary["cache_entries"] > 0
+    assert json.loads((out_dir / "batch_summary.json").read_text())["rows"] == summary["rows"]
@@ -0,0 +1,63 @@
+import cache
+from cache import ResponseCache
+
+
+BASE_URL = "https://flights.example"
+
+
+def _cache(tmp_path, **kwargs):
+    return ResponseCache(path=str(tmp_path / "cache.sqlite"), **kwargs)
+
+
+def test_key_ignores_parameter_order():
+    a = ResponseCache.make_key(BASE_URL, "/flights/search-one-way?departureId=IST&arrivalId=BKK")
+    b = ResponseCache.make_key(BASE_URL + "/", "/flights/search-one-way?arrivalId=BKK&departureId=IST")
+    assert a == b
+    assert a[0] == "search-one-way"
+    assert ResponseCache.make_key(BASE_URL, "/flights/roundtrip-returning?a=1", retTok="x") != \
+        ResponseCache.make_key(BASE_URL, "/flights/roundtrip-returning?a=1", retTok="y")
+
+
+def test_entries_expire_after_their_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    responses = _cache(tmp_path, ttl={"search-one-way": 60})
+
+    responses.put(BASE_URL, "/flights/search-one-way?departureId=IST", {"flights": [1]})
+    now[0] += 59
+    assert responses.get(BASE_URL, "/flights/search-one-way?departureId=IST") == {"flights": [1]}
+    now[0] += 2
+    assert responses.get(BASE_URL, "/flights/search-one-way?departureId=IST") is None
+
+    stats = responses.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 0)
+    responses.close()
+
+
+def test_zero_ttl_is_never_cached(tmp_path):
+    responses = _cache(tmp_path)
+    responses.put(BASE_URL, "/flights/roundtrip-returning?x=1", {"flights": []}, retTok="token")
+    assert responses.get(BASE_URL, "/flights/roundtrip-returning?x=1", retTok="token") is None
+    assert responses.stats()["entries"] == 0
+    responses.close()
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    responses = _cache(tmp_path, max_entries=2)
+
+    for name in ("a", "b"):
+        now[0] += 1
+        responses.put(BASE_URL, f"/flights/search-one-way?q={name}", name)
+    # Reading "a" makes "b" the least recently used
+    now[0] += 1
+    assert responses.get(BASE_URL, "/flights/search-one-way?q=a") == "a"
+    now[0] += 1
+    responses.put(BASE_URL, "/flights/search-one-way?q=c", "c")
+
+    assert responses.get(BASE_URL, "/flights/search-one-way?q=b") is None
+    assert responses.get(BASE_URL, "/flights/search-one-way?q=a") == "a"
+    assert responses.get(BASE_URL, "/flights/search-one-way?q=c") == "c"
+    assert responses.stats()["entries"] == 2
+    responses.close()
@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+from cli import _search_kwargs, build_parser, main
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_search_arguments_map_to_search_kwargs():
+    args = build_parser().parse_args([
+        "search", "IST", "BKK", "--start", "2026-01-01", "--end", "2026-01-04", "--min-days", "3", "--max-days", "5",
+        "--oneway", "--workers", "4", "--sweep", "smart", "--top-k", "5", "--early-stop", "--max-calls", "20",
+    ])
+    kwargs = _search_kwargs(args)
+
+    assert kwargs["departureId"] == "IST" and kwargs["arrivalId"] == "BKK"
+    assert (kwargs["minDurationDays"], kwargs["maxDurationDays"]) == (3, 5)
+    assert kwargs["isRoundtrip"] is False and kwargs["resume"] is True
+    assert (kwargs["maxWorkers"], kwargs["sweep"], kwargs["topK"], kwargs["earlyStop"], kwargs["maxCalls"]) == (4, "smart", 5, True, 20)
+    assert (kwargs["maxPrice"], kwargs["maxFlights"], kwargs["fileName"]) == ("850", 4, None)
+
+
+def _imports_after(argv):
+    code = (
+        "import sys, cli\n"
+        "try:\n"
+        f"    cli.main({argv!r})\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print('\\nIMPORTED', 'pandas' in sys.modules, 'requests' in sys.modules)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return out.rsplit("IMPORTED", 1)[1].split()
+
+
+def test_help_and_dry_run_do_not_import_pandas(tmp_path):
+    assert _imports_after(["--help"]) == ["False", "False"]
+
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"api": {"base_url": "http://127.0.0.1:9", "headers": {}}}))
+    argv = ["--config", str(config), "search", "IST", "BKK", "--start", "2026-01-01", "--end", "2026-01-04",
+            "--min-days", "3", "--max-days", "5", "--dry-run"]
+    assert _imports_after(argv)[0] == "False"
+
+
+def test_search_command(tmp_path, search_config, mock_api, capsys):
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps(search_config))
+    output = tmp_path / "out.csv"
+
+    status = main(["--config", str(config), "search", "IST", "BKK", "--start", "2026-01-01", "--end", "2026-01-04",
+                   "--min-days", "3", "--max-days", "5", "--max-flights", "2", "--no-resume", "--output", str(output), "--show", "3"])
+
+    assert status == 0
+    df = pd.read_csv(output)
+    assert len(df) > 0
+    assert f"{len(df)} flights in" in capsys.readouterr().out
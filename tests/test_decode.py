@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+import decode
+from decode import compact_data, decode_response
+from mock_api import synthetic_response
+
+
+BACKENDS = ["json"] + (["orjson"] if decode.orjson is not None else [])
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    if request.param == "json":
+        # As if orjson weren't installed
+        monkeypatch.setattr(decode, "orjson", None)
+    return request.param
+
+
+def test_loads_and_dumps_round_trip(backend):
+    data = {"price": 512, "airline": "Thai Airways", "segments": [{"flightId": "TG 921"}]}
+    text = decode.dumps(data)
+    assert isinstance(text, str)
+    assert decode.loads(text) == data
+    assert decode.loads(text.encode()) == data
+
+
+def test_invalid_json_raises_json_decode_error(backend):
+    # get_request catches json.JSONDecodeError whichever backend parses
+    with pytest.raises(json.JSONDecodeError):
+        decode.loads(b"<html>Bad gateway</html>")
+
+
+def test_decode_response_keeps_only_used_fields(backend):
+    payload = synthetic_response("/flights/search-roundtrip", {"departureDate": "2026-01-02"})
+    payload["data"]["topFlights"][0]["bookingToken"] = "x" * 100
+    payload["data"]["priceHistory"] = [1, 2, 3]
+
+    data = decode_response(json.dumps(payload).encode())
+
+    assert set(data) == {"topFlights", "otherFlights"}
+    flight = data["topFlights"][0]
+    assert set(flight) <= set(decode.FLIGHT_FIELDS)
+    assert flight["segments"] == payload["data"]["topFlights"][0]["segments"]
+    assert flight["returningToken"] == payload["data"]["topFlights"][0]["returningToken"]
+
+
+def test_compact_data_leaves_other_payloads_unchanged():
+    assert compact_data([]) == []
+    assert compact_data({"message": "no flights"}) == {"message": "no flights"}
+    assert compact_data({"topFlights": None}) == {"topFlights": None}
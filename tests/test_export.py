@@ -0,0 +1,63 @@
+import json
+
+import pandas as pd
+
+from cli import main
+from conftest import SEARCH
+from export import export_rows
+from main import run_flight_search, search_params, search_run_params
+from store import setup_price_store
+
+
+EXPORT_ARGS = ["IST", "BKK", "--start", "2026-01-01", "--end", "2026-01-04", "--min-days", "3", "--max-days", "5",
+               "--max-duration", "16", "--max-flights", "2"]
+
+
+def test_run_params_carry_sweep_and_select():
+    params = search_params(*[SEARCH[name] for name in (
+        "departureDateStart", "departureDateEnd", "departureId", "arrivalId", "adults",
+        "maxPrice", "maxDuration", "minDurationDays", "maxDurationDays", "maxFlights")])
+
+    assert search_run_params(params) == params
+    keyed = search_run_params(params, sweep="smart", topK=5, earlyStop=True)
+    assert keyed["sweep"] == {"mode": "smart", "step": 3, "topCells": 3}
+    assert keyed["select"] == {"topK": 5, "earlyStop": True}
+    # earlyStop only prunes a price top-k of roundtrips
+    assert "select" not in search_run_params(params, topK=5, earlyStop=True, pareto=True)
+    assert "select" not in search_run_params(dict(params, isRoundtrip=False), topK=5, earlyStop=True)
+    assert "select" not in search_run_params(params, topK=5)
+
+
+def test_export_round_trip_of_a_smart_early_stop_search(tmp_path, search_config, mock_api, capsys):
+    config = dict(search_config, store={"path": str(tmp_path / "prices.sqlite")})
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps(config))
+
+    # The CLI passes --max-duration as given on the command line
+    run_flight_search(**dict(SEARCH, maxDuration="16"), sweep="smart", topK=3, earlyStop=True, maxWorkers=2, resume=False,
+                      fileName=str(tmp_path / "search.csv"), config=config)
+    written = pd.read_csv(tmp_path / "search.csv")
+
+    # Keyed like the search ran: every row it found, in result order
+    output = tmp_path / "export.csv"
+    status = main(["--config", str(config_file), "export", *EXPORT_ARGS,
+                   "--sweep", "smart", "--top-k", "3", "--early-stop", "--output", str(output)])
+    assert status == 0
+    assert "hasn't finished" not in capsys.readouterr().out
+    exported = pd.read_csv(output)
+    assert len(exported) == len(written) > 0
+    assert exported["Price"].tolist() == written["Price"].tolist()
+
+    # Without the sweep / select flags it is another (never run) search
+    main(["--config", str(config_file), "export", *EXPORT_ARGS, "--output", str(tmp_path / "other.csv")])
+    assert "hasn't finished" in capsys.readouterr().out
+    assert pd.read_csv(tmp_path / "other.csv").empty
+
+
+def test_export_formats_stream_the_same_rows(tmp_path):
+    rows = [{"Price": 500 + i, "Airline": "Thai Airways\nEmirates\n"} for i in range(7)]
+    batches = [rows[:3], rows[3:]]
+    assert export_rows(iter(batches), str(tmp_path / "out.csv"), "csv") == 7
+    exported = pd.read_csv(tmp_path / "out.csv")
+    assert exported["Price"].tolist() == [row["Price"] for row in rows]
+    assert exported["Airline"].iloc[0] == "Thai Airways / Emirates"
@@ -0,0 +1,71 @@
+import pytest
+
+from conftest import SEARCH
+from keypool import KeyPool, key_fingerprint
+from main import run_flight_search
+from mock_api import MockFlightsAPI
+
+
+@pytest.fixture
+def usage_path(tmp_path):
+    return str(tmp_path / "usage.sqlite")
+
+
+def test_acquire_prefers_the_key_with_most_quota_left(usage_path):
+    pool = KeyPool([{"key": "a", "monthly_quota": 2}, {"key": "b", "monthly_quota": 3}], usage_path=usage_path)
+    used = []
+    while True:
+        pooled = pool.acquire()
+        if pooled is None:
+            break
+        fingerprint, key = pooled
+        pool.on_response(fingerprint, 200)
+        used.append(key)
+
+    assert sorted(used) == ["a", "a", "b", "b", "b"]
+    assert used[0] == "b"
+    assert pool.usage()[key_fingerprint("a")]["remaining"] == 0
+    pool.close()
+
+
+def test_quota_header_and_cooldowns(usage_path):
+    pool = KeyPool(["a", "b"], usage_path=usage_path, cooldown_403=3600, max_wait=0)
+    a, b = key_fingerprint("a"), key_fingerprint("b")
+
+    pool.on_response(a, 200, {"X-RateLimit-Requests-Remaining": "7"})
+    assert pool.usage()[a]["remaining"] == 7
+
+    pool.on_response(b, 429, {"Retry-After": "600"})
+    assert pool.acquire() == (a, "a")
+    assert pool.has_other(a)
+
+    pool.on_response(a, 403)
+    assert pool.usage()[a]["cooling_down"] and pool.usage()[b]["cooling_down"]
+    # Every key cooling down for longer than max_wait
+    assert pool.acquire() is None
+    pool.close()
+
+
+def test_usage_is_shared_through_sqlite(usage_path):
+    first = KeyPool([{"key": "a", "monthly_quota": 10}], usage_path=usage_path)
+    first.on_response(key_fingerprint("a"), 200)
+    first.on_response(key_fingerprint("a"), 200)
+    first.close()
+
+    second = KeyPool([{"key": "a", "monthly_quota": 10}], usage_path=usage_path)
+    assert second.usage()[key_fingerprint("a")] == {"used": 2, "remaining": 8, "monthly_quota": 10, "cooling_down": False}
+    second.close()
+
+
+def test_search_switches_keys_after_a_403(tmp_path, usage_path, search_config, mock_api):
+    full = run_flight_search(**SEARCH, maxWorkers=2, resume=False, fileName=str(tmp_path / "full.csv"), config=search_config)
+
+    # Key "a" is already out of quota on the API side, the pool only learns it from the 403
+    with MockFlightsAPI(latency=0.0, jitter=0.0, key_quota={"a": 0, "b": 1000}) as api:
+        config = dict(search_config, api=dict(search_config["api"], base_url=api.base_url, keys=["a", "b"]),
+                      key_pool={"usage_path": usage_path})
+        df = run_flight_search(**SEARCH, maxWorkers=2, resume=False, fileName=str(tmp_path / "keys.csv"), config=config)
+
+        assert api.errors >= 1
+        assert len(df) == len(full)
+        assert api.key_quota["b"] < 1000
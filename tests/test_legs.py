@@ -0,0 +1,68 @@
+import pandas as pd
+
+from conftest import SEARCH
+from legs import combine_legs, leg_table
+from main import run_flight_search
+from mock_api import synthetic_response
+from utilities import ENTRY_COLUMNS
+
+
+def _leg(origin, destination, date, maxFlights=3):
+    params = {"departureId": origin, "arrivalId": destination, "departureDate": date}
+    data = synthetic_response("/flights/search-one-way", params)["data"]
+    return (data["topFlights"] + data["otherFlights"])[:maxFlights]
+
+
+def _trips(pairs):
+    return pd.DataFrame({
+        "trip": range(len(pairs)),
+        "out_origin": "IST",
+        "out_destination": "BKK",
+        "departureDate": [departureDate for departureDate, _ in pairs],
+        "in_origin": "BKK",
+        "in_destination": "IST",
+        "returnDate": [returnDate for _, returnDate in pairs],
+    })
+
+
+def test_combine_legs_matches_nested_loops():
+    pairs = [("2026-01-01", "2026-01-04"), ("2026-01-01", "2026-01-05"), ("2026-01-02", "2026-01-05")]
+    flights_by_leg = {}
+    for departureDate, returnDate in pairs:
+        flights_by_leg[("IST", "BKK", departureDate)] = _leg("IST", "BKK", departureDate)
+        flights_by_leg[("BKK", "IST", returnDate)] = _leg("BKK", "IST", returnDate)
+    maxPrice = 800
+
+    combined = combine_legs(_trips(pairs), leg_table(flights_by_leg), maxPrice)
+
+    # What the per-pair loop used to do: every outbound × every inbound within the price cap
+    expected = [
+        (trip, flight_out["price"] + flight_in["price"])
+        for trip, (departureDate, returnDate) in enumerate(pairs)
+        for flight_out in flights_by_leg[("IST", "BKK", departureDate)]
+        for flight_in in flights_by_leg[("BKK", "IST", returnDate)]
+        if flight_out["price"] + flight_in["price"] <= maxPrice
+    ]
+    assert list(zip(combined["trip"], combined["total_price"])) == expected
+    assert 0 < len(expected) < len(pairs) * 9
+
+
+def test_combine_legs_without_legs_is_empty():
+    combined = combine_legs(_trips([("2026-01-01", "2026-01-04")]), leg_table({}), 900)
+    assert combined.empty
+    assert "total_price" in combined.columns
+
+
+def test_oneway_rows_have_the_roundtrip_shape(tmp_path, search_config):
+    oneway = run_flight_search(**SEARCH, isRoundtrip=False, maxWorkers=4, resume=False,
+                               fileName=str(tmp_path / "oneway.csv"), config=search_config)
+    roundtrip = run_flight_search(**SEARCH, isRoundtrip=True, maxWorkers=4, resume=False,
+                                  fileName=str(tmp_path / "roundtrip.csv"), config=search_config)
+
+    assert len(oneway) and len(roundtrip)
+    assert list(oneway.columns) == list(roundtrip.columns) == ENTRY_COLUMNS
+    for df in (oneway, roundtrip):
+        assert (pd.to_numeric(df["Price"]) <= int(SEARCH["maxPrice"])).all()
+        trip_days = (pd.to_datetime(df["Departure Time Return"].str[:10]) - pd.to_datetime(df["Departure Date Outgoing"])).dt.days
+        assert trip_days.between(SEARCH["minDurationDays"], SEARCH["maxDurationDays"]).all()
+    assert pd.read_csv(tmp_path / "oneway.csv").shape == oneway.shape
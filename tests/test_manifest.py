@@ -0,0 +1,86 @@
+import pandas as pd
+
+from conftest import SEARCH
+from main import iter_flight_search, run_flight_search, search_params
+from manifest import SearchManifest, flight_key, manifest_is_complete, manifest_path
+
+
+FLIGHT = {
+    "departureDate": "2026-01-02", "departureTime": "08:00",
+    "segments": [{"flightId": 1}, {"flightId": 2}],
+}
+
+
+def test_flight_key_uses_every_segment():
+    other = dict(FLIGHT, segments=[{"flightId": 1}, {"flightId": 3}])
+    assert flight_key(FLIGHT) == "1-2@2026-01-02 08:00"
+    assert flight_key(FLIGHT) != flight_key(other)
+
+
+def test_resume_keeps_finished_units(tmp_path):
+    path = str(tmp_path / "search.manifest.jsonl")
+    params = search_params(**SEARCH)
+    unit = SearchManifest.unit("2026-01-01", "2026-01-04", FLIGHT)
+
+    with SearchManifest(path, params) as manifest:
+        manifest.mark_done(unit)
+        manifest.mark_done(unit)
+        manifest.mark_done(SearchManifest.unit("2026-01-01", "2026-01-05"))
+
+    with SearchManifest(path, params) as manifest:
+        assert manifest.resumed
+        assert manifest.is_done(unit)
+        assert len(manifest.done) == 2
+
+    # Each unit is logged once
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 3
+
+
+def test_other_search_or_complete_manifest_starts_fresh(tmp_path):
+    path = str(tmp_path / "search.manifest.jsonl")
+    params = search_params(**SEARCH)
+    unit = SearchManifest.unit("2026-01-01", "2026-01-04")
+
+    with SearchManifest(path, params) as manifest:
+        manifest.mark_done(unit)
+
+    with SearchManifest(path, dict(params, maxPrice="900")) as manifest:
+        assert not manifest.resumed and not manifest.is_done(unit)
+
+    with SearchManifest(path, params) as manifest:
+        manifest.mark_done(unit)
+        manifest.mark_complete()
+    assert manifest_is_complete(path, params)
+
+    with SearchManifest(path, params) as manifest:
+        assert not manifest.resumed and not manifest.done
+
+
+def _sorted_rows(fileName):
+    df = pd.read_csv(fileName, dtype=str, keep_default_na=False)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def test_interrupted_search_resumes_without_duplicates(tmp_path, search_config, mock_api):
+    for isRoundtrip in (True, False):
+        full = str(tmp_path / f"full_{isRoundtrip}.csv")
+        run_flight_search(**SEARCH, isRoundtrip=isRoundtrip, maxWorkers=1, resume=False, fileName=full, config=search_config)
+
+        # Stop after a few work units, like a crash or Ctrl+C
+        resumed = str(tmp_path / f"resumed_{isRoundtrip}.csv")
+        search = iter_flight_search(**SEARCH, isRoundtrip=isRoundtrip, maxWorkers=1, resume=False, fileName=resumed, config=search_config)
+        for _ in range(3):
+            next(search)
+        search.close()
+        assert not manifest_is_complete(manifest_path(resumed), search_params(**SEARCH, isRoundtrip=isRoundtrip))
+
+        mock_api.reset_counters()
+        run_flight_search(**SEARCH, isRoundtrip=isRoundtrip, maxWorkers=1, resume=True, fileName=resumed, config=search_config)
+        resumed_requests = mock_api.requests
+
+        mock_api.reset_counters()
+        run_flight_search(**SEARCH, isRoundtrip=isRoundtrip, maxWorkers=1, resume=False, fileName=full, config=search_config)
+        assert resumed_requests < mock_api.requests
+
+        pd.testing.assert_frame_equal(_sorted_rows(resumed), _sorted_rows(full))
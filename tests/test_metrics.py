@@ -0,0 +1,52 @@
+import metrics
+from metrics import Metrics, setup_metrics
+
+
+def test_report_since_snapshot_gives_deltas():
+    m = Metrics()
+    m.inc("requests_total", endpoint="search")
+    m.inc("cache_lookups_total", result="hit")
+    m.observe("request_seconds", 0.2)
+    m.add_phase("network", 1.0)
+    before = m.snapshot()
+
+    m.inc("requests_total", 2, endpoint="search")
+    m.inc("cache_lookups_total", result="miss")
+    m.observe("request_seconds", 3.0)
+    m.add_phase("network", 0.5)
+    report = m.report(since=before)
+
+    counters = {(c["name"], tuple(c["labels"].items())): c["value"] for c in report["counters"]}
+    assert counters == {("requests_total", (("endpoint", "search"),)): 2, ("cache_lookups_total", (("result", "miss"),)): 1}
+    histogram, = report["histograms"]
+    assert (histogram["count"], histogram["sum"]) == (1, 3.0)
+    assert histogram["buckets"]["5.0"] == 1 and histogram["buckets"]["0.25"] == 0
+    assert report["phases_s"] == {"network": 0.5}
+    assert report["cache_hit_rate"] == 0.0
+
+    assert m.report()["cache_hit_rate"] == 0.5
+
+
+def test_prometheus_text():
+    m = Metrics()
+    m.inc("requests_total", endpoint="search")
+    m.observe("request_seconds", 0.2)
+    text = m.prometheus_text()
+    assert '# TYPE flight_finder_requests_total counter' in text
+    assert 'flight_finder_requests_total{endpoint="search"} 1' in text
+    assert 'flight_finder_request_seconds_bucket{le="+Inf"} 1' in text
+
+
+def test_setup_metrics_keeps_one_instance(monkeypatch):
+    monkeypatch.setattr(metrics, "_metrics", None)
+
+    shared = setup_metrics({"enabled": True})
+    metrics.inc("rows_total", 3)
+    assert setup_metrics({"enabled": True}) is shared
+    assert metrics.snapshot()["counters"][("rows_total", ())] == 3
+
+    assert setup_metrics({"enabled": False}) is None
+    assert not metrics.enabled()
+    with metrics.timed("io"):
+        metrics.inc("rows_total")
+    assert metrics.snapshot() is None
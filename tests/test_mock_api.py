@@ -0,0 +1,49 @@
+import requests
+
+from benchmark import SCENARIOS, run_scenario
+from conftest import SEARCH
+from mock_api import MockFlightsAPI, synthetic_response
+
+
+def test_synthetic_responses_are_deterministic():
+    params = {"departureId": "IST", "arrivalId": "BKK", "departureDate": "2026-01-02"}
+    first = synthetic_response("/flights/search-one-way", params)
+    assert first == synthetic_response("/flights/search-one-way", dict(params))
+    assert first != synthetic_response("/flights/search-one-way", dict(params, departureDate="2026-01-03"))
+
+    flights = first["data"]["topFlights"] + first["data"]["otherFlights"]
+    assert len(flights) == 12
+    assert [flight["price"] for flight in flights] == sorted(flight["price"] for flight in flights)
+
+
+def test_returning_flights_cost_at_least_the_outbound_price():
+    data = synthetic_response("/flights/roundtrip-returning", {"returningToken": "abc~500", "arrivalDate": "2026-01-05"})["data"]
+    assert all(flight["price"] >= 500 for flight in data["topFlights"] + data["otherFlights"])
+
+
+def test_error_injection_and_key_quota():
+    with MockFlightsAPI(latency=0.0, jitter=0.0, error_429=1.0, retry_after=0.5) as api:
+        response = requests.get(api.base_url + "/flights/search-one-way")
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "0.5"
+        assert (api.requests, api.errors) == (1, 1)
+
+    with MockFlightsAPI(latency=0.0, jitter=0.0, key_quota={"a": 1}) as api:
+        url = api.base_url + "/flights/search-one-way"
+        first = requests.get(url, headers={"x-rapidapi-key": "a"})
+        assert first.status_code == 200
+        assert first.headers["x-ratelimit-requests-remaining"] == "0"
+        assert requests.get(url, headers={"x-rapidapi-key": "a"}).status_code == 403
+        assert requests.get(url, headers={"x-rapidapi-key": "b"}).status_code == 403
+
+
+def test_run_scenario(mock_api):
+    search = dict(SEARCH, departureDateEnd="2026-01-03")
+    result = run_scenario(mock_api, "roundtrip-threads-8", SCENARIOS["roundtrip-threads-8"], search=search,
+                          measure_memory=False, with_metrics=True)
+
+    assert result["scenario"] == "roundtrip-threads-8"
+    assert result["requests"] > 0 and result["errors"] == 0
+    assert result["rows"] > 0
+    assert result["time_to_first_result_s"] is not None
+    assert "rows_s" in result
@@ -0,0 +1,58 @@
+from conftest import SEARCH
+from multi import (
+    MULTI_COLUMNS, multi_row_key, multi_search_params, multi_trips, parse_airports, route_label, run_multi_search
+)
+from sweep import iter_date_pairs
+
+
+def test_parse_airports():
+    assert parse_airports("ber, ham,BER,,prg ") == ["BER", "HAM", "PRG"]
+    assert parse_airports(["bkk", "HKT"]) == ["BKK", "HKT"]
+
+
+def test_trips_of_every_airport_combination():
+    trips = multi_trips(["BER", "HAM"], ["BKK", "HKT"], "2026-01-02", ["2026-01-10", "2026-01-12"])
+    assert len(trips) == 2 * 2 * 2
+    assert set(zip(trips["in_origin"], trips["in_destination"])) == {("BKK", "BER"), ("HKT", "BER"), ("BKK", "HAM"), ("HKT", "HAM")}
+    assert all((out_destination, out_origin) == (in_origin, in_destination) for out_origin, out_destination, in_origin, in_destination
+               in zip(trips["out_origin"], trips["out_destination"], trips["in_origin"], trips["in_destination"]))
+
+    open_jaw = multi_trips(["BER", "HAM"], ["BKK", "HKT"], "2026-01-02", ["2026-01-10", "2026-01-12"], openJaw=True)
+    assert len(open_jaw) == 2 * 2 * 4 * 2
+    assert trips["trip"].tolist() == list(range(len(trips)))
+
+    assert route_label("BER", "BKK", "BKK", "BER") == "BER-BKK"
+    assert route_label("BER", "BKK", "HKT", "HAM") == "BER-BKK/HKT-HAM"
+
+
+def test_search_params_and_row_keys():
+    args = ("2026-01-01", "2026-01-04", ["BER", "HAM"], ["BKK"], "1", "850", 16, 3, 5, 2)
+    assert multi_search_params(*args) != multi_search_params(*args, openJaw=True)
+    assert multi_search_params(*args)["departureIds"] == ["BER", "HAM"]
+
+    row = dict.fromkeys(MULTI_COLUMNS, "")
+    row.update({"Flight ID Outgoing": "TK 68", "Departure Date Outgoing": "2026-01-02", "Departure Time Outgoing": "10:00",
+                "Flight ID": "TK 69\n", "Departure Time Return": "2026-01-06 08:00"})
+    assert multi_row_key(dict(row, Route="BER-BKK")) != multi_row_key(dict(row, Route="HAM-BKK"))
+    assert multi_row_key(dict(row, Route="BER-BKK")).startswith("BER-BKK:")
+
+
+def test_every_leg_is_fetched_once(tmp_path, search_config, mock_api):
+    origins, destinations = ["IST", "SAW"], ["BKK", "HKT"]
+    pairs = list(iter_date_pairs(SEARCH["departureDateStart"], SEARCH["departureDateEnd"],
+                                 SEARCH["minDurationDays"], SEARCH["maxDurationDays"]))
+    legs = {(o, d, dep) for o in origins for d in destinations for dep, _ in pairs} \
+        | {(d, o, ret) for o in origins for d in destinations for _, ret in pairs}
+
+    mock_api.reset_counters()
+    df = run_multi_search(
+        "ist,saw", "BKK, HKT", SEARCH["departureDateStart"], SEARCH["departureDateEnd"], SEARCH["adults"],
+        SEARCH["maxPrice"], SEARCH["maxDuration"], SEARCH["minDurationDays"], SEARCH["maxDurationDays"], SEARCH["maxFlights"],
+        maxWorkers=4, fileName=str(tmp_path / "multi.csv"), config=search_config
+    )
+
+    assert mock_api.requests == len(legs)
+    assert list(df.columns) == MULTI_COLUMNS
+    assert set(df["Route"]) <= {"IST-BKK", "IST-HKT", "SAW-BKK", "SAW-HKT"} and df["Route"].nunique() > 1
+    assert df["Total Price"].is_monotonic_increasing
+    assert (df["Total Price"] <= float(SEARCH["maxPrice"])).all()
@@ -0,0 +1,78 @@
+import pandas as pd
+
+from mock_api import synthetic_response
+from normalize import NormalizedResults, entry_view, normalize_response, normalize_roundtrip
+from utilities import ENTRY_COLUMNS, add_entry_table, build_entry_row
+
+
+def _flights(endpoint, **params):
+    data = synthetic_response(f"/flights/{endpoint}", params)["data"]
+    return data["topFlights"] + data["otherFlights"]
+
+
+OUTGOING = _flights("search-roundtrip", departureId="IST", arrivalId="BKK", departureDate="2026-01-02")[:3]
+RETURNS = _flights("roundtrip-returning", arrivalDate="2026-01-09", returningToken="tok~300")[:4]
+
+
+def test_tables_are_typed():
+    itineraries, segments = normalize_response(
+        {"topFlights": OUTGOING[:1], "otherFlights": OUTGOING[1:]}, search_date="2026-01-09"
+    )
+    assert len(itineraries) == 3
+    assert len(segments) == sum(len(flight["segments"]) for flight in OUTGOING)
+    assert str(itineraries["price"].dtype) == "Int64"
+    assert str(itineraries["duration"].dtype) == "Int64"
+    assert str(itineraries["airline"].dtype) == "category"
+    assert str(segments["arrival_airport"].dtype) == "category"
+    assert str(segments["departure"].dtype).startswith("datetime64")
+
+
+def test_add_entry_table_view_equals_the_row_table():
+    for flight in RETURNS[:2] + [[]]:
+        # What add_entry_table returned before: a one-row frame of build_entry_row
+        expected = pd.DataFrame([build_entry_row(flight, OUTGOING[0], "2026-01-09")])[ENTRY_COLUMNS]
+        pd.testing.assert_frame_equal(add_entry_table(flight, OUTGOING[0], "2026-01-09"), expected, check_dtype=False)
+
+
+def test_entry_rows_equal_build_entry_row():
+    results = NormalizedResults()
+    expected = {}
+    for i, flight_outgoing in enumerate(OUTGOING):
+        # The last outgoing flight has no return flights
+        flights_return = RETURNS[i:] if i < 2 else []
+        parent_id, = results.add_flights([flight_outgoing], "outbound", "2026-01-09")
+        results.add_flights(flights_return, "return", "2026-01-09", parent_id)
+        expected[parent_id] = [
+            build_entry_row(flight_return, flight_outgoing, "2026-01-09") for flight_return in flights_return
+        ] or [build_entry_row([], flight_outgoing, "2026-01-09")]
+
+    rows = results.entry_rows()
+    assert rows == expected
+
+    # ... and entry_view is the same table
+    flat = [row for parent_rows in rows.values() for row in parent_rows]
+    view = entry_view(*results.tables())
+    pd.testing.assert_frame_equal(view, pd.DataFrame(flat)[ENTRY_COLUMNS], check_dtype=False)
+
+
+def test_flights_without_segments_or_duration():
+    outgoing = {"price": 300, "departureDate": "2026-01-02", "departureTime": "08:00", "airline": []}
+    flight_return = {"price": 650, "stops": 0, "departureDate": "2026-01-09", "departureTime": "10:00",
+                     "arrivalDate": "2026-01-09", "arrivalTime": "22:00"}
+
+    results = normalize_roundtrip(outgoing, [flight_return], "2026-01-09")
+    itineraries, segments = results.tables()
+    assert segments.empty
+    assert itineraries["num_segments"].tolist() == [0, 0]
+    assert itineraries["duration"].isna().all()
+
+    row, = results.entry_rows()[0]
+    assert row["Price"] == 650
+    assert row["Duration"] == "" and row["Duration Mins."] is None
+    assert row["Flight ID Outgoing"] is None and row["Flight ID"] == ""
+    assert row["_total_duration"] is None
+
+    view = entry_view(itineraries, segments)
+    assert view.loc[0, "Duration"] == ""
+    assert view.loc[0, "Price"] == 650
+    assert len(add_entry_table([], outgoing, "2026-01-09")) == 1
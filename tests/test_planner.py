@@ -0,0 +1,103 @@
+from cache import get_response_cache
+from conftest import SEARCH
+from main import run_flight_search
+from planner import CallBudget, PriorityScheduler, plan_search
+from sweep import coarse_pairs, iter_date_pairs
+from utilities import outgoing_request_path
+
+
+PAIRS = list(iter_date_pairs("2026-01-01", "2026-01-12", 3, 8))
+
+
+def test_call_budget_stops_at_its_limit():
+    budget = CallBudget(3)
+    assert [budget.spend() for _ in range(5)] == [True, True, True, False, False]
+    assert (budget.used, budget.remaining) == (3, 0)
+    assert budget.log_exhausted() and not budget.log_exhausted()
+
+
+def test_reservations_are_drawn_down_by_their_calls():
+    budget = CallBudget(10)
+    budget.reserve("a", 4)
+    assert budget.available == 6
+    keyed = budget.for_key("a")
+    keyed.spend()
+    keyed.spend()
+    assert (budget.used, budget.available) == (2, 6)
+    budget.release("a")
+    assert budget.available == 8
+
+
+def test_scheduler_order():
+    cheap = ("2026-01-05", "2026-01-11")
+    expensive = ("2026-01-11", "2026-01-14")
+    scheduler = PriorityScheduler(PAIRS, 3, 850, known_prices={cheap: 400, expensive: 900})
+    order = list(scheduler)
+
+    assert sorted(order) == sorted(PAIRS)
+    # The cheap cell's neighbourhood first (±2 days, ±2 days of trip length)
+    near_cheap = [pair for pair in order if pair[0] in ("2026-01-03", "2026-01-04", "2026-01-05", "2026-01-06", "2026-01-07")
+                  and 4 <= int(pair[1][-2:]) - int(pair[0][-2:]) <= 8]
+    assert order[:len(near_cheap)] == near_cheap
+    # Then the unexplored coarse grid, in date order
+    coarse = [pair for pair in coarse_pairs(PAIRS, 3) if pair not in near_cheap]
+    assert order[len(near_cheap):len(near_cheap) + 1] == coarse[:1]
+    # The over-priced neighbourhood last, in date order
+    near_expensive = [pair for pair in PAIRS if pair[0] >= "2026-01-09"
+                      and int(pair[1][-2:]) - int(pair[0][-2:]) <= 5]
+    assert order[-len(near_expensive):] == near_expensive
+
+
+def test_scheduler_observe_reorders_what_is_left():
+    scheduler = PriorityScheduler(PAIRS, 3, 850)
+    it = iter(scheduler)
+    first = next(it)
+    assert first == PAIRS[0]
+    scheduler.observe(("2026-01-08", "2026-01-13"), 300)
+    assert next(it)[0] in ("2026-01-06", "2026-01-07", "2026-01-08", "2026-01-09", "2026-01-10")
+
+
+def test_scheduler_stops_when_the_budget_cannot_pay_a_pair():
+    budget = CallBudget(10)
+    scheduler = PriorityScheduler(PAIRS, 3, 850, budget=budget, pair_cost=3)
+    handed_out = list(scheduler)
+    assert len(handed_out) == 3 and scheduler.cut_off
+
+    # Finishing a pair frees its unused reservation
+    scheduler = PriorityScheduler(PAIRS, 3, 850, budget=CallBudget(10), pair_cost=3)
+    it = iter(scheduler)
+    first = next(it)
+    scheduler.budget.for_key(first).spend()
+    scheduler.finish(first)
+    assert scheduler.budget.available == 9
+
+
+def test_plan_search_does_not_touch_the_cache(tmp_path):
+    config = {
+        "api": {"base_url": "https://flights.example", "headers": {}},
+        "cache": {"path": str(tmp_path / "cache.sqlite")},
+    }
+    kwargs = dict(SEARCH, isRoundtrip=False, departureId="ist, IST,sAW", arrivalId="BKK")
+
+    plan = plan_search(kwargs, config)
+    cache = get_response_cache()
+    origins = {unit["leg"][0] for unit in plan["units"] if unit["leg"][1] == "BKK"}
+    assert origins == {"IST", "SAW"}
+    assert plan["calls"] == plan["calls_max"] == len(plan["units"])
+
+    leg = plan["units"][0]["leg"]
+    path = outgoing_request_path(leg[0], leg[1], leg[2], leg[2], SEARCH["maxDuration"], SEARCH["maxPrice"], False)
+    cache.put(config["api"]["base_url"], path, {"topFlights": []})
+    accessed = cache._conn.execute("SELECT accessed_at FROM responses").fetchone()
+
+    plan = plan_search(kwargs, config)
+    assert plan["cached"] == 1 and plan["calls"] == plan["calls_max"] - 1
+    assert (cache.hits, cache.misses) == (0, 0)
+    assert cache._conn.execute("SELECT accessed_at FROM responses").fetchone() == accessed
+
+
+def test_search_stops_at_the_call_budget(tmp_path, search_config, mock_api):
+    mock_api.reset_counters()
+    df = run_flight_search(**SEARCH, maxCalls=7, maxWorkers=2, resume=False, fileName=str(tmp_path / "budget.csv"), config=search_config)
+    assert df.attrs["budget"]["used"] <= 7
+    assert mock_api.requests <= 7
@@ -0,0 +1,69 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from price_calendar import PriceCalendar
+from sweep import iter_date_pairs
+
+
+def _calendar():
+    return PriceCalendar(["2026-01-01", "2026-01-02", "2026-01-03"], [3, 4, 5])
+
+
+def test_grid_of_the_search():
+    calendar = PriceCalendar.for_search("2026-01-01", "2026-01-08", 3, 6)
+    pairs = list(iter_date_pairs("2026-01-01", "2026-01-08", 3, 6))
+    assert calendar.departure_dates == sorted({departureDate for departureDate, _ in pairs})
+    assert all(calendar.add(departureDate, returnDate, 100) for departureDate, returnDate in pairs)
+    assert calendar.count.sum() == len(pairs)
+    assert np.isnan(_calendar().min_price).all()
+
+
+def test_add_keeps_minimum_and_counts():
+    calendar = _calendar()
+    assert calendar.add("2026-01-01", "2026-01-05", 500, 700)
+    assert calendar.add("2026-01-01", "2026-01-05", 400, 800)
+    assert calendar.add("2026-01-01", "2026-01-05", math.nan, 650)
+    # Outside the grid
+    assert not calendar.add("2026-01-09", "2026-01-12", 100)
+    assert not calendar.add("2026-01-01", "2026-01-10", 100)
+
+    frame = calendar.to_frame()
+    assert frame.loc["2026-01-01", 4] == 400
+    assert calendar.to_frame("min_duration").loc["2026-01-01", 4] == 650
+    assert calendar.count.sum() == 3
+    assert calendar.cheapest(1) == [("2026-01-01", 4, 400.0)]
+
+
+def test_add_dataframe_matches_add_row():
+    rows = [
+        {"Price": 500, "Duration Mins.": 700, "Departure Date Outgoing": "2026-01-02", "Departure Time Return": "2026-01-05 08:00"},
+        {"Price": "450", "Duration Mins.": 800, "Departure Date Outgoing": "2026-01-02", "Departure Time Return": "2026-01-05 21:00"},
+        {"Price": 300, "Duration Mins.": 600, "Departure Date Outgoing": "2026-01-03", "Departure Time Return": "2026-01-08 10:00"},
+        {"Price": 100, "Duration Mins.": 600, "Departure Date Outgoing": "2026-02-03", "Departure Time Return": "2026-02-06 10:00"},
+    ]
+    by_row, by_frame = _calendar(), _calendar()
+    by_row.add_rows(rows)
+    by_frame.add_dataframe(pd.DataFrame(rows))
+
+    for values in ("min_price", "min_duration", "count"):
+        np.testing.assert_array_equal(getattr(by_row, values), getattr(by_frame, values))
+    assert by_row.count.sum() == 3
+
+
+def test_save_and_load(tmp_path):
+    calendar = _calendar()
+    calendar.add("2026-01-01", "2026-01-04", 400, 700)
+    calendar.add("2026-01-03", "2026-01-08", 350)
+    path = str(tmp_path / "search.calendar.npz")
+    calendar.save(path)
+
+    loaded = PriceCalendar.load(path)
+    assert loaded.departure_dates == calendar.departure_dates
+    assert loaded.trip_lengths == calendar.trip_lengths
+    for values in ("min_price", "min_duration", "count"):
+        np.testing.assert_array_equal(getattr(loaded, values), getattr(calendar, values))
+    # The loaded calendar keeps updating
+    assert loaded.add("2026-01-01", "2026-01-04", 300)
+    assert loaded.to_frame().loc["2026-01-01", 3] == 300
@@ -0,0 +1,54 @@
+import time
+from email.utils import formatdate
+
+import pytest
+
+from ratelimit import TokenBucket, parse_retry_after
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after({}) is None
+    assert parse_retry_after({"Retry-After": "2.5"}) == 2.5
+    assert parse_retry_after({"retry-after": "-3"}) == 0.0
+    assert parse_retry_after({"Retry-After": "soon"}) is None
+
+    later = parse_retry_after({"Retry-After": formatdate(time.time() + 30, usegmt=True)})
+    assert 25 < later <= 30
+    assert parse_retry_after({"Retry-After": formatdate(time.time() - 30, usegmt=True)}) == 0.0
+
+
+def test_burst_then_rate():
+    bucket = TokenBucket(rate=10, capacity=3)
+    # A full bucket serves its capacity without waiting ...
+    assert [bucket._reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # ... then callers queue up 1 / rate apart
+    waits = [bucket._reserve() for _ in range(3)]
+    assert waits[0] == pytest.approx(0.1, abs=0.01)
+    assert waits[2] == pytest.approx(0.3, abs=0.01)
+
+
+def test_throttle_halves_the_rate_and_pauses_everyone():
+    bucket = TokenBucket(rate=4, min_rate=1, increase=1)
+    pause = bucket.on_throttle({"Retry-After": "2"})
+    assert pause == 2
+    assert bucket.rate == 2
+    assert bucket.throttled == 1
+    assert bucket._reserve() == pytest.approx(2, abs=0.05)
+
+    bucket.on_throttle()
+    bucket.on_throttle()
+    assert bucket.rate == 1  # never below min_rate
+
+    for _ in range(10):
+        bucket.on_success()
+    assert bucket.rate == 4  # back up to, not above, the configured rate
+
+
+def test_exhausted_quota_pauses_until_reset():
+    bucket = TokenBucket(rate=5, max_pause=60)
+    assert bucket.update_from_headers({"x-ratelimit-requests-remaining": "3"}) == 0.0
+    pause = bucket.update_from_headers({
+        "x-ratelimit-requests-remaining": "0", "x-ratelimit-requests-reset": "120"
+    })
+    assert pause == 60
@@ -0,0 +1,99 @@
+import pandas as pd
+
+from results import ResultSink, filter_and_sort, prepare_results
+from utilities import ENTRY_COLUMNS
+
+
+def _rows(n, start=0):
+    # Multi-segment cells contain newlines, like real return flights
+    return [dict.fromkeys(ENTRY_COLUMNS, "") | {"Price": start + i, "Flight ID": f"{i}\n{i + 1}\n"} for i in range(n)]
+
+
+def test_flush_appends_only_new_rows(tmp_path):
+    fileName = str(tmp_path / "flights.csv")
+    with ResultSink(fileName) as sink:
+        assert list(pd.read_csv(fileName).columns) == ENTRY_COLUMNS
+
+        sink.extend(_rows(3))
+        assert pd.read_csv(fileName).empty
+        sink.flush()
+        sink.flush()
+        assert len(pd.read_csv(fileName)) == 3
+
+        sink.extend(_rows(2, start=3))
+    df = pd.read_csv(fileName)
+    assert df["Price"].tolist() == [0, 1, 2, 3, 4]
+    assert df["Flight ID"].tolist()[:2] == ["0\n1\n", "1\n2\n"]
+    assert sink.to_dataframe()["Price"].tolist() == [0, 1, 2, 3, 4]
+
+
+def test_streaming_only_keeps_no_rows(tmp_path):
+    fileName = str(tmp_path / "flights.csv")
+    with ResultSink(fileName, keep_rows=False) as sink:
+        sink.extend(_rows(4))
+        assert sink.rows == [] and sink.row_count == 4
+    assert len(pd.read_csv(fileName)) == 4
+
+
+def test_append_continues_a_file(tmp_path):
+    fileName = str(tmp_path / "flights.csv")
+    with ResultSink(fileName) as sink:
+        sink.extend(_rows(3))
+
+    with ResultSink(fileName, append=True) as sink:
+        assert sink.row_count == 3
+        sink.extend(_rows(2, start=3))
+        assert sink.row_count == 5
+        assert sink.to_dataframe()["Price"].tolist() == [0, 1, 2, 3, 4]
+    assert pd.read_csv(fileName)["Price"].tolist() == [0, 1, 2, 3, 4]
+
+    # Without append the file starts over
+    with ResultSink(fileName) as sink:
+        assert sink.row_count == 0
+    assert pd.read_csv(fileName).empty
+
+
+def test_streaming_append_counts_the_existing_rows(tmp_path):
+    fileName = str(tmp_path / "flights.csv")
+    with ResultSink(fileName) as sink:
+        sink.extend(_rows(3))
+
+    with ResultSink(fileName, keep_rows=False, append=True) as sink:
+        assert sink.row_count == 3
+        sink.extend(_rows(2, start=3))
+        assert sink.rows == [] and sink.row_count == 5
+    assert pd.read_csv(fileName)["Price"].tolist() == [0, 1, 2, 3, 4]
+
+
+def _table():
+    return pd.DataFrame({
+        "Price": ["500", "300", "700", ""],
+        "Duration Mins.": [600, 905, 480, 700],
+        "Stops": [0, 1, "", 2],
+        "Airline Outgoing": ["Turkish Airlines", "Emirates", "Turkish Airlines", "Qatar Airways"],
+        "Airline": ["Turkish Airlines\n", "Emirates\nThai Airways\n", "", "Qatar Airways\n"],
+        "Departure Date Outgoing": ["2026-01-02", "2026-01-02", "2026-01-03", "2026-01-03"],
+        "Departure Time Return": ["2026-01-05 08:00", "2026-01-06 09:00", "2026-01-06", "2026-01-07 10:00"],
+    })
+
+
+def test_prepare_results_types_and_derives_columns():
+    df = prepare_results(_table())
+    assert df["Price"].tolist()[:3] == [500, 300, 700] and pd.isna(df["Price"].iloc[3])
+    assert df["duration_hours"].tolist() == ["10h 0m", "15h 5m", "8h 0m", "11h 40m"]
+    assert str(df["Stops"].dtype) == "Int64"
+    assert df["_airlines"].iloc[1] == {"Emirates", "Thai Airways"}
+    assert df["_trip_days"].tolist() == [3, 4, 3, 4]
+
+
+def test_filter_and_sort_on_the_prepared_frame():
+    df = prepare_results(_table())
+
+    assert filter_and_sort(df, 1000, [], [], "Price")["Price"].tolist() == [300, 500, 700]
+    # Sorting by the display duration sorts by minutes
+    assert filter_and_sort(df, 1000, [], [], "duration_hours")["Duration Mins."].tolist() == [480, 600, 905]
+    assert filter_and_sort(df, 550, [], [], "Price")["Price"].tolist() == [300, 500]
+    assert filter_and_sort(df, 1000, [1, 2], [], "Price")["Price"].tolist()[0] == 300
+    assert filter_and_sort(df, 1000, [], ["Thai Airways"], "Price")["Price"].tolist() == [300]
+    assert filter_and_sort(df, 1000, [], [], "Price", cell=("2026-01-03", 3))["Price"].tolist() == [700]
+    assert "_airlines" not in filter_and_sort(df, 1000, [], [], "Price").columns
@@ -0,0 +1,44 @@
+import time
+
+import pandas as pd
+
+from conftest import SEARCH
+from main import iter_flight_search, run_flight_search
+
+
+def _sorted(df):
+    df = df.astype(str)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def test_thread_pool_matches_sequential_search(tmp_path, search_config, mock_api):
+    for isRoundtrip in (True, False):
+        results = {}
+        for maxWorkers in (1, 8):
+            results[maxWorkers] = run_flight_search(
+                **SEARCH, isRoundtrip=isRoundtrip, maxWorkers=maxWorkers, resume=False,
+                fileName=str(tmp_path / f"{isRoundtrip}_{maxWorkers}.csv"), config=search_config
+            )
+
+        assert len(results[1])
+        pd.testing.assert_frame_equal(_sorted(results[8]), _sorted(results[1]))
+        # Rows come out in the same (pair) order, not just as the same set
+        pd.testing.assert_frame_equal(results[8].astype(str), results[1].astype(str))
+
+
+def test_leaving_a_search_early_stops_its_requests(tmp_path, search_config, mock_api):
+    wide = dict(SEARCH, departureDateEnd="2026-01-20", maxDurationDays=8)
+    mock_api.reset_counters()
+    search = iter_flight_search(**wide, maxWorkers=8, resume=False,
+                                fileName=str(tmp_path / "early.csv"), config=search_config)
+    next(search)
+    search.close()
+    # Queued requests are cancelled: at most the ones already running still reach the API
+    time.sleep(0.2)
+    early = mock_api.requests
+    time.sleep(0.2)
+    assert mock_api.requests == early
+
+    mock_api.reset_counters()
+    run_flight_search(**wide, maxWorkers=8, resume=False, fileName=str(tmp_path / "full.csv"), config=search_config)
+    assert early < mock_api.requests
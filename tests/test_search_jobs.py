@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+import pandas as pd
+
+from conftest import SEARCH
+from main import iter_flight_search
+from search_jobs import SearchJob, SearchJobManager
+
+
+def test_identical_searches_share_a_job(tmp_path):
+    manager = SearchJobManager(job_dir=str(tmp_path), max_concurrent=1)
+    manager._pool.shutdown()
+    submitted = []
+    manager._pool = SimpleNamespace(submit=lambda *args: submitted.append(args))  # jobs stay queued
+
+    first = manager.submit(**SEARCH, maxWorkers=4)
+    assert manager.submit(**SEARCH, maxWorkers=8) is first
+    assert first.subscribers == 2
+    assert manager.find(**SEARCH) is first
+    assert manager.get(first.id) is first
+    assert manager.submit(**dict(SEARCH, maxPrice="900")) is not first
+    assert len(submitted) == 2
+
+
+def test_resumed_top_k_job_serves_only_its_own_rows(tmp_path, search_config, mock_api):
+    kwargs = dict(SEARCH, topK=3)
+    fileName = str(tmp_path / "top.csv")
+
+    # Interrupted run: a few pairs written to the CSV
+    search = iter_flight_search(config=search_config, fileName=fileName, maxWorkers=1, resume=False, **kwargs)
+    for _ in range(3):
+        next(search)
+    search.close()
+    previous = len(pd.read_csv(fileName))
+    assert previous > 0
+
+    job = SearchJob("resumed", dict(kwargs, resume=True))
+    job._run(search_config, fileName, 1)
+    assert job.status == "done", job.error
+
+    written = pd.read_csv(fileName)
+    assert job.row_count == len(written) - previous > 0
+    new_rows = written.iloc[previous:].reset_index(drop=True)
+    pd.testing.assert_frame_equal(pd.DataFrame(job.rows_since(0)), new_rows, check_dtype=False)
+    pd.testing.assert_frame_equal(pd.DataFrame(job.rows_since(2)), new_rows.iloc[2:].reset_index(drop=True), check_dtype=False)
+    assert job.rows_since(job.row_count) == []
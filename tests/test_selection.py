@@ -0,0 +1,92 @@
+import pandas as pd
+
+from selection import ParetoFront, ResultSelector, TopK
+from utilities import TOTAL_DURATION, TOTAL_STOPS, build_entry_row
+
+
+def _row(price, duration=600, stops=0, name=None, total_stops=None):
+    return {
+        "Price": price, TOTAL_DURATION: duration, "Duration Mins.": duration // 2,
+        "Stops": stops, TOTAL_STOPS: stops if total_stops is None else total_stops, "name": name,
+    }
+
+
+def test_top_k_keeps_the_cheapest_rows_in_order():
+    top = TopK(3)
+    top.extend(_row(price, name=i) for i, price in enumerate([500, 300, 700, 300, 100, 900, None]))
+
+    assert [row["Price"] for row in top.rows()] == [100, 300, 300]
+    # Ties keep the row that came first
+    assert [row["name"] for row in top.rows()] == [4, 1, 3]
+    assert top.threshold == 300
+    assert top.could_improve(299) and not top.could_improve(300)
+
+
+def test_top_k_largest():
+    top = TopK(2, by="Stops", largest=True)
+    top.extend(_row(100, stops=stops) for stops in [0, 2, "", 1])
+    assert [row["Stops"] for row in top.rows()] == [2, 1]
+
+
+def test_pareto_front_drops_dominated_rows():
+    front = ParetoFront()
+    cheap_slow = _row(300, duration=1500, stops=1)
+    fast = _row(600, duration=900, stops=0)
+    assert front.add(cheap_slow)
+    assert front.add(fast)
+    # Worse than cheap_slow on price and duration, equal stops
+    assert not front.add(_row(350, duration=1600, stops=1))
+    # Dominates cheap_slow
+    assert front.add(_row(300, duration=1400, stops=1))
+
+    assert [(row["Price"], row[TOTAL_DURATION]) for row in front.rows()] == [(300, 1400), (600, 900)]
+
+
+def test_pareto_front_ranks_total_trip_duration():
+    # Same return flight, the first outbound is much longer: only the total tells them apart
+    front = ParetoFront()
+    front.add(_row(400, duration=1600))
+    front.add(_row(400, duration=1200))
+    assert [row[TOTAL_DURATION] for row in front.rows()] == [1200]
+
+
+def test_pareto_front_ranks_total_stops():
+    # Same nonstop return flight, the first outbound has two stops
+    front = ParetoFront()
+    front.add(_row(400, stops=0, total_stops=2))
+    front.add(_row(400, stops=0, total_stops=1))
+    assert [row[TOTAL_STOPS] for row in front.rows()] == [1]
+
+
+def test_entry_rows_carry_the_total_stops():
+    segment = {"flightId": "TK 68", "airline": {"airlineCode": "TK", "flightNumber": "68", "airlineName": "Turkish Airlines"},
+               "arrivalAirportCode": "BKK", "arrivalTime": "06:00"}
+    outgoing = {"departureDate": "2026-01-02", "departureTime": "10:00", "duration": 600, "price": 400, "stops": 1,
+                "airline": [{"airlineName": "Turkish Airlines"}], "segments": [segment]}
+    returning = dict(outgoing, stops=2, departureDate="2026-01-06", arrivalDate="2026-01-07", arrivalTime="06:00")
+
+    assert build_entry_row(returning, outgoing, "2026-01-06")[TOTAL_STOPS] == 3
+    assert build_entry_row([], outgoing, "2026-01-06")[TOTAL_STOPS] == 1
+    assert build_entry_row(returning, dict(outgoing, stops=None), "2026-01-06")[TOTAL_STOPS] is None
+
+
+def test_pareto_front_of_csv_rows_uses_the_return_duration():
+    front = ParetoFront()
+    front.add({"Price": 400, "Duration Mins.": 700, "Stops": 0})
+    front.add({"Price": 400, "Duration Mins.": 600, "Stops": 0})
+    assert len(front) == 1
+    # ... and the return stops
+    front.add({"Price": 400, "Duration Mins.": 600, "Stops": 1})
+    assert [row["Stops"] for row in front.rows()] == [0]
+
+
+def test_selector_prunes_only_a_full_price_top_k():
+    selector = ResultSelector(top_k=2)
+    assert not selector.prunes(1000)
+    selector.extend([_row(300), _row(500)])
+    assert selector.prunes(500) and not selector.prunes(499)
+    assert isinstance(selector.to_dataframe(), pd.DataFrame)
+
+    with_front = ResultSelector(top_k=2, pareto=True)
+    with_front.extend([_row(300), _row(500)])
+    assert not with_front.prunes(10 ** 6)
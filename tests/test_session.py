@@ -0,0 +1,39 @@
+from main import setup_search_services
+from utilities import get_request, get_session, setup_session
+
+
+def _pool(session):
+    return session.get_adapter("http://")._pool_maxsize
+
+
+def test_same_settings_keep_the_session():
+    session = setup_session({"timeout": 30}, default_pool_size=10)
+    assert setup_session({"timeout": 30}, default_pool_size=4) is session
+    assert get_session() is session
+
+
+def test_bigger_pool_grows_the_live_session():
+    session = setup_session({"timeout": 31}, default_pool_size=10)
+    assert setup_session({"timeout": 31}, default_pool_size=32) is session
+    assert _pool(session) == 32
+
+
+def test_other_settings_replace_without_closing(mock_api):
+    old = setup_session({"timeout": 32})
+    new = setup_session({"timeout": 33})
+    assert new is not old
+    # A search still holding the old session can keep using it
+    assert old.get(mock_api.base_url + "/flights/search-one-way?departureId=IST").status_code == 200
+
+
+def test_calls_reuse_one_connection(search_config, mock_api):
+    setup_search_services(search_config, maxWorkers=1)
+    session = setup_session({"pool_size": 4, "keep_alive": True})
+
+    for day in range(1, 6):
+        data = get_request(mock_api.base_url, f"/flights/search-one-way?departureId=IST&arrivalId=BKK&departureDate=2026-01-0{day}",
+                           search_config["api"]["headers"])
+        assert data["topFlights"]
+
+    pools = list(session.get_adapter(mock_api.base_url).poolmanager.pools._container.values())
+    assert [pool.num_connections for pool in pools] == [1]
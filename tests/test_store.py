@@ -0,0 +1,122 @@
+import json
+
+import cache
+import keypool
+import store as store_module
+from conftest import SEARCH
+from main import run_flight_search
+from store import PriceStore, itinerary_key, itinerary_price, setup_price_store
+from utilities import TOTAL_PRICE, build_entry_row
+
+
+def _segment(flightId, arrival, time="10:00"):
+    return {
+        "flightId": flightId, "arrivalAirportCode": arrival, "arrivalTime": time,
+        "airline": {"airlineCode": "TK", "flightNumber": str(flightId), "airlineName": "Turkish Airlines"},
+    }
+
+
+def _flight(flightIds, date, time="08:00", price=400, duration=600):
+    return {
+        "departureDate": date, "departureTime": time, "arrivalDate": date, "arrivalTime": "23:00",
+        "price": price, "duration": duration, "stops": len(flightIds) - 1,
+        "airline": [{"airlineName": "Turkish Airlines"}],
+        "segments": [_segment(flightId, "BKK") for flightId in flightIds],
+    }
+
+
+def test_itinerary_key_tells_itineraries_apart():
+    outgoing = _flight([100], "2026-01-02")
+    # Connections sharing their first segment
+    via_doh = _flight([100, 200], "2026-01-02")
+    via_dxb = _flight([100, 300], "2026-01-02")
+    later = _flight([100], "2026-01-02", time="20:00")
+    back = _flight([500], "2026-01-09")
+    back_via = _flight([500, 600], "2026-01-09")
+    back_later = _flight([500], "2026-01-09", time="21:00")
+
+    rows = [
+        build_entry_row(back, outgoing, "2026-01-09"),
+        build_entry_row(back, via_doh, "2026-01-09"),
+        build_entry_row(back, via_dxb, "2026-01-09"),
+        build_entry_row(back, later, "2026-01-09"),
+        build_entry_row(back_via, outgoing, "2026-01-09"),
+        build_entry_row(back_later, outgoing, "2026-01-09"),
+    ]
+    keys = [itinerary_key(row) for row in rows]
+    assert len(set(keys)) == len(rows)
+
+    # Stable for the same itinerary, different for a one-way pair of tickets
+    assert itinerary_key(build_entry_row(back, via_doh, "2026-01-09")) == keys[1]
+    assert itinerary_key(rows[1], roundtrip=False) != keys[1]
+
+
+def test_repeated_rows_deduplicate_into_one_itinerary(tmp_path):
+    store = PriceStore(str(tmp_path / "prices.sqlite"))
+    rows = [
+        build_entry_row(_flight([500], "2026-01-09", price=price), _flight([100, 200], "2026-01-02"), "2026-01-09")
+        for price in (450, 420)
+    ]
+    rows.append(build_entry_row(_flight([500], "2026-01-09"), _flight([100, 300], "2026-01-02"), "2026-01-09"))
+
+    for row in rows:
+        store.add_rows([row], "IST", "BKK")
+
+    stats = store.stats()
+    assert stats["itineraries"] == 2
+    assert stats["observations"] == 3
+    assert store.cheapest("IST", "BKK")["min_price"].tolist() == [400, 420]
+    store.close()
+
+
+def test_itinerary_price():
+    assert itinerary_price({"Price": "512"}) == 512.0
+    assert itinerary_price({"Price": 300, TOTAL_PRICE: 700}) == 700.0
+    assert itinerary_price({"Price": ""}) is None
+
+
+def test_one_way_itineraries_store_the_fare_of_both_tickets(tmp_path, search_config, mock_api):
+    config = dict(search_config, store={"path": str(tmp_path / "prices.sqlite")})
+    df = run_flight_search(**SEARCH, isRoundtrip=False, maxWorkers=2, resume=False,
+                           fileName=str(tmp_path / "oneway.csv"), config=config)
+    stored = setup_price_store(config["store"])._conn.execute("SELECT price, row FROM itineraries WHERE roundtrip = 0").fetchall()
+
+    assert len(stored) == len(df) > 0
+    # Each row's Price is its inbound leg's; the store has outbound + inbound
+    for price, row in stored:
+        row = json.loads(row)
+        assert price == row[TOTAL_PRICE] > float(row["Price"])
+        assert price <= float(SEARCH["maxPrice"])
+
+
+def test_setup_swaps_the_store_without_closing_it(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_module, "_price_store", None)
+    monkeypatch.setattr(store_module, "_price_store_config", None)
+
+    first = setup_price_store({"path": str(tmp_path / "a.sqlite")})
+    assert setup_price_store({"path": str(tmp_path / "a.sqlite")}) is first
+    second = setup_price_store({"path": str(tmp_path / "b.sqlite")})
+    assert second is not first and store_module.get_price_store() is second
+
+    # A search still holding the old store can keep writing to it
+    row = build_entry_row(_flight([500], "2026-01-09"), _flight([100], "2026-01-02"), "2026-01-09")
+    first.add_rows([row], "IST", "BKK")
+    assert first.stats()["itineraries"] == 1
+    assert setup_price_store(None) is None
+
+
+def test_cache_and_key_pool_are_swapped_without_closing_them(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_response_cache", None)
+    monkeypatch.setattr(cache, "_response_cache_config", None)
+    old_cache = cache.setup_response_cache({"path": str(tmp_path / "a.sqlite")})
+    cache.setup_response_cache({"path": str(tmp_path / "b.sqlite")})
+    old_cache.put("https://flights.example", "/flights/search-one-way?x=1", {"topFlights": []})
+    assert old_cache.stats()["entries"] == 1
+
+    monkeypatch.setattr(keypool, "_key_pool", None)
+    monkeypatch.setattr(keypool, "_key_pool_config", None)
+    old_pool = keypool.setup_key_pool({"keys": ["a"]}, {"usage_path": str(tmp_path / "usage.sqlite")})
+    keypool.setup_key_pool({"keys": ["b"]}, {"usage_path": str(tmp_path / "usage.sqlite")})
+    fingerprint, _ = old_pool.acquire()
+    old_pool.on_response(fingerprint, 200)
+    assert old_pool.usage()[fingerprint]["used"] == 1
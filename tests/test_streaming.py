@@ -0,0 +1,44 @@
+import pandas as pd
+
+from conftest import SEARCH
+from main import iter_flight_search
+from utilities import ENTRY_COLUMNS
+
+
+def _drain(search):
+    batches = []
+    while True:
+        try:
+            batches.append(next(search))
+        except StopIteration as done:
+            return batches, done.value
+
+
+def test_batches_add_up_to_the_result(tmp_path, search_config):
+    for isRoundtrip in (True, False):
+        batches, df = _drain(iter_flight_search(
+            **SEARCH, isRoundtrip=isRoundtrip, maxWorkers=4, resume=False,
+            fileName=str(tmp_path / f"{isRoundtrip}.csv"), config=search_config
+        ))
+
+        rows = [row for batch in batches for row in batch["rows"]]
+        pd.testing.assert_frame_equal(pd.DataFrame(rows, columns=ENTRY_COLUMNS), df)
+
+        totals = [batch["rows_total"] for batch in batches]
+        assert totals == sorted(totals) and totals[-1] == len(df)
+        assert sum(batch["pair_done"] for batch in batches) == batches[-1]["pairs_total"]
+        assert batches[-1]["pairs_done"] == batches[-1]["pairs_total"]
+        # Each batch's rows belong to its date pair
+        for batch in batches:
+            assert all(row["Departure Date Outgoing"] == batch["departureDate"] for row in batch["rows"])
+
+
+def test_first_rows_arrive_before_the_search_ends(tmp_path, search_config, mock_api):
+    mock_api.reset_counters()
+    search = iter_flight_search(**dict(SEARCH, departureDateEnd="2026-01-10"), maxWorkers=1, resume=False,
+                                fileName=str(tmp_path / "flights.csv"), config=search_config)
+    batch = next(search)
+    first = mock_api.requests
+    assert batch["rows"] and batch["pairs_done"] < batch["pairs_total"]
+    _drain(search)
+    assert first < mock_api.requests
@@ -0,0 +1,58 @@
+from conftest import SEARCH
+from main import run_flight_search
+from sweep import coarse_pairs, iter_date_pairs, refine_pairs, sweep_report
+
+
+ALL_PAIRS = list(iter_date_pairs("2026-01-01", "2026-01-12", 3, 8))
+
+
+def test_date_grid():
+    assert ALL_PAIRS[:2] == [("2026-01-02", "2026-01-05"), ("2026-01-02", "2026-01-06")]
+    assert len(ALL_PAIRS) == 10 * 5
+    assert all(departure < "2026-01-12" for departure, _ in ALL_PAIRS)
+
+
+def test_coarse_pass_samples_the_grid_with_its_edges():
+    coarse = coarse_pairs(ALL_PAIRS, 3, step=3)
+    departures = sorted({departure for departure, _ in coarse})
+    assert departures == ["2026-01-02", "2026-01-05", "2026-01-08", "2026-01-11"]
+    # Trip lengths 3, 6 and the longest, 7
+    assert {("2026-01-02", "2026-01-05"), ("2026-01-02", "2026-01-08"), ("2026-01-02", "2026-01-09")} <= set(coarse)
+    assert len(coarse) == 4 * 3
+    assert coarse == [pair for pair in ALL_PAIRS if pair in set(coarse)]
+
+
+def test_refine_pass_searches_around_the_cheapest_cells():
+    coarse = coarse_pairs(ALL_PAIRS, 3, step=3)
+    prices = {pair: 800 for pair in coarse}
+    prices[("2026-01-05", "2026-01-11")] = 300   # cheap cell: day 3, length 6
+    prices[("2026-01-11", "2026-01-14")] = 900   # above maxPrice: never a seed
+    prices[("2026-01-02", "2026-01-05")] = None  # nothing found
+
+    refine = refine_pairs(ALL_PAIRS, 3, prices, set(coarse), 850, step=3, topCells=1)
+
+    assert refine and not set(refine) & set(coarse)
+    # Every refined pair is within 2 days of the cheap cell on both axes
+    for departure, returning in refine:
+        assert abs(int(departure[-2:]) - 5) <= 2
+        assert abs((int(returning[-2:]) - int(departure[-2:])) - 6) <= 2
+
+    report = sweep_report(ALL_PAIRS, set(coarse) | set(refine))
+    assert report["pairs_searched"] + report["pairs_skipped"] == len(ALL_PAIRS)
+    assert 0 < report["skipped_fraction"] < 1
+
+
+def test_smart_sweep_skips_part_of_the_grid(tmp_path, search_config, mock_api):
+    search = dict(SEARCH, departureDateEnd="2026-01-12", maxDurationDays=8)
+    mock_api.reset_counters()
+    df = run_flight_search(**search, sweep="smart", maxWorkers=4, resume=False,
+                           fileName=str(tmp_path / "smart.csv"), config=search_config)
+    smart_requests = mock_api.requests
+
+    mock_api.reset_counters()
+    full = run_flight_search(**search, maxWorkers=4, resume=False, fileName=str(tmp_path / "full.csv"), config=search_config)
+
+    assert df.attrs["sweep"]["pairs_skipped"] > 0
+    assert smart_requests < mock_api.requests
+    # The cheapest flight is still found
+    assert df["Price"].min() == full["Price"].min()
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+
+from conftest import SEARCH
+from sweep import iter_date_pairs
+from watch import AlertSink, PriceWatch, WatchState, cell_ttl, diff_prices
+
+
+# The watched grid (January 2026) seen from a month before
+NOW = datetime(2025, 12, 1).timestamp()
+DAY = 86400
+
+
+def test_cell_ttl_shrinks_near_departure():
+    assert cell_ttl("2026-01-01", 21600, 1800, 14, now=NOW) == 21600
+    near = cell_ttl("2025-12-08", 21600, 1800, 14, now=NOW)
+    assert 1800 < near < 21600
+    assert cell_ttl("2025-12-01", 21600, 1800, 14, now=NOW) == 1800
+    assert cell_ttl("2025-11-30", 21600, 1800, 14, now=NOW) is None
+
+
+def test_diff_prices():
+    changes = diff_prices({"a": 500, "b": 600, "c": 700}, {"a": 450, "b": 650, "d": 300})
+    assert {change["itinerary"]: change["change"] for change in changes} == {"a": "drop", "b": "rise", "c": "gone", "d": "new"}
+
+
+@pytest.fixture
+def watch(tmp_path, search_config, mock_api):
+    state = WatchState(str(tmp_path / "watch.sqlite"))
+    spec = dict(SEARCH, name="ist-bkk")
+    yield PriceWatch(spec, search_config, state, AlertSink(log=False, file=str(tmp_path / "alerts.jsonl")),
+                     out_dir=str(tmp_path / "out"), ttl=6 * 3600, alert_below=600)
+    state.close()
+
+
+def test_plan_orders_never_fetched_then_most_overdue(watch):
+    pairs = list(iter_date_pairs(SEARCH["departureDateStart"], SEARCH["departureDateEnd"],
+                                 SEARCH["minDurationDays"], SEARCH["maxDurationDays"]))
+    watch.state.save_cell(watch.id, *pairs[0], {"x": 500}, fetched_at=NOW - 7 * 3600)
+    watch.state.save_cell(watch.id, *pairs[1], {"x": 500}, fetched_at=NOW - 12 * 3600)
+    watch.state.save_cell(watch.id, *pairs[2], {"x": 500}, fetched_at=NOW - 3600)
+
+    stale, fresh, past = watch.plan(NOW)
+    assert (fresh, past) == (1, 0)
+    assert stale[-2:] == [pairs[1], pairs[0]]
+    assert set(stale[:-2]) == set(pairs[3:])
+
+    watch.max_cells = 2
+    assert len(watch.plan(NOW)[0]) == 2
+
+
+def test_tick_refreshes_only_stale_cells(watch, mock_api):
+    first = watch.tick(NOW)
+    cells = len(watch.state.cells(watch.id))
+    assert first["cells_refreshed"] == cells > 0 and first["cells_failed"] == 0
+    assert first["alerts"] and all(alert["price"] < 600 and alert["old"] is None for alert in first["alerts"])
+
+    # Everything is fresh an hour later: no API calls
+    mock_api.reset_counters()
+    second = watch.tick(NOW + 3600)
+    assert (second["cells_refreshed"], second["cells_fresh"], mock_api.requests) == (0, cells, 0)
+
+    # A day later every cell is stale again; the mock's prices haven't moved
+    third = watch.tick(NOW + DAY)
+    assert third["cells_refreshed"] == cells
+    assert (third["changes"], third["alerts"]) == (0, [])
@@ -1,11 +1,19 @@
-import http.client
 import json
-import pandas as pd
 from datetime import datetime, timedelta
-import requests # Ensure requests is imported
 #from IPython.display import display, HTML
 import time
 import random
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from cache import get_response_cache
+from ratelimit import get_rate_limiter
+from keypool import get_key_pool
+from decode import loads, compact_data
+from manifest import flight_key
+import metrics
+
+# pandas and requests are imported where they are used, so that light
+# entry points (cli.py --help, dry runs, cache commands) start fast.
 
 # Optional token variable (comment out if not used)
 # retTok = "your_token_here"
@@ -34,15 +42,182 @@ def pretty_print(df):
    return display( HTML( df.to_html().replace("\\n","<br>") ) )
 
 
+#########################################
+#             get_session               #
+#########################################
+
+_session = None
+_session_timeout = 60
+_session_settings = None
+_log_requests = False
+_session_lock = threading.Lock()
+
+
+class _Http2Response:
+    """Wraps an httpx response so raise_for_status raises requests' HTTPError."""
+
+    def __init__(self, response):
+        self._response = response
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def raise_for_status(self):
+        import requests
+        if self._response.is_error:
+            raise requests.exceptions.HTTPError(
+                f"{self._response.status_code} Error for url: {self._response.url}"
+            )
+
+
+class _Http2Session:
+    """
+    Minimal requests.Session stand-in on top of an HTTP/2 httpx.Client.
+    httpx errors are translated so get_request's error handling is unchanged.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, url, headers=None, timeout=None):
+        import httpx
+        import requests
+        try:
+            return _Http2Response(self.client.get(url, headers=headers, timeout=timeout))
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e))
+        except httpx.HTTPError as e:
+            raise requests.exceptions.RequestException(str(e))
+
+    def close(self):
+        self.client.close()
+
+
+def setup_session(http_config=None, default_pool_size=10):
+    """
+    Creates the shared keep-alive HTTP session used by get_request from the
+    'http' section of config.json:
+        pool_size   – connections kept open per host (default: default_pool_size)
+        keep_alive  – reuse connections between calls (default True)
+        http2       – use an HTTP/2 httpx client if httpx[http2] is installed
+        timeout     – request timeout in seconds (default 60)
+        log_requests – print every request URL (default False: only retries and errors)
+    An existing session with the same settings and at least as many pooled
+    connections is kept, so concurrent searches don't close each other's
+    session. A larger pool_size mounts bigger adapters on the live session;
+    other changed settings replace it without closing the old one, which
+    searches still running may be using (it is dropped once they're done).
+    """
+    global _session, _session_timeout, _session_settings, _log_requests
+    import requests
+
+    http_config = http_config or {}
+    pool_size = int(http_config.get('pool_size', default_pool_size))
+    keep_alive = http_config.get('keep_alive', True)
+    settings = json.dumps({k: v for k, v in http_config.items() if k != 'pool_size'}, sort_keys=True)
+
+    with _session_lock:
+        if _session is not None:
+            current_settings, current_pool_size = _session_settings
+            if current_settings == settings and current_pool_size >= pool_size:
+                return _session
+            if current_settings == settings and isinstance(_session, requests.Session):
+                # Requests already running keep their connections from the old adapter
+                _mount_adapter(_session, pool_size)
+                _session_settings = (settings, pool_size)
+                return _session
+        _session_settings = (settings, pool_size)
+
+        _session_timeout = http_config.get('timeout', 60)
+        _log_requests = http_config.get('log_requests', False)
+        _session = None
+
+        if http_config.get('http2'):
+            try:
+                import httpx
+                import h2  # noqa: F401  (required by httpx for HTTP/2)
+                limits = httpx.Limits(
+                    max_connections=pool_size,
+                    max_keepalive_connections=pool_size if keep_alive else 0
+                )
+                _session = _Http2Session(httpx.Client(http2=True, limits=limits))
+            except ImportError:
+                print("[WARNING] http2 requested but httpx[http2] is not installed. Using HTTP/1.1.")
+
+        if _session is None:
+            session = requests.Session()
+            _mount_adapter(session, pool_size)
+            if not keep_alive:
+                session.headers['Connection'] = 'close'
+            _session = session
+
+        return _session
+
+
+def _mount_adapter(session, pool_size):
+    import requests
+
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=0
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def get_session():
+    """Returns the shared HTTP session, creating one with default settings if needed."""
+    if _session is None:
+        setup_session()
+    return _session
+
+
 #########################################
 #             get_request               #
 #########################################
 
-def get_request(base_url, endpoint_path, headers, retTok=None, max_retries=5):
+class FailedResponse(list):
+    """
+    Empty result returned by get_request when all retries failed.
+    Behaves like [] for existing callers, but lets checkpointing code tell
+    a failed call apart from a search that simply found nothing.
+    """
+
+
+def is_failed(data):
+    return isinstance(data, FailedResponse)
+
+
+def get_request(base_url, endpoint_path, headers, retTok=None, max_retries=5, refresh=False, budget=None):
     """
     Makes a GET request to the given API endpoint with robust retry and error handling.
     Automatically attaches returningToken if provided.
+    Responses are served from / stored in the response cache when one is configured.
+    Uses the shared pooled session from get_session().
+    Calls are paced by the shared rate limiter when one is configured,
+    otherwise by a short random delay after each call.
+    Latency, status codes, retries, 429s, bytes and cache hits are recorded
+    when metrics are enabled (see metrics.py).
+    With an API key pool configured, every attempt uses the key with the most
+    remaining quota; a 429 / 403 cools that key down and retries on another.
+    refresh=True skips the cache lookup (the fresh response is still stored).
+    A CallBudget (see planner.py) is charged for every network attempt;
+    once it is used up the call fails without a request.
     """
+    import requests
+
+    endpoint = endpoint_path.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1]
+    measure = metrics.enabled()
+
+    cache = get_response_cache()
+    if cache is not None and not refresh:
+        cached = cache.get(base_url, endpoint_path, retTok)
+        if cached is not None:
+            metrics.inc("cache_lookups_total", endpoint=endpoint, result="hit")
+            return cached
+        metrics.inc("cache_lookups_total", endpoint=endpoint, result="miss")
+
     url = base_url + endpoint_path
 
     # Add returningToken only if retTok is defined and not empty
@@ -52,35 +227,78 @@ def get_request(base_url, endpoint_path, headers, retTok=None, max_retries=5):
         else:
             url += f"?returningToken={retTok}"
 
+    session = get_session()
+    limiter = get_rate_limiter()
+    key_pool = get_key_pool()
+
     # Retry loop with exponential backoff
     for attempt in range(1, max_retries + 1):
+        if budget is not None and not budget.spend():
+            if budget.log_exhausted():
+                print(f"[BUDGET] Call budget of {budget.limit} used up: skipping the remaining requests.")
+            return FailedResponse()
         try:
-            print(f"\nAttempt {attempt}: Requesting {url}")
-            response = requests.get(url, headers=headers, timeout=60)
-            print("[SUCCESS] Request sent!")
+            if key_pool is not None:
+                pooled = key_pool.acquire()
+                if pooled is None:
+                    print("[STOP] All API keys are out of quota.")
+                    break
+                key_id, key = pooled
+                headers = dict(headers, **{key_pool.header: key})
+
+            if limiter is not None:
+                limiter.acquire()
+
+            if _log_requests:
+                print(f"\nAttempt {attempt}: Requesting {url}")
+            elif attempt > 1:
+                print(f"Attempt {attempt}: retrying {endpoint}")
+            if attempt > 1:
+                metrics.inc("retries_total", endpoint=endpoint)
+
+            if measure:
+                started = time.perf_counter()
+            response = session.get(url, headers=headers, timeout=_session_timeout)
+            if measure:
+                elapsed = time.perf_counter() - started
+                metrics.observe("request_latency_seconds", elapsed, endpoint=endpoint)
+                metrics.get_metrics().add_phase("network", elapsed)
+                metrics.inc("requests_total", endpoint=endpoint, status=str(response.status_code))
+                metrics.inc("response_bytes_total", len(response.content), endpoint=endpoint)
+            if key_pool is not None:
+                key_pool.on_response(key_id, response.status_code, response.headers)
+                metrics.inc("key_requests_total", key=key_id)
 
             # Raise for HTTP 4xx / 5xx
             response.raise_for_status()
 
-            # Try to parse JSON safely
-            try:
-                data = response.json()
-            except json.JSONDecodeError:
-                print("[WARNING] Response is not valid JSON.")
-                data = {}
+            # Try to parse JSON safely (orjson when installed)
+            with metrics.timed("parsing"):
+                try:
+                    data = loads(response.content)
+                except json.JSONDecodeError:
+                    print("[WARNING] Response is not valid JSON.")
+                    data = {}
 
-            # Extract the 'data' key (if it exists)
-            prices = data.get("data", [])
+                # Extract the 'data' key (if it exists), keeping only the fields we use
+                prices = compact_data(data.get("data", []))
 
             # If no data was found, note it but still return
             if not prices:
                 print("[INFO] No data found in response.")
+            elif cache is not None:
+                cache.put(base_url, endpoint_path, prices, retTok)
 
-            # Optional delay (helps avoid API throttling)
-            time.sleep(random.uniform(0.3, 0.8))
+            if limiter is not None:
+                # Quota headers are per key: with a key pool, the pool handles them
+                limiter.on_success(None if key_pool is not None else response.headers)
+            else:
+                # Optional delay (helps avoid API throttling)
+                time.sleep(random.uniform(0.3, 0.8))
             return prices
 
         except requests.exceptions.Timeout:
+            metrics.inc("timeouts_total", endpoint=endpoint)
             print(f"[TIMEOUT] Timeout on attempt {attempt}. Retrying after short delay...")
         except requests.exceptions.HTTPError as e:
             code = response.status_code if 'response' in locals() else 'N/A'
@@ -88,7 +306,18 @@ def get_request(base_url, endpoint_path, headers, retTok=None, max_retries=5):
             print(f"[ERROR] HTTP {code} error: {msg}")
 
             # Handle common RapidAPI issues
-            if code == 429 or "Invalid API key" in msg:
+            if code == 429:
+                metrics.inc("throttled_total", endpoint=endpoint)
+            if code in (403, 429) and key_pool is not None and key_pool.has_other(key_id):
+                # The pool cooled this key down; retry right away on another one
+                print(f"[WARNING] Switching API key after HTTP {code}...")
+                continue
+            elif code == 429 and limiter is not None:
+                # Limiter slows down and holds all callers for Retry-After
+                pause = limiter.on_throttle(response.headers)
+                print(f"[WARNING] Rate limited. Pausing {pause:.1f}s, rate now {limiter.rate:.2f} req/s...")
+                continue
+            elif code == 429 or "Invalid API key" in msg:
                 wait_time = 5 * attempt
                 print(f"[WARNING] Rate limit or temp block. Waiting {wait_time}s before retrying...")
                 time.sleep(wait_time)
@@ -109,19 +338,79 @@ def get_request(base_url, endpoint_path, headers, retTok=None, max_retries=5):
         print(f"[RETRY] Waiting {wait:.1f}s before retry...")
         time.sleep(wait)
 
+    metrics.inc("failed_requests_total", endpoint=endpoint)
     print("[FAILED] All retries failed or exhausted.")
-    return []
+    return FailedResponse()
+
+
+#########################################
+#            make_executor              #
+#########################################
+
+class InlineExecutor:
+    """
+    Executor with the ThreadPoolExecutor interface that runs every task
+    immediately in the calling thread. Used for the sequential search path.
+    """
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        return False
+
+
+class SearchThreadPool(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor whose with-block only waits for its tasks when left
+    normally. Left early (search generator closed, Ctrl+C, an error), queued
+    requests are cancelled instead of being sent: requests already running
+    finish in the background, nothing new spends API quota.
+    """
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.shutdown(wait=True)
+        else:
+            self.shutdown(wait=False, cancel_futures=True)
+        return False
+
+
+def make_executor(maxWorkers):
+    """
+    Returns a thread pool for maxWorkers > 1, otherwise an InlineExecutor
+    so that maxWorkers=1 behaves exactly like the plain sequential loop.
+    """
+    if maxWorkers is None or int(maxWorkers) <= 1:
+        return InlineExecutor()
+    return SearchThreadPool(max_workers=int(maxWorkers), thread_name_prefix="flight-search")
 
 
 #########################################
 #          get_outgoing_flight          #
 #########################################
 
-def get_outgoing_flight(departureId, arrivalId, departureDate, returnDate, flightDuration, maxPrice, base_url_google_flights, headers, isRoundtrip):
-   # conn = http.client.HTTPSConnection("google-flights4.p.rapidapi.com") # No longer needed with requests
+def parse_airports(ids):
+    # "BER,HAM" / ["BER", "HAM"] → ["BER", "HAM"] (order kept, duplicates dropped)
+    if isinstance(ids, str):
+        ids = ids.split(",")
+    return list(dict.fromkeys(str(airport).strip().upper() for airport in ids if str(airport).strip()))
+
 
-   arrivalDate = datetime.strptime(departureDate, "%Y-%m-%d") + timedelta(days=1)
-   datestr = arrivalDate.strftime("%Y-%m-%d")
+def outgoing_request_path(departureId, arrivalId, departureDate, returnDate, flightDuration, maxPrice, isRoundtrip):
+   """Endpoint path of the outbound search sent by get_outgoing_flight."""
 
    if isRoundtrip:
     req_path = f"/flights/search-roundtrip?departureId={departureId}&arrivalId={arrivalId}&departureDate={departureDate}&arrivalDate={returnDate}"
@@ -132,8 +421,16 @@ def get_outgoing_flight(departureId, arrivalId, departureDate, returnDate, fligh
    req_path += f"&currency=EUR&sort=2&flightDuration={flightDuration}&maxPrice={maxPrice}"
    #req_path = f"/flights/search-one-way?departureId={departureId}&arrivalId={arrivalID}&departureDate={departureDate}&arrivalDate={arrivalDate.strftime("%Y-%m-%d")}"
 
+   return req_path
+
+
+def get_outgoing_flight(departureId, arrivalId, departureDate, returnDate, flightDuration, maxPrice, base_url_google_flights, headers, isRoundtrip, refresh=False, budget=None):
+   # conn = http.client.HTTPSConnection("google-flights4.p.rapidapi.com") # No longer needed with requests
+
+   req_path = outgoing_request_path(departureId, arrivalId, departureDate, returnDate, flightDuration, maxPrice, isRoundtrip)
+
    # Call the updated get_request function
-   prices = get_request(base_url_google_flights, req_path, headers)
+   prices = get_request(base_url_google_flights, req_path, headers, refresh=refresh, budget=budget)
 
    return prices
 
@@ -209,6 +506,7 @@ def find_returns(data_outgoing, base_url, headers, params, retTok=None):
 
   i = 0
 
+  import pandas as pd
   df = pd.DataFrame([])
   match_found = 0
 
@@ -252,8 +550,41 @@ def find_returns(data_outgoing, base_url, headers, params, retTok=None):
 #            add_entry_table            # 
 #########################################
 
-def add_entry_table(flight, data_outgoing,returnDateStr):
-   
+# Column order of the result table / CSV
+ENTRY_COLUMNS = [
+    "Price",
+    "Departure Date Outgoing",
+    "Departure Time Outgoing",
+    "Airline Outgoing",
+    "Flight ID Outgoing",
+    "Flight No Outgoing:",
+    "Duration Mins.",
+    "Duration",
+    "Stops",
+    "Departure Time Return",
+    "Arrival Time Return",
+    "Flight ID",
+    "Flight No:",
+    "Airline",
+    "Arrival Airport Code",
+    "Arrival Time",
+]
+
+
+# Helper fields of result rows (not CSV columns): manifest.flight_key of the
+# outgoing flight, every segment included, for itinerary_key; outbound +
+# return flight time and stops (Duration Mins. / Stops are the return
+# flight's) for ranking; and the fare of both one-way tickets (a one-way
+# row's Price is the inbound leg's) for the price store
+OUTGOING_KEY = "_outgoing_key"
+TOTAL_DURATION = "_total_duration"
+TOTAL_STOPS = "_total_stops"
+TOTAL_PRICE = "_total_price"
+
+
+def build_entry_row(flight, data_outgoing, returnDateStr):
+   """Returns one result row (dict keyed by ENTRY_COLUMNS) for a return flight and its outgoing flight."""
+
    flightNo = f""
    flightID = f""
    arrivalAirportCode = f""
@@ -314,8 +645,22 @@ def add_entry_table(flight, data_outgoing,returnDateStr):
             "Arrival Airport Code" : arrivalAirportCode,
             "Arrival Time" : arrivalTime
          }
-    
-   # Add a single row using the append() method
-   df = pd.DataFrame([row])
-       
-   return df
\ No newline at end of file
+
+   row[OUTGOING_KEY] = flight_key(data_outgoing)
+   durations = [duration_outgoing] + ([flight.get('duration')] if flight != [] else [])
+   row[TOTAL_DURATION] = sum(int(d) for d in durations) if None not in durations else None
+   stops = [data_outgoing.get('stops')] + ([flight.get('stops')] if flight != [] else [])
+   row[TOTAL_STOPS] = sum(int(s) for s in stops) if None not in stops else None
+   return row
+
+
+def add_entry_table(flight, data_outgoing,returnDateStr):
+   """
+   Result table (ENTRY_COLUMNS) of a return flight ([] for none) and its
+   outgoing flight: a view on the normalized itinerary / segment tables
+   (see normalize.py).
+   """
+   from normalize import entry_view, normalize_roundtrip
+
+   results = normalize_roundtrip(data_outgoing, [] if flight == [] else [flight], returnDateStr)
+   return entry_view(*results.tables())
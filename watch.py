@@ -0,0 +1,348 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from batch import load_jobs, job_file_name
+from store import itinerary_key, itinerary_price
+from sweep import iter_date_pairs
+from utilities import load_config
+
+
+# Job keys that describe the watch, not the search
+WATCH_KEYS = ("name", "alertBelow", "alertDrop")
+# Search parameters that only span the date grid: a watch keeps its cells when they change
+GRID_PARAMS = ("departureDateStart", "departureDateEnd", "minDurationDays", "maxDurationDays")
+
+
+def watch_id(spec):
+    """Fingerprint of the search parameters that decide what a date cell holds."""
+    params = {
+        key: value for key, value in spec.items()
+        if key not in WATCH_KEYS and key not in GRID_PARAMS and key != "maxWorkers"
+    }
+    return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def cell_ttl(departureDateStr, ttl, min_ttl, near_days, now=None):
+    """
+    Seconds a date cell's prices count as fresh: ttl, shrinking linearly to
+    min_ttl over the last near_days before departure (prices move faster
+    then). None once the departure date has passed.
+    """
+    now = time.time() if now is None else now
+    days = (datetime.strptime(departureDateStr, "%Y-%m-%d") - datetime.fromtimestamp(now)).total_seconds() / 86400
+    if days < 0:
+        return None
+    if days >= near_days:
+        return ttl
+    return min_ttl + (ttl - min_ttl) * days / near_days
+
+
+def diff_prices(previous, current):
+    """
+    Compares two {itinerary: price} snapshots of a cell.
+    Returns one dict per new, cheaper, pricier or vanished itinerary.
+    """
+    changes = []
+    for itinerary, price in current.items():
+        old = previous.get(itinerary)
+        if old is None:
+            changes.append({"itinerary": itinerary, "change": "new", "old": None, "new": price})
+        elif price < old:
+            changes.append({"itinerary": itinerary, "change": "drop", "old": old, "new": price})
+        elif price > old:
+            changes.append({"itinerary": itinerary, "change": "rise", "old": old, "new": price})
+    for itinerary, old in previous.items():
+        if itinerary not in current:
+            changes.append({"itinerary": itinerary, "change": "gone", "old": old, "new": None})
+    return changes
+
+
+#########################################
+#              WatchState               #
+#########################################
+
+class WatchState:
+    """
+    SQLite record of every watched date cell: when it was last fetched and
+    the price of each itinerary found then (what the next refresh diffs against).
+    """
+
+    def __init__(self, path="watch_state.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS watch_cells ("
+            " watch TEXT NOT NULL,"
+            " departure_date TEXT NOT NULL,"
+            " return_date TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " min_price REAL,"
+            " prices TEXT NOT NULL,"
+            " PRIMARY KEY (watch, departure_date, return_date))"
+        )
+        self._conn.commit()
+
+    def cells(self, watch):
+        """{(departureDate, returnDate): {"fetched_at", "min_price", "prices"}} of one watch."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT departure_date, return_date, fetched_at, min_price, prices FROM watch_cells WHERE watch = ?",
+                (watch,)
+            ).fetchall()
+        return {
+            (departure_date, return_date): {"fetched_at": fetched_at, "min_price": min_price, "prices": json.loads(prices)}
+            for departure_date, return_date, fetched_at, min_price, prices in rows
+        }
+
+    def save_cell(self, watch, departureDateStr, returnDateStr, prices, fetched_at=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO watch_cells (watch, departure_date, return_date, fetched_at, min_price, prices)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (watch, departureDateStr, returnDateStr, time.time() if fetched_at is None else fetched_at,
+                 min(prices.values()) if prices else None, json.dumps(prices))
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+#########################################
+#              AlertSink                #
+#########################################
+
+class AlertSink:
+    """
+    Delivers price alerts: printed as [ALERT] lines, appended to a JSON-lines
+    file and/or POSTed as JSON to a webhook (errors are logged, never raised).
+    """
+
+    def __init__(self, log=True, file=None, webhook=None, timeout=10):
+        self.log = log
+        self.file = file
+        self.webhook = webhook
+        self.timeout = timeout
+
+    def send(self, alert):
+        if self.log:
+            old = f" (was {alert['old']:.0f})" if alert.get("old") is not None else ""
+            print(
+                f"[ALERT] {alert['watch_name']}: {alert['departureDate']} → {alert['returnDate']} "
+                f"now {alert['price']:.0f}{old} – {alert['reason']}"
+            )
+        if self.file:
+            with open(self.file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(alert, default=str) + "\n")
+        if self.webhook:
+            import requests
+            try:
+                requests.post(self.webhook, json=alert, timeout=self.timeout).raise_for_status()
+            except requests.exceptions.RequestException as e:
+                print(f"[WARNING] Alert webhook failed: {e}")
+
+
+#########################################
+#              PriceWatch               #
+#########################################
+
+class PriceWatch:
+    """
+    Keeps one search's date grid up to date at a fraction of a full sweep.
+
+    Each tick() re-searches only the date cells whose last fetch is older
+    than their TTL (see cell_ttl: shorter close to departure), stalest first
+    and at most max_cells per tick, bypassing the response cache. The new
+    prices are diffed against the cell's previous ones, and an alert is sent
+    for every itinerary that is priced below alert_below (when it first gets
+    there or gets cheaper still) or dropped by at least alert_drop (a
+    fraction of its previous price).
+    """
+
+    def __init__(self, spec, config, state, alerts, out_dir="watch_results",
+                 ttl=21600, min_ttl=1800, near_days=14, max_cells=None, alert_below=None, alert_drop=None):
+        self.spec = spec
+        self.name = spec.get("name") or f"{spec['departureId']}-{spec['arrivalId']}"
+        self.id = watch_id(spec)
+        self.config = config
+        self.state = state
+        self.alerts = alerts
+        self.out_dir = out_dir
+        self.ttl = ttl
+        self.min_ttl = min_ttl
+        self.near_days = near_days
+        self.max_cells = max_cells
+        self.alert_below = spec.get("alertBelow", alert_below)
+        self.alert_drop = spec.get("alertDrop", alert_drop)
+
+    def plan(self, now=None):
+        """
+        (stale, fresh, past): the cells to refresh this tick (most overdue
+        first), the number of cells still fresh and of cells already departed.
+        """
+        now = time.time() if now is None else now
+        cells = self.state.cells(self.id)
+        due = []
+        fresh = past = 0
+
+        for pair in iter_date_pairs(self.spec["departureDateStart"], self.spec["departureDateEnd"],
+                                    self.spec["minDurationDays"], self.spec["maxDurationDays"]):
+            ttl = cell_ttl(pair[0], self.ttl, self.min_ttl, self.near_days, now)
+            if ttl is None:
+                past += 1
+                continue
+            cell = cells.get(pair)
+            # Never fetched cells first, then by how far past their TTL
+            overdue = float("inf") if cell is None else (now - cell["fetched_at"]) / max(ttl, 1)
+            if overdue >= 1:
+                due.append((overdue, pair))
+            else:
+                fresh += 1
+
+        due.sort(key=lambda item: -item[0])
+        stale = [pair for _, pair in due]
+        if self.max_cells is not None:
+            stale = stale[:self.max_cells]
+        return stale, fresh, past
+
+    def _alert_reason(self, previous_price, price):
+        if self.alert_below is not None and price < float(self.alert_below):
+            if previous_price is None or previous_price >= float(self.alert_below) or price < previous_price:
+                return f"below {float(self.alert_below):.0f}"
+        if self.alert_drop and previous_price and price <= previous_price * (1 - float(self.alert_drop)):
+            return f"dropped {1 - price / previous_price:.0%}"
+        return None
+
+    def tick(self, now=None):
+        """Refreshes the stale cells once. Returns a summary of the tick."""
+        from main import iter_flight_search
+
+        stale, fresh, past = self.plan(now)
+        summary = {
+            "watch": self.name, "cells_refreshed": 0, "cells_failed": 0, "cells_fresh": fresh,
+            "cells_past": past, "changes": 0, "alerts": [],
+        }
+        if not stale:
+            return summary
+
+        print(f"[WATCH] {self.name}: refreshing {len(stale)} stale date pairs ({fresh} still fresh)")
+        previous_cells = self.state.cells(self.id)
+        search_kwargs = {key: value for key, value in self.spec.items() if key not in WATCH_KEYS}
+        isRoundtrip = search_kwargs.get("isRoundtrip", True)
+        os.makedirs(self.out_dir, exist_ok=True)
+
+        cell_prices = {}
+        search = iter_flight_search(
+            config=self.config, fileName=job_file_name(self.out_dir, {"name": self.name}),
+            resume=False, pairs=stale, refresh=True, **search_kwargs
+        )
+        for batch in search:
+            pair = (batch["departureDate"], batch["returnDate"])
+            prices = cell_prices.setdefault(pair, {})
+            for row in batch["rows"]:
+                price = itinerary_price(row)
+                if price is None:
+                    continue
+                itinerary = itinerary_key(row, isRoundtrip)
+                prices[itinerary] = min(price, prices.get(itinerary, price))
+            if not batch["pair_done"]:
+                continue
+
+            # The date pair is complete: diff, alert and store it
+            previous = previous_cells.get(pair, {}).get("prices", {})
+            changes = diff_prices(previous, prices)
+            summary["changes"] += len(changes)
+            for change in changes:
+                if change["new"] is None:
+                    continue
+                reason = self._alert_reason(change["old"], change["new"])
+                if reason is not None:
+                    alert = {
+                        "watch_name": self.name, "departureId": self.spec["departureId"], "arrivalId": self.spec["arrivalId"],
+                        "departureDate": pair[0], "returnDate": pair[1], "itinerary": change["itinerary"],
+                        "price": change["new"], "old": change["old"], "reason": reason, "at": time.time(),
+                    }
+                    self.alerts.send(alert)
+                    summary["alerts"].append(alert)
+            self.state.save_cell(self.id, pair[0], pair[1], prices, now)
+            summary["cells_refreshed"] += 1
+
+        # Pairs whose searches failed stay stale and are retried next tick
+        summary["cells_failed"] = len(stale) - summary["cells_refreshed"]
+        return summary
+
+
+#########################################
+#               run_watch               #
+#########################################
+
+def run_watch(jobs_file, config_file="config.json", interval=None, ticks=None):
+    """
+    Watches every search of a JSON-lines job file (see batch.load_jobs;
+    jobs may add "alertBelow" / "alertDrop"), one tick every `interval`
+    seconds, for `ticks` ticks (None = forever). Settings come from the
+    'watch' section of config.json:
+        state_path, out_dir, interval, ttl, min_ttl, near_days,
+        max_cells_per_tick, alert_below, alert_drop,
+        alerts: {log, file, webhook}
+    """
+    config = load_config(config_file)
+    watch_config = config.get("watch") or {}
+    alert_config = watch_config.get("alerts") or {}
+    interval = interval if interval is not None else watch_config.get("interval", 1800)
+
+    state = WatchState(watch_config.get("state_path", "watch_state.sqlite"))
+    alerts = AlertSink(
+        log=alert_config.get("log", True),
+        file=alert_config.get("file"),
+        webhook=alert_config.get("webhook"),
+    )
+    watches = [
+        PriceWatch(
+            job, config, state, alerts,
+            out_dir=watch_config.get("out_dir", "watch_results"),
+            ttl=watch_config.get("ttl", 21600),
+            min_ttl=watch_config.get("min_ttl", 1800),
+            near_days=watch_config.get("near_days", 14),
+            max_cells=watch_config.get("max_cells_per_tick"),
+            alert_below=watch_config.get("alert_below"),
+            alert_drop=watch_config.get("alert_drop"),
+        )
+        for job in load_jobs(jobs_file)
+    ]
+
+    tick = 0
+    try:
+        while ticks is None or tick < ticks:
+            started = time.time()
+            for watch in watches:
+                summary = watch.tick()
+                print(
+                    f"[WATCH] {summary['watch']}: {summary['cells_refreshed']} refreshed, {summary['cells_failed']} failed, "
+                    f"{summary['cells_fresh']} fresh, {summary['changes']} price changes, {len(summary['alerts'])} alerts"
+                )
+            tick += 1
+            if ticks is None or tick < ticks:
+                time.sleep(max(0.0, interval - (time.time() - started)))
+    finally:
+        state.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep flight searches up to date, refreshing only stale date pairs.")
+    parser.add_argument("jobs_file", help="JSON-lines file with one search spec per line (as for batch.py)")
+    parser.add_argument("--config", default="config.json", help="config file")
+    parser.add_argument("--interval", type=float, default=None, help="seconds between ticks (default: config)")
+    parser.add_argument("--ticks", type=int, default=None, help="stop after this many ticks (default: run forever)")
+    args = parser.parse_args()
+
+    run_watch(args.jobs_file, args.config, args.interval, args.ticks)